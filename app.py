@@ -1,5 +1,5 @@
 # app.py  ──────────────────────────────────────────────────────────────
-import os, re, streamlit as st
+import math, os, re, uuid, streamlit as st
 from dotenv import load_dotenv
 
 load_dotenv()                                            # local .env for dev
@@ -11,11 +11,13 @@ os.environ["OPENAI_API_KEY"] = (
 
 # ── Local helpers ─────────────────────────────────────────────────────
 from backend.app.otp import (
-    generate_otp, store_otp, retrieve_stored_otp,
+    issue_otp, describe_refusal, retrieve_stored_otp,
     delete_otp, find_email,
 )
 from backend.app.email_utils import send_otp_email, send_plain_email
-from backend.app.monument_search import answer_monument_query
+from backend.app.llm_gateway import LLMUnavailableError
+from backend.app.monument_search import ensure_index, fallback_answer, model_answer
+from backend.app.guide_cache import detailed_guide
 
 # ── Page config & CSS (use your existing big CSS block) ───────────────
 st.set_page_config(page_title="Historical Monument Agent",
@@ -23,6 +25,13 @@ st.set_page_config(page_title="Historical Monument Agent",
 st.markdown("""<style> … YOUR  CSS  BLOCK … </style>""",
             unsafe_allow_html=True)
 
+# ── Monument index: built (if stale) once per server, before any query ─
+@st.cache_resource(show_spinner="🔧 Building the monument index…")
+def prepare_index() -> None:
+    ensure_index()                                       # file-locked, no-op when current
+
+prepare_index()
+
 # ── Session-state defaults ────────────────────────────────────────────
 for k, v in {
     "messages": [],
@@ -32,15 +41,60 @@ for k, v in {
     "email": None,
     "last_monument_query": None,
     "user_input": None,
+    "session_id": uuid.uuid4().hex,                      # OTP rate-limit scope
 }.items():
     st.session_state.setdefault(k, v)
 
-# ── Chat-bubble helper ────────────────────────────────────────────────
+# ── Answer memo (shared by all sessions of this server) ───────────────
+ANSWER_CACHE_TTL = 6 * 3600                              # seconds
+ANSWER_CACHE_ENTRIES = 2048
+
+def normalise_query(text: str) -> str:
+    """'  Tell me about the TAJ   Mahal?! ' → 'tell me about the taj mahal'"""
+    return " ".join(text.lower().split()).rstrip("?!. ")
+
+@st.cache_data(ttl=ANSWER_CACHE_TTL, max_entries=ANSWER_CACHE_ENTRIES, show_spinner=False)
+def cached_answer(key: str, _query: str) -> str:
+    # Only *key* is hashed (leading underscore); the first asker's wording is answered.
+    # Raises LLMUnavailableError during an outage: st.cache_data keeps no
+    # result then, so only real model answers are memoised
+    return model_answer(_query)
+
+def answer(text: str) -> str:
+    try:
+        return cached_answer(normalise_query(text), text)
+    except LLMUnavailableError:
+        return fallback_answer(text)                     # shown, never cached
+
+# ── Chat-bubble helpers ───────────────────────────────────────────────
+HISTORY_TAIL = 8                                         # always-visible messages
+HISTORY_PAGE_SIZE = 20                                   # older messages per page
+
 def bubble(role: str, text: str):
     avatar = "🤖" if role == "assistant" else None
     with st.chat_message(role, avatar=avatar):
         st.markdown(text)
 
+def render_history(messages: list[dict]) -> None:
+    """
+    Render the latest turns; older ones stay collapsed and are drawn one
+    page at a time only when opened, so reruns cost the same however long
+    the conversation gets.
+    """
+    older, recent = messages[:-HISTORY_TAIL], messages[-HISTORY_TAIL:]
+    if older and st.toggle(f"Show {len(older)} earlier messages", key="show_history"):
+        pages = math.ceil(len(older) / HISTORY_PAGE_SIZE)
+        page = pages
+        if pages > 1:
+            page = int(st.number_input("Page", min_value=1, max_value=pages,
+                                       value=pages, key="history_page"))
+        start = (page - 1) * HISTORY_PAGE_SIZE
+        for m in older[start:start + HISTORY_PAGE_SIZE]:
+            bubble(m["role"], m["content"])
+        st.divider()
+    for m in recent:
+        bubble(m["role"], m["content"])
+
 # ── Main loop ─────────────────────────────────────────────────────────
 def main() -> None:
     st.title("🏛️ Historical Monument Agent")
@@ -52,9 +106,8 @@ def main() -> None:
             "content": "Hey there 👋  Ask me about any historical monument!"
         })
 
-    # 2) replay history
-    for m in st.session_state.messages:
-        bubble(m["role"], m["content"])
+    # 2) replay history (latest turns; older ones collapsed & paged)
+    render_history(st.session_state.messages)
 
     # 3) free-text input (hidden while OTP form showing)
     fresh_text = None
@@ -104,10 +157,18 @@ def main() -> None:
             st.session_state.email = email
             st.session_state.awaiting_email = False
 
-            code = generate_otp()
-            store_otp(email, code)
-
-            if send_otp_email(email, code):
+            decision, code = issue_otp(email, session_id=st.session_state.session_id)
+            if code is None:
+                # within the resend cooldown the earlier code is still usable
+                in_cooldown = decision.reason == "cooldown" and decision.reuse_otp
+                st.session_state.awaiting_otp = bool(in_cooldown)
+                st.session_state.awaiting_email = not in_cooldown
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": f"⚠️ {describe_refusal(decision)}"
+                })
+                st.rerun()
+            elif send_otp_email(email, code):
                 st.session_state.awaiting_otp = True
                 st.session_state.messages.append({
                     "role": "assistant",
@@ -144,10 +205,7 @@ def main() -> None:
                 })
 
                 if st.session_state.last_monument_query:
-                    guide = answer_monument_query(
-                        st.session_state.last_monument_query
-                        + "\nPlease give me a more detailed guide."
-                    )
+                    guide = detailed_guide(st.session_state.last_monument_query)
                     send_plain_email(
                         st.session_state.email,
                         f"Guide: {st.session_state.last_monument_query.title()}",
@@ -175,13 +233,13 @@ def main() -> None:
     # ── (C) fresh monument question ───────────────────────────────────
     st.session_state.last_monument_query = txt
     with st.spinner("🔍 Searching monument database…"):
-        answer = answer_monument_query(txt)
+        reply = answer(txt)
 
     st.session_state.awaiting_email = True
     st.session_state.messages.append({
         "role": "assistant",
         "content": (
-            answer +
+            reply +
             "\n\nIf you’d like more details emailed, please tell me your e-mail address."
         )
     })
@@ -0,0 +1,193 @@
+# backend/app/admission.py
+"""
+Admission control for the chat API.
+
+Each pool caps how many turns run at once and how many may wait.  Waiters
+are served round-robin per client, so one noisy client cannot starve the
+rest, and nobody waits longer than the pool's queue deadline:
+
+• over the per-client limit         → 429 + Retry-After
+• queue full / deadline exceeded    → 503 + Retry-After
+
+Cheap OTP turns use their own pool, so they never queue behind LLM
+generation.  Which pool a turn belongs to follows the graph's own routing
+(see :meth:`AdmissionController.pool_for`), never the text alone: a
+6-digit number in a question is still a question.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from backend.app.otp import scan_input
+
+OTP_POOL = "otp"
+LLM_POOL = "llm"
+
+
+class Rejected(Exception):
+    """Raised instead of queueing; mapped to a 429/503 response."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def _percentile(samples: Deque[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class AdmissionPool:
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        per_client_limit: int,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_client_limit = per_client_limit
+
+        self.active = 0
+        self.queued = 0
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._per_client: Counter = Counter()     # active + queued per client
+
+        self.counters: Counter = Counter()
+        self._queue_waits: Deque[float] = deque(maxlen=1000)
+        self._service_times: Deque[float] = deque(maxlen=1000)
+
+    # ── slot handling ────────────────────────────────────────────────────
+    def _retry_after(self) -> int:
+        service = _percentile(self._service_times, 0.5) or 1.0
+        return max(1, math.ceil(service * (self.queued + 1) / self.max_concurrency))
+
+    def _reject(self, status_code: int, reason: str, detail: str) -> Rejected:
+        self.counters[f"rejected_{reason}"] += 1
+        return Rejected(status_code, detail, self._retry_after())
+
+    def _drop_waiter(self, client: str, waiter: asyncio.Future) -> None:
+        queue = self._waiters.get(client)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._waiters[client]
+            self.queued -= 1
+
+    def _forget(self, client: str) -> None:
+        self._per_client[client] -= 1
+        if self._per_client[client] <= 0:
+            del self._per_client[client]
+
+    def _release(self, client: str) -> None:
+        self._forget(client)
+        # Hand the slot straight to the next client in round-robin order
+        while self._waiters:
+            next_client, queue = next(iter(self._waiters.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._waiters.move_to_end(next_client)
+            else:
+                del self._waiters[next_client]
+            self.queued -= 1
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    async def _acquire(self, client: str) -> None:
+        if self._per_client[client] >= self.per_client_limit:
+            raise self._reject(429, "client_limit", "Too many concurrent requests from this client.")
+
+        if self.active < self.max_concurrency and not self.queued:
+            self.active += 1
+            self._per_client[client] += 1
+            self._queue_waits.append(0.0)
+            return
+
+        if self.queued >= self.max_queue:
+            raise self._reject(503, "queue_full", "Server busy, please retry shortly.")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(client, deque()).append(waiter)
+        self.queued += 1
+        self._per_client[client] += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:            # client went away while queued
+            if waiter.done():
+                self._release(client)             # pass the granted slot on
+            else:
+                self._drop_waiter(client, waiter)
+                self._forget(client)
+            raise
+
+        if not waiter.done():                     # deadline passed, never granted
+            self._drop_waiter(client, waiter)
+            self._forget(client)
+            raise self._reject(503, "queue_timeout", "Server busy, please retry shortly.")
+        self._queue_waits.append(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def admit(self, client: str) -> AsyncIterator[None]:
+        await self._acquire(client)
+        self.counters["admitted"] += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_times.append(time.monotonic() - started)
+            self._release(client)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "counters": dict(self.counters),
+            "queue_wait_seconds": {
+                "p50": _percentile(self._queue_waits, 0.5),
+                "p95": _percentile(self._queue_waits, 0.95),
+                "max": max(self._queue_waits, default=None),
+            },
+            "service_seconds_p50": _percentile(self._service_times, 0.5),
+        }
+
+
+class AdmissionController:
+    def __init__(self, pools: Dict[str, AdmissionPool]) -> None:
+        self.pools = pools
+
+    @staticmethod
+    def pool_for(user_input: Optional[str], awaiting_otp: bool = False) -> str:
+        """
+        The pool for a turn, given the session's loaded state.  Mirrors
+        ``process_user_input``: while a code is awaited every reply is
+        answered without the LLM, and an e-mail address goes to ``send_otp``.
+        Anything else may hit the LLM.
+        """
+        if awaiting_otp or scan_input(user_input).email:
+            return OTP_POOL
+        return LLM_POOL
+
+    def admit(self, user_input: Optional[str], client: str, awaiting_otp: bool = False):
+        return self.pools[self.pool_for(user_input, awaiting_otp)].admit(client)
+
+    def stats(self) -> dict:
+        return {name: pool.stats() for name, pool in self.pools.items()}
@@ -8,7 +8,6 @@ import logging
 
 # ------------------- Logging Setup -------------------
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 # ------------------- FastAPI Router -------------------
 router = APIRouter()
@@ -50,6 +49,7 @@ async def chat_endpoint(request: ChatRequest):
     # 2) Append the user's latest message to state.messages,
     #    and store it in state.user_input so our LangGraph graph can see it.
     state.user_input = user_input
+    state.session_id = session_id
     state.messages.append(HumanMessage(content=user_input))
 
     try:
@@ -1,8 +1,86 @@
 # backend/app/config.py
 
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
-class Settings(BaseSettings):
+class RuntimeSettings(BaseSettings):
+    """
+    Tunables with safe defaults and no secrets, so the Streamlit build
+    (which has no SendGrid/secret env vars) can load them as well.
+    """
+
+    # FAISS index layout – any faiss.index_factory string, e.g.
+    #   "Flat" (exact), "HNSW32", "SQ8" (int8 scalar), "IVF4096,PQ32"
+    index_factory: str = "Flat"
+    # Vectors sampled to train IVF / PQ / SQ indexes before adding the rest
+    index_train_size: int = 100_000
+    # Search-time knobs (ignored by index types that do not use them)
+    index_nprobe: int = 16        # IVF lists probed per query
+    index_ef_search: int = 64     # HNSW candidate list size
+    # Map index.faiss read-only instead of reading it into each process:
+    # the page cache then holds one copy shared by every worker
+    index_mmap: bool = True
+    # Restrict vector search to monuments in places named in the query
+    location_filter: bool = True
+    # Largest squared L2 distance (unit-length embeddings: 2 - 2·cosine) at
+    # which the nearest monument still counts as what a query is about;
+    # beyond it the query gets the off-topic reply, the e-mailed guide falls
+    # back to a QA answer and a location-filtered search to the full index.
+    # Unset (default): any distance, as before.  Calibrate per embedding
+    # model before setting it, from the distances of known on- and off-topic
+    # queries: ``python -m backend.bench.match_distance``
+    match_max_distance: Optional[float] = None
+    # Nearest neighbours stored per monument at build time, for related
+    # suggestions (0: none)
+    index_neighbors: int = 10
+
+    # LLM gateway (see backend/app/llm_gateway.py)
+    openai_api_key: Optional[str] = None   # required by Settings; optional here
+    llm_provider: str = "openai"           # "openai" | "fake" (offline)
+    llm_model: str = "gpt-3.5-turbo"
+    llm_fallback_model: Optional[str] = "gpt-4o-mini"
+    llm_temperature: float = 0.7
+    llm_timeout_seconds: float = 20.0      # per-call deadline
+    llm_hedge: bool = True                 # duplicate calls slower than p95
+    llm_hedge_min_delay: float = 1.0
+    llm_breaker_failures: int = 5
+    llm_breaker_reset_seconds: float = 30.0
+    llm_answer_cache_size: int = 512       # last good answers kept for fallback
+    llm_fake_latency: float = 0.0
+
+    # Admission control (backend/app/admission.py): separate pools so cheap
+    # OTP turns never wait behind LLM generation.  The LLM gateway sizes
+    # its thread pool from admission_llm_concurrency
+    admission_llm_concurrency: int = 32
+    admission_llm_queue: int = 64
+    admission_llm_queue_timeout: float = 5.0
+    admission_otp_concurrency: int = 16
+    admission_otp_queue: int = 64
+    admission_otp_queue_timeout: float = 2.0
+    admission_per_client: int = 8       # active + queued turns per client IP
+
+    # Optional joblib-pickled sklearn pipeline backing the intent pre-router
+    intent_model_path: Optional[str] = None
+    intent_model_threshold: float = 0.85
+
+    # Proxies in front of the API that append to X-Forwarded-For; the
+    # client address is the hop the outermost one added (0: socket peer)
+    trusted_proxy_count: int = 1
+
+    # REDIS_URL names a Redis Cluster node (backend/app/redis_store.py)
+    redis_cluster: bool = False
+
+    # Logging (backend/app/logging_setup.py)
+    log_level: str = "INFO"
+    log_json: bool = True
+    log_sample_rate: float = 1.0           # share of INFO/DEBUG records kept
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"   # Ignore any additional environment variables
+
+class Settings(RuntimeSettings):
     # Required API keys
     openai_api_key: str
     sendgrid_api_key: str
@@ -19,8 +97,33 @@ class Settings(BaseSettings):
     # Any application‐specific secret (e.g. for signing JWTs or sessions)
     secret_key: str
 
+    # Local read-through copy of chat state, invalidated over pub/sub;
+    # a TTL of 0 reads Redis on every turn
+    state_cache_ttl_seconds: float = 5.0
+    state_cache_size: int = 10_000
+    state_cache_channel: str = "chat_state:invalidate"
+
+    # Readiness: dependency checks are cached this long, so probes stay cheap
+    health_check_ttl_seconds: float = 5.0
+    health_check_timeout_seconds: float = 1.0
+
+    # Traffic capture for replay (backend/app/traffic_capture.py); off unless set
+    capture_dir: Optional[str] = None
+    capture_sample_rate: float = 1.0    # share of conversations kept
+
+    # Sent as X-Admin-Token to /admin/* (profiling); unset disables them
+    admin_token: Optional[str] = None
+
     class Config:
         env_file = ".env"
         extra = "ignore"   # Ignore any additional environment variables
 
-settings = Settings()
+runtime_settings = RuntimeSettings()
+
+def __getattr__(name: str):
+    # ``settings`` is built on first import of the name, not of this module,
+    # so Streamlit code can use ``runtime_settings`` without the API secrets.
+    if name == "settings":
+        globals()["settings"] = Settings()
+        return globals()["settings"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
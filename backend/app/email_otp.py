@@ -14,7 +14,6 @@ from otp import generate_otp, store_otp, verify_otp           # local modules
 from email_utils import send_otp_email
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 
 # --------------------------------------------------------------------------- #
@@ -52,6 +51,8 @@ def verify_user_otp(email: str, user_input_otp: str) -> bool:
 # --------------------------------------------------------------------------- #
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     print("OTP Email Testing System")
     print("-" * 32)
 
@@ -10,11 +10,15 @@ Exposed helpers
 All credentials come from st.secrets:
     SENDGRID_API_KEY   –  your SendGrid API key
     EMAIL_SENDER       –  a verified sender address in SendGrid
+
+EMAIL_BACKEND=null (env or secrets) skips SendGrid entirely and reports
+every send as successful – for offline runs and traffic replay.
 """
 
 from __future__ import annotations
 
 import logging
+import os
 from typing import Final, Optional
 
 import streamlit as st
@@ -27,7 +31,10 @@ logger = logging.getLogger(__name__)
 #  Client & sender pulled from Streamlit secrets
 # --------------------------------------------------------------------------- #
 
-SENDGRID_CLIENT: Final = SendGridAPIClient(st.secrets["SENDGRID_API_KEY"])
+EMAIL_BACKEND:    Final = os.getenv("EMAIL_BACKEND") or st.secrets.get("EMAIL_BACKEND", "sendgrid")
+SENDGRID_CLIENT:  Final = (
+    None if EMAIL_BACKEND == "null" else SendGridAPIClient(st.secrets["SENDGRID_API_KEY"])
+)
 SENDER_EMAIL:     Final = st.secrets.get("EMAIL_SENDER", "no-reply@example.com")
 
 # --------------------------------------------------------------------------- #
@@ -39,6 +46,9 @@ def _send(mail: Mail) -> bool:
     Actually call SendGrid; return True iff status code is 2xx.
     Logs non-2xx or raised exceptions.
     """
+    if SENDGRID_CLIENT is None:                        # EMAIL_BACKEND=null
+        logger.debug("EMAIL_BACKEND=null: e-mail not sent")
+        return True
     try:
         resp = SENDGRID_CLIENT.send(mail)
         ok = 200 <= resp.status_code < 300
@@ -0,0 +1,38 @@
+# backend/app/forwarding.py
+"""
+Who is the client behind our proxies?
+
+X-Forwarded-For is a list the client starts and every proxy appends to, so
+only the entries our own proxies added can be trusted.  With
+``TRUSTED_PROXY_COUNT`` proxies in front of the app the client is the
+address the outermost of them saw: the N-th entry from the right.
+Anything further left was written by the caller and is ignored, so a
+forged header cannot change which per-IP OTP window or admission slot a
+request is counted against.  ``TRUSTED_PROXY_COUNT=0`` (no proxy) uses the
+socket peer and ignores the header altogether.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from backend.app.config import runtime_settings
+
+
+def client_address(
+    forwarded_for: Optional[str],
+    peer: Optional[str],
+    trusted_proxies: Optional[int] = None,
+) -> Optional[str]:
+    """
+    ``client_address("6.6.6.6, 203.0.113.7", "10.0.0.2")`` → ``"203.0.113.7"``
+    with one trusted proxy: the forged first hop is skipped.
+    """
+    count = runtime_settings.trusted_proxy_count if trusted_proxies is None else trusted_proxies
+    if count <= 0 or not forwarded_for:
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    if not hops:
+        return peer
+    # Fewer hops than proxies: every entry was appended by one of ours
+    return hops[-count] if len(hops) >= count else hops[0]
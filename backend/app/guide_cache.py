@@ -0,0 +1,244 @@
+# backend/app/guide_cache.py
+"""
+Pre-generated "detailed guide" store for the e-mail path.
+
+Guides are written ahead of time by a batch job and keyed by monument
+*and* a hash of the record they were generated from, so editing an entry
+in data/monuments.json invalidates exactly that monument's guide.
+
+Storage is an append-only JSON-Lines file (last line per key wins), which
+lets the batch job (``backend.app.guide_pipeline``) write one guide at a
+time and resume after a crash.  Appends from any process share an
+``flock`` on ``<file>.lock``; :meth:`GuideCache.compact` takes it
+exclusively, so no guide appended meanwhile is lost in its rewrite.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from backend.app.llm_gateway import LLMUnavailableError, llm_gateway
+from backend.app.monument_search import (
+    ROOT_DIR,
+    answer_monument_query,
+    match_threshold,
+    monument_search,
+)
+from backend.app.prompts import describe_monument
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Keys & hashing
+# --------------------------------------------------------------------------- #
+
+GUIDES_PATH = Path(os.getenv("GUIDES_PATH", ROOT_DIR / "data" / "guides.jsonl"))
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def _slug(text: str) -> str:
+    return _SLUG_RE.sub("-", text.lower()).strip("-")
+
+
+def monument_key(monument: dict) -> str:
+    """
+    Stable slug for a monument record, e.g. ``"taj-mahal--agra-india"``.
+    Name *and* location, so same-named rows (several "Fort"s or "St.
+    Mary's Church"es) keep guides of their own.
+    """
+    location = _slug(monument.get("location") or "")
+    name = _slug(monument["name"])
+    return f"{name}--{location}" if location else name
+
+
+def _legacy_key(monument: dict) -> str:
+    """Name-only key of guides written before locations were part of it."""
+    return _slug(monument["name"])
+
+
+def content_hash(monument: dict) -> str:
+    """Short hash over the fields a guide is generated from (missing == empty)."""
+    payload = json.dumps(
+        {f: monument.get(f) or "" for f in ("name", "location", "description")},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+# --------------------------------------------------------------------------- #
+# File-backed cache
+# --------------------------------------------------------------------------- #
+
+class GuideCache:
+    """
+    ``monument key → {"hash", "guide"}`` loaded from a JSON-Lines file.
+
+    The file is re-read only when its mtime changes, so lookups from the
+    request path are plain dict reads.
+    """
+
+    def __init__(self, path: Path = GUIDES_PATH) -> None:
+        self._path = Path(path)
+        self._entries: Dict[str, dict] = {}
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        """Shared for appends, exclusive for compaction, across processes."""
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._path.with_name(f"{self._path.name}.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, dict]:
+        entries: Dict[str, dict] = {}
+        with open(self._path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:   # torn write from a crash
+                    logger.warning("Skipping malformed line in %s", self._path)
+                    continue
+                entries[row["key"]] = row
+        return entries
+
+    def _refresh(self) -> None:
+        try:
+            mtime = self._path.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            self._entries, self._mtime = self._read(), mtime
+
+    def load(self) -> int:
+        """Read the file now (startup warmup); returns the number of guides."""
+        self._refresh()
+        return len(self._entries)
+
+    def get(self, monument: dict) -> Optional[str]:
+        """Return the guide for *monument* if it matches the current record."""
+        self._refresh()
+        digest = content_hash(monument)
+        # A legacy entry still serves the record it was generated from: the
+        # hash covers the location, so a same-named row cannot pick it up
+        for key in (monument_key(monument), _legacy_key(monument)):
+            entry = self._entries.get(key)
+            if entry and entry["hash"] == digest:
+                return entry["guide"]
+        return None
+
+    def is_fresh(self, monument: dict) -> bool:
+        return self.get(monument) is not None
+
+    def written_in(self, monument: dict, run_id: str) -> bool:
+        """True if run *run_id* already wrote the current guide for *monument*."""
+        self._refresh()
+        entry = self._entries.get(monument_key(monument))
+        return bool(entry) and entry["hash"] == content_hash(monument) and entry.get("run") == run_id
+
+    def put(self, monument: dict, guide: str, run_id: Optional[str] = None) -> None:
+        """Append (or supersede) the guide for *monument*."""
+        row = {
+            "key": monument_key(monument),
+            "hash": content_hash(monument),
+            "name": monument["name"],
+            "guide": guide,
+        }
+        if run_id is not None:
+            row["run"] = run_id
+        with self._lock, self._file_lock(exclusive=False):
+            in_sync = self._path.exists() and self._path.stat().st_mtime == self._mtime
+            with open(self._path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries[row["key"]] = row
+            if in_sync:   # nobody else wrote meanwhile – skip the re-read
+                self._mtime = self._path.stat().st_mtime
+
+    def compact(self) -> None:
+        """Rewrite the file keeping only the latest line per monument."""
+        with self._lock, self._file_lock(exclusive=True):
+            if not self._path.exists():
+                return
+            # Re-read under the lock: it holds every append of every process
+            entries = self._read()
+            tmp = self._path.with_name(f"{self._path.name}.tmp-{os.getpid()}")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for row in entries.values():
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self._path)
+            self._entries, self._mtime = entries, self._path.stat().st_mtime
+
+
+guide_cache = GuideCache()
+
+# --------------------------------------------------------------------------- #
+# Generation & lookup
+# --------------------------------------------------------------------------- #
+
+def guide_prompt(monument: dict) -> str:
+    return (
+        "Write a detailed visitor guide for the historical monument below. "
+        "Cover its history, architecture, significance and practical tips "
+        "for visiting.\n\n"
+        f"Name: {monument['name']}\n"
+        f"Location: {monument['location']}\n"
+        f"Description: {monument['description']}\n"
+    )
+
+
+def generate_guide(monument: dict) -> str:
+    """Run the LLM for one monument (used by the batch job and on a miss)."""
+    return llm_gateway.invoke(guide_prompt(monument)).content.strip()
+
+
+def detailed_guide(query: str) -> str:
+    """
+    Detailed guide for the monument *query* is about.
+
+    A cache hit costs one similarity search and no LLM call.  On a miss the
+    guide is generated and stored for the next user; if no monument is
+    close enough (MATCH_MAX_DISTANCE) we fall back to the retrieval QA
+    answer, and with no LLM available to the catalogue entry itself.
+    """
+    matches = monument_search.search(query, k=1, max_distance=match_threshold())
+    if not matches:
+        return answer_monument_query(query + "\nPlease give me a more detailed guide.")
+
+    monument = matches[0]
+    guide = guide_cache.get(monument)
+    if guide is None:
+        logger.info("Guide cache miss for %s", monument["name"])
+        try:
+            guide = generate_guide(monument)
+        except LLMUnavailableError:
+            logger.warning("LLM unavailable; e-mailing the catalogue entry for %s", monument["name"])
+            return (
+                f"{describe_monument(monument)}\n\n"
+                "A fuller guide could not be written just now – ask again later for the complete version."
+            )
+        guide_cache.put(monument, guide)
+    return guide
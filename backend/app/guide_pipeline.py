@@ -0,0 +1,204 @@
+# backend/app/guide_pipeline.py
+"""
+Batch job that (re)generates detailed monument guides.
+
+• Streams records from the catalogue instead of loading it up front
+• Keeps at most ``--concurrency`` LLM requests in flight
+• Throttles to ``--rpm`` requests/minute and backs off on 429s,
+  honouring the provider's Retry-After
+• Appends each guide to the guide cache as soon as it is ready; the cache
+  file doubles as the checkpoint, so a re-run skips finished monuments
+• Stamps every guide with the run id; an interrupted ``--force`` run
+  resumed with ``--run-id`` skips the guides it already rewrote
+
+Usage:
+
+    python -m backend.app.guide_pipeline [--source data/monuments.json]
+        [--concurrency 8] [--rpm 3000] [--max-retries 5]
+        [--force [--run-id 20261019T080000-3f9a1c]]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+import openai
+
+from backend.app.guide_cache import guide_cache, guide_prompt, monument_key
+from backend.app.llm_gateway import llm_gateway
+from backend.app.logging_setup import configure_logging
+from backend.app.monument_search import DATA_PATH, iter_monuments
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Request pacing
+# --------------------------------------------------------------------------- #
+
+class RequestPacer:
+    """
+    Spaces request starts to stay under *rpm*, and lets any worker pause
+    everyone when the provider says we are going too fast.
+    """
+
+    def __init__(self, rpm: Optional[int]) -> None:
+        self._interval = 60.0 / rpm if rpm else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def pause(self, seconds: float) -> None:
+        self._next_start = max(self._next_start, time.monotonic() + seconds)
+
+
+def _retry_after(exc: openai.APIStatusError) -> Optional[float]:
+    try:
+        return float(exc.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+# --------------------------------------------------------------------------- #
+# Pipeline
+# --------------------------------------------------------------------------- #
+
+def _label(monument: object) -> str:
+    """The monument's slug for log lines, even for a malformed record."""
+    try:
+        return monument_key(monument)
+    except (KeyError, TypeError, AttributeError):
+        return repr(monument)[:80]
+
+
+class GuidePipeline:
+    def __init__(
+        self,
+        concurrency: int = 8,
+        rpm: Optional[int] = None,
+        max_retries: int = 5,
+        force: bool = False,
+        run_id: Optional[str] = None,
+    ) -> None:
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.force = force
+        self.run_id = run_id or f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.pacer = RequestPacer(rpm)
+        # The raw provider: bulk work paces and retries itself, and must not
+        # hedge (double cost) or trip the request path's circuit breaker.
+        self.llm = llm_gateway.primary
+        self.written = self.skipped = self.failed = 0
+
+    async def _generate(self, monument: dict) -> Optional[str]:
+        prompt = guide_prompt(monument)
+        for attempt in range(self.max_retries + 1):
+            await self.pacer.wait()
+            try:
+                return (await self.llm.ainvoke(prompt)).content.strip()
+            except openai.RateLimitError as exc:
+                delay = _retry_after(exc) or min(60.0, 2 ** attempt)
+                self.pacer.pause(delay)
+                logger.warning("Rate limited; pausing %.1fs (%s)", delay, monument["name"])
+            except (openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError):
+                delay = min(60.0, 2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning("Transient error for %s; retrying in %.1fs", monument["name"], delay)
+                await asyncio.sleep(delay)
+        return None
+
+    async def _process(self, monument: dict) -> None:
+        # Nothing may escape: a task's exception would go unnoticed and the
+        # run would report success with guides missing
+        try:
+            guide = await self._generate(monument)
+            if guide is None:
+                self.failed += 1
+                logger.error("Giving up on %s", _label(monument))
+                return
+            await asyncio.to_thread(guide_cache.put, monument, guide, self.run_id)
+        except Exception:                                # noqa: BLE001
+            self.failed += 1
+            logger.exception("Guide failed for %s", _label(monument))
+            return
+        self.written += 1
+        logger.info("Guide written for %s", _label(monument))
+
+    async def run(self, source: Path = DATA_PATH) -> None:
+        logger.info("Guide run %s%s", self.run_id, " (force)" if self.force else "")
+        slots = asyncio.Semaphore(self.concurrency)
+        in_flight: set = set()
+
+        # Acquiring a slot before reading the next record keeps the job's
+        # memory bounded by the concurrency, not by the catalogue size.
+        for monument in iter_monuments(source):
+            try:
+                # --force rewrites every guide, but only once per run
+                fresh = (
+                    guide_cache.written_in(monument, self.run_id) if self.force
+                    else guide_cache.is_fresh(monument)
+                )
+            except (KeyError, TypeError, AttributeError):
+                self.failed += 1
+                logger.error("Unusable catalogue record %s", _label(monument))
+                continue
+            if fresh:
+                self.skipped += 1
+                continue
+            await slots.acquire()
+            task = asyncio.create_task(self._process(monument))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            task.add_done_callback(lambda _t: slots.release())
+
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        guide_cache.compact()
+
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+
+if __name__ == "__main__":
+    configure_logging(json_output=False)
+
+    parser = argparse.ArgumentParser(description="Generate detailed monument guides.")
+    parser.add_argument("--source", type=Path, default=DATA_PATH,
+                        help="monument catalogue (.json array or .jsonl)")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="max LLM requests in flight")
+    parser.add_argument("--rpm", type=int, default=None,
+                        help="max LLM requests started per minute")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--force", action="store_true", help="regenerate every guide")
+    parser.add_argument("--run-id", default=None,
+                        help="resume this interrupted --force run (default: a new run)")
+    ns = parser.parse_args()
+
+    pipeline = GuidePipeline(
+        concurrency=ns.concurrency, rpm=ns.rpm, max_retries=ns.max_retries,
+        force=ns.force, run_id=ns.run_id,
+    )
+    started = time.perf_counter()
+    asyncio.run(pipeline.run(ns.source))
+    print(
+        f"{pipeline.written} written, {pipeline.skipped} up to date, "
+        f"{pipeline.failed} failed in {time.perf_counter() - started:.1f}s"
+    )
+    if pipeline.failed:
+        if pipeline.force:
+            print(f"Resume with: --force --run-id {pipeline.run_id}")
+        raise SystemExit(1)
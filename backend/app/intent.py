@@ -0,0 +1,165 @@
+# backend/app/intent.py
+"""
+Cheap intent pre-router in front of the monument RAG flow.
+
+Greetings, thanks, acknowledgements and empty input are answered from
+canned replies by compiled rules, so only real questions reach retrieval
+and the LLM.  An optional tiny local model (any scikit-learn style
+pipeline with ``predict_proba``) can catch what the rules miss.
+
+Per-intent counters show how much LLM traffic the pre-router saves.
+
+:func:`follow_up_choice` spots "tell me about the next one" style replies
+to the related monuments suggested in the previous answer.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from backend.app.config import runtime_settings
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Intents, rules & canned replies
+# --------------------------------------------------------------------------- #
+
+MONUMENT_QUERY = "monument_query"     # default: goes to retrieval + LLM
+
+_END = r"[\s!.,:)]*$"                 # trailing punctuation / emoticon noise
+
+_RULES: Tuple[Tuple[str, "re.Pattern[str]"], ...] = (
+    ("empty", re.compile(r"^\W*$")),
+    ("greeting", re.compile(
+        r"^\s*(hi+|hello+|hey+|hiya|howdy|namaste|greetings|"
+        r"good\s+(morning|afternoon|evening))(\s+(there|bot|agent))?" + _END, re.I)),
+    ("thanks", re.compile(
+        r"^\s*(thanks?|thank\s+you|thx|ty|cheers|much\s+appreciated)"
+        r"(\s+(so|very)\s+much)?(\s+(a\s+lot|again))?" + _END, re.I)),
+    ("acknowledgement", re.compile(
+        r"^\s*(ok(ay)?|k|cool|great|nice|got\s+it|sure|alright|awesome|perfect|"
+        r"understood)" + _END, re.I)),
+    ("goodbye", re.compile(
+        r"^\s*(bye|goodbye|see\s+(you|ya)|cya|good\s*night)" + _END, re.I)),
+    ("help", re.compile(
+        r"^\s*(help|what\s+can\s+you\s+do|who\s+are\s+you|how\s+does\s+this\s+work)\??\s*$", re.I)),
+)
+
+REPLIES: Dict[str, str] = {
+    "empty": "Ask me anything about a historical monument!",
+    "greeting": "Hello! 👋 Ask me about any historical monument.",
+    "thanks": "You're welcome! Anything else you'd like to know about historical monuments?",
+    "acknowledgement": "Great! Feel free to ask about another monument.",
+    "goodbye": "Goodbye! Come back any time to explore more monuments.",
+    "help": (
+        "I'm a historical monument agent. Ask me about a monument – its history, "
+        "location or architecture – and I can also e-mail you a detailed guide."
+    ),
+}
+
+
+# "the next one", "tell me about the second one", "what about another?" …
+_FOLLOW_UP = re.compile(
+    r"^\s*(?:(?:and|ok(?:ay)?|so)[\s,]+)?"
+    r"(?:(?:tell|talk)\s+me\s+(?:more\s+)?about\s+|what\s+about\s+|how\s+about\s+|"
+    r"show\s+me\s+|go\s+to\s+|and\s+)?"
+    r"(?:the\s+)?(?P<which>next|first|second|third|1st|2nd|3rd|another|other)"
+    r"(?:\s+(?:one|monument|site|place|suggestion))?(?:\s+please)?[\s?!.]*$",
+    re.I,
+)
+_POSITIONS = {
+    "next": 0, "first": 0, "1st": 0, "another": 0, "other": 0,
+    "second": 1, "2nd": 1, "third": 2, "3rd": 2,
+}
+
+
+class Intent(NamedTuple):
+    name: str
+    reply: Optional[str]       # canned answer, or None → run the full graph
+    source: str                # "rule" | "model" | "default"
+
+
+# --------------------------------------------------------------------------- #
+# Classifier
+# --------------------------------------------------------------------------- #
+
+ModelFn = Callable[[str], Tuple[str, float]]
+
+
+def _load_model(path: str) -> Optional[ModelFn]:
+    """Wrap a joblib-pickled sklearn pipeline as ``text → (label, prob)``."""
+    try:
+        import joblib
+    except ImportError:
+        logger.warning("intent_model_path set but joblib is not installed; rules only")
+        return None
+
+    pipeline = joblib.load(path)
+
+    def predict(text: str) -> Tuple[str, float]:
+        probs = pipeline.predict_proba([text])[0]
+        best = int(probs.argmax())
+        return str(pipeline.classes_[best]), float(probs[best])
+
+    return predict
+
+
+class IntentClassifier:
+    def __init__(self, model: Optional[ModelFn] = None, threshold: float = 0.85) -> None:
+        self._model = model
+        self._threshold = threshold
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def classify(self, text: str) -> Intent:
+        intent = self._classify(text or "")
+        with self._lock:
+            self._counts[intent.name] += 1
+        return intent
+
+    def _classify(self, text: str) -> Intent:
+        for name, pattern in _RULES:
+            if pattern.match(text):
+                return Intent(name, REPLIES[name], "rule")
+
+        if self._model is not None and len(text) < 200:
+            try:
+                label, prob = self._model(text)
+            except Exception:                            # noqa: BLE001
+                logger.exception("Intent model failed; falling back to RAG")
+            else:
+                if label in REPLIES and prob >= self._threshold:
+                    return Intent(label, REPLIES[label], "model")
+
+        return Intent(MONUMENT_QUERY, None, "default")
+
+    def stats(self) -> dict:
+        """Per-intent counts and how many LLM round-trips were skipped."""
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        avoided = total - counts.get(MONUMENT_QUERY, 0)
+        return {
+            "counts": counts,
+            "total": total,
+            "llm_calls_avoided": avoided,
+            "avoided_ratio": avoided / total if total else 0.0,
+        }
+
+
+def follow_up_choice(text: str) -> Optional[int]:
+    """Position in the last suggestion list that *text* asks for, else ``None``."""
+    match = _FOLLOW_UP.match(text or "")
+    return _POSITIONS[match.group("which").lower()] if match else None
+
+
+intent_classifier = IntentClassifier(
+    model=_load_model(runtime_settings.intent_model_path)
+    if runtime_settings.intent_model_path else None,
+    threshold=runtime_settings.intent_model_threshold,
+)
@@ -11,18 +11,21 @@ from typing import Optional, List, Dict
 from pydantic import BaseModel, Field
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
 
-from backend.app.config import settings
-from backend.app.monument_search import monument_search
+from backend.app.llm_gateway import LLMUnavailableError, llm_gateway
+from backend.app.monument_search import match_threshold, monument_search
+from backend.app.guide_cache import guide_cache
+from backend.app.intent import follow_up_choice, intent_classifier
+from backend.app.prompts import describe_monument, monument_prompt, off_topic_prompt
 from backend.app.otp import (
-    generate_otp,
-    store_otp,
+    issue_otp,
+    describe_refusal,
     retrieve_stored_otp,
     delete_otp,
     is_valid_email,     # quick syntactic check
-    find_email,         # ← NEW helper: pull e-mail out of a sentence
-    extract_otp         # ← NEW helper: pull 6-digit code out of text
+    extract_otp,        # fallback when no scan is cached on the state
+    scan_input,         # one pass: e-mail / 6-digit code / free text
+    InputScan,
 )
 from backend.app.email_utils import (
     send_otp_email,     # keep OTP template
@@ -34,9 +37,12 @@ from backend.app.email_utils import (
 # --------------------------------------------------------------------------- #
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
-llm = ChatOpenAI(model="gpt-3.5-turbo", openai_api_key=settings.openai_api_key)
+# All model calls go through the gateway (deadlines, hedging, fallbacks)
+llm = llm_gateway
+
+# Related monuments suggested under a monument answer
+RELATED_SHOWN = 3
 
 # --------------------------------------------------------------------------- #
 # Chat-state dataclass
@@ -51,11 +57,22 @@ class ChatState(BaseModel):
     email: Optional[str] = None
     otp_attempts: int = 0
 
+    # Caller identity, used to rate-limit OTP e-mails
+    session_id: Optional[str] = None
+    client_ip: Optional[str] = None
+
+    # scan_input() result for the current user_input, shared by all nodes
+    input_scan: Optional[InputScan] = None
+
     monument_results: List[Dict] = Field(default_factory=list)
     response: Optional[str] = None
     next_step: str = "process_user_input"
     last_monument_query: Optional[str] = None
 
+    # Monuments suggested under the last answer, in the order shown;
+    # "tell me about the next one" picks from here without retrieval
+    related_monument_ids: List[int] = Field(default_factory=list)
+
 # --------------------------------------------------------------------------- #
 #  Node: process_user_input
 # --------------------------------------------------------------------------- #
@@ -65,18 +82,21 @@ def process_user_input(state: ChatState) -> ChatState:
     Decide routing based on flags & fresh user_input.
     1. Awaiting_email  → try to extract an e-mail.
     2. Awaiting_otp    → try to extract a 6-digit code.
-    3. Otherwise       → treat as a new monument query.
+    3. "The next one"  → the suggested monument, no retrieval.
+    4. Small talk      → canned reply from the intent pre-router.
+    5. Otherwise       → treat as a new monument query.
     """
-    logger.info(
+    logger.debug(
         "Processing user_input; awaiting_email=%s awaiting_otp=%s input=%r",
         state.awaiting_email, state.awaiting_otp, state.user_input,
     )
 
     # ------------------------------------------------------- #
-    # Record message if present
+    # Record message if present; classify it once for all nodes
     # ------------------------------------------------------- #
     if state.user_input:
         state.messages.append(HumanMessage(content=state.user_input))
+    scan = state.input_scan = scan_input(state.user_input)
 
     # ------------------------------------------------------- #
     # We are waiting for an e-mail address
@@ -86,9 +106,8 @@ def process_user_input(state: ChatState) -> ChatState:
             state.next_step = END
             return state
 
-        email = find_email(state.user_input)
-        if email:
-            state.email = email
+        if scan.email:
+            state.email = scan.email
             state.awaiting_email = False
             state.next_step = "send_otp"
             logger.info("Valid e-mail extracted → send_otp")
@@ -108,9 +127,8 @@ def process_user_input(state: ChatState) -> ChatState:
             state.next_step = END
             return state
 
-        code = extract_otp(state.user_input, digits=6)
-        if code:
-            logger.info("Extracted OTP %s → process_otp_input", code)
+        if scan.otp:
+            logger.info("OTP entered → process_otp_input")
             state.next_step = "process_otp_input"
             return state
 
@@ -125,15 +143,42 @@ def process_user_input(state: ChatState) -> ChatState:
     # Check for voluntary e-mail submission
     # ------------------------------------------------------- #
     if not state.awaiting_email and not state.awaiting_otp and state.user_input:
-        email = find_email(state.user_input)
-        logger.info("find_email returned: %s for user_input: %r", email, state.user_input)
-        if email:
-            state.email = email
+        if scan.email:
+            state.email = scan.email
             state.next_step = "send_otp"
             logger.info("Voluntary e-mail extracted → send_otp")
             state.user_input = None # Consume the email input as it's been handled
             return state
 
+    # ------------------------------------------------------- #
+    # Follow-up on a related suggestion: a row lookup, no search
+    # ------------------------------------------------------- #
+    choice = follow_up_choice(state.user_input or "") if state.related_monument_ids else None
+    if choice is not None and choice < len(state.related_monument_ids):
+        chosen = state.related_monument_ids[choice]
+        monument = monument_search.get(chosen)
+        if monument is not None:
+            logger.info("Follow-up on suggestion %d → generate_monument_response", choice)
+            state.monument_results = [monument]
+            state.last_monument_query = f"Tell me about {monument['name']}."
+            # Keep walking the same list: the rest of it is suggested next
+            state.related_monument_ids = [i for i in state.related_monument_ids if i != chosen]
+            state.next_step = "generate_monument_response"
+            state.user_input = None
+            return state
+
+    # ------------------------------------------------------- #
+    # Greetings, thanks, empty input … answered without RAG/LLM
+    # ------------------------------------------------------- #
+    intent = intent_classifier.classify(state.user_input or "")
+    if intent.reply is not None:
+        logger.info("Pre-router intent %s (%s) → canned reply", intent.name, intent.source)
+        state.messages.append(AIMessage(content=intent.reply))
+        state.response = intent.reply
+        state.next_step = END
+        state.user_input = None
+        return state
+
     # ------------------------------------------------------- #
     # Fresh monument query (default route)
     # ------------------------------------------------------- #
@@ -147,7 +192,9 @@ def process_user_input(state: ChatState) -> ChatState:
 
 def check_query_type(state: ChatState) -> ChatState:
     query = state.messages[-1].content if state.messages else ""
-    results = monument_search.search(query, k=1)
+    # Nothing close enough (MATCH_MAX_DISTANCE) → off-topic answer
+    results = monument_search.search(query, k=1, max_distance=match_threshold())
+    state.related_monument_ids = []
     if results:
         state.monument_results = results
         state.last_monument_query = query
@@ -159,20 +206,43 @@ def check_query_type(state: ChatState) -> ChatState:
     return state
 
 
+def _suggest_related(state: ChatState) -> str:
+    """
+    "You might also like …" for the answered monument: what is left of a
+    list being walked, else its precomputed neighbours (O(1), no search).
+    Sets ``related_monument_ids`` to what is shown.
+    """
+    if state.related_monument_ids:
+        related = [monument_search.get(i) for i in state.related_monument_ids[:RELATED_SHOWN]]
+    elif state.monument_results and state.monument_results[0].get("id") is not None:
+        related = monument_search.related(state.monument_results[0]["id"], k=RELATED_SHOWN)
+    else:
+        related = []
+    related = [m for m in related if m is not None]
+    state.related_monument_ids = [m["id"] for m in related]
+    if not related:
+        return ""
+    names = [m["name"] for m in related]
+    listed = names[0] if len(names) == 1 else f"{', '.join(names[:-1])} and {names[-1]}"
+    return f"\n\nYou might also like {listed}. Say \"next one\" to hear about {names[0]}."
+
+
 def generate_monument_response(state: ChatState) -> ChatState:
-    context = "\n".join(
-        f"{m['name']} ({m['location']}): {m['description']}"
-        for m in state.monument_results
-    )
-    user_q = state.messages[-1].content
-    prompt = (
-        "Using the information below, answer concisely. Provide a detailed answer covering all key aspects.\n\n"
-        f"User: {user_q}\n\nInformation:\n{context}\n\nBot:"
-    )
-    brief = llm.invoke(prompt).content.strip()
+    # A resolved follow-up ("the next one") is asked as "Tell me about <name>."
+    user_q = state.last_monument_query or state.messages[-1].content
+    # Stable instructions + per-monument context first, question last,
+    # so the provider can reuse the cached prefix
+    prompt = monument_prompt(state.monument_results, user_q)
+    try:
+        brief = llm.invoke(prompt).content.strip()
+    except LLMUnavailableError:
+        # No model and no cached answer: fall back to the retrieved facts
+        logger.warning("LLM unavailable; answering from retrieved context")
+        brief = "\n".join(describe_monument(m) for m in state.monument_results)
     reply = (
         brief
         + " If you'd like more details e-mailed to you, please feel free to provide your email address in the chat."
+        + _suggest_related(state)
     )
     state.messages.append(AIMessage(content=reply))
     state.response = reply
@@ -182,11 +252,10 @@ def generate_monument_response(state: ChatState) -> ChatState:
 
 def generate_non_monument_response(state: ChatState) -> ChatState:
     question = state.messages[-1].content
-    prompt = (
-        f"The user asked: {question}\n"
-        "Please politely say you only answer questions about historical monuments."
-    )
-    answer = llm.invoke(prompt).content
+    try:
+        answer = llm.invoke(off_topic_prompt(question)).content
+    except LLMUnavailableError:
+        answer = "Sorry, I can only answer questions about historical monuments."
     state.messages.append(AIMessage(content=answer))
     state.response = answer
     state.next_step = END
@@ -195,10 +264,21 @@ def generate_non_monument_response(state: ChatState) -> ChatState:
 
 def send_otp_step(state: ChatState) -> ChatState:
     email = state.email
-    otp = generate_otp()
-    store_otp(email, otp, ttl_seconds=300)
+    decision, otp = issue_otp(
+        email, session_id=state.session_id, ip=state.client_ip, ttl_seconds=300
+    )
+
+    if otp is None:
+        logger.info("OTP send refused (%s) for email: %s", decision.reason, email)
+        msg = describe_refusal(decision)
+        # Inside the cooldown the earlier code is still the one to enter
+        state.awaiting_otp = decision.reason == "cooldown" and decision.reuse_otp is not None
+        state.response = msg
+        state.messages.append(AIMessage(content=msg))
+        state.next_step = END
+        return state
 
-    logger.info("Generated OTP: %s for email: %s", otp, email)
+    logger.info("OTP issued for email: %s", email)
 
     if send_otp_email(email, otp):
         msg = (
@@ -221,12 +301,18 @@ def send_otp_step(state: ChatState) -> ChatState:
 
 
 def process_otp_input(state: ChatState) -> ChatState:
-    # Use state.user_input to extract the OTP, as it comes directly from the form submission
-    code = extract_otp(state.user_input, digits=6) or ""
+    # Reuse the scan process_user_input cached on the state
+    if state.input_scan is not None:
+        code = state.input_scan.otp or ""
+    else:
+        code = extract_otp(state.user_input or "") or ""
     email = state.email
     stored = retrieve_stored_otp(email)
 
-    logger.info("User entered OTP: %s, Stored OTP: %s for email: %s", code, stored, email)
+    logger.info(
+        "OTP check for email: %s → %s", email,
+        "no stored code" if stored is None else "match" if code == stored else "mismatch",
+    )
 
     if stored and code == stored:
         delete_otp(email)
@@ -264,13 +350,15 @@ def final_confirmation(state: ChatState) -> ChatState:
     monument_info_list = []
 
     logger.info("Final confirmation initiated for email: %s, last_monument_query: %r", email, monument_query)
-    logger.info("Type of monument_query: %s", type(monument_query))
 
-    if monument_query:
+    if monument_query and state.monument_results:
+        # The monument the last answer was about (set with last_monument_query)
+        monument_info_list = state.monument_results[:1]
+    elif monument_query:
         # Attempt to search for the monument details
         try:
-            monument_info_list = monument_search.search(monument_query, k=1)
-            logger.info("Found monument info for email: %s", monument_info_list)
+            monument_info_list = monument_search.search(monument_query, k=1, max_distance=match_threshold())
+            logger.debug("Monument for e-mail guide: %s", [m["name"] for m in monument_info_list])
         except Exception as e:
             logger.error("Error searching for monument details for email: %s", e)
             monument_info_list = [] # Ensure it's an empty list on error
@@ -282,12 +370,14 @@ def final_confirmation(state: ChatState) -> ChatState:
     
     if monument_info_list:
         monument = monument_info_list[0]
+        # Prefer the pre-generated guide; it is a plain lookup, no LLM call
+        guide = guide_cache.get(monument)
         email_subject = f"Details about {monument['name']}"
         email_body = (
             f"Dear user,\n\nHere are the details you requested about {monument['name']}:\n\n"
             f"Name: {monument['name']}\n"
             f"Location: {monument['location']}\n"
-            f"Description: {monument['description']}\n\n"
+            f"Description: {guide or monument['description']}\n\n"
             "If you have any more questions, feel free to ask!"
         )
     else:
@@ -340,6 +430,7 @@ graph.add_conditional_edges(
         "send_otp": "send_otp",
         "process_otp_input": "process_otp_input",
         "check_query_type": "check_query_type",
+        "generate_monument_response": "generate_monument_response",
         END: END,
     },
 )
@@ -0,0 +1,543 @@
+# backend/app/llm_gateway.py
+"""
+Single entry point for chat-model calls on the request path.
+
+• Every call has a deadline (``llm_timeout_seconds`` unless overridden)
+• Hedging: once enough latencies are known, a call still unanswered after
+  the observed p95 gets a duplicate request; the first reply wins
+• Circuit breaker: after ``llm_breaker_failures`` consecutive failures the
+  primary model is skipped for ``llm_breaker_reset_seconds``
+• Fallbacks, in order: ``llm_fallback_model``, then the last good answer
+  to the same prompt; otherwise :class:`LLMUnavailableError`
+• Prompt-token usage, including tokens the provider served from its
+  prefix cache, is counted per reply (see ``backend/app/prompts.py``)
+• ``LLM_PROVIDER=fake`` swaps in :class:`FakeChatProvider`, so the graph,
+  API and Streamlit app all run offline
+• Streamed turns (:func:`streaming_turn`) are never hedged and never
+  stream a fallback, so a client sees tokens of one completion only
+• Worker threads are sized for every admitted turn to hedge and fall
+  back at once, so neither waits for a thread past its own deadline
+
+Nodes keep the familiar ``llm_gateway.invoke(prompt).content`` shape.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from functools import cached_property
+from typing import Any, AsyncIterator, Iterator, List, Optional, Sequence, Union
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from backend.app.config import runtime_settings
+
+logger = logging.getLogger(__name__)
+
+Prompt = Union[str, Sequence[BaseMessage]]
+
+# Latency samples needed before hedging kicks in
+_HEDGE_MIN_SAMPLES = 20
+
+
+class LLMUnavailableError(RuntimeError):
+    """Primary, fallback model and answer cache all failed for a prompt."""
+
+
+# --------------------------------------------------------------------------- #
+# Offline provider
+# --------------------------------------------------------------------------- #
+
+class FakeChatProvider(BaseChatModel):
+    """
+    Deterministic stand-in for a chat model: replies with a fixed summary
+    of the prompt after *latency* seconds.  Used offline and in replay runs.
+    A real LangChain chat model, so it streams tokens to /chat/ws like one.
+    """
+
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-offline"
+
+    @staticmethod
+    def _reply(messages: List[BaseMessage]) -> str:
+        text = str(messages[-1].content)
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:8]
+        snippet = " ".join(text.split()[-12:])
+        return f"[offline answer {digest}] {snippet}"
+
+    @staticmethod
+    def _pieces(text: str) -> List[str]:
+        words = text.split(" ")
+        return [word + " " for word in words[:-1]] + words[-1:]
+
+    def _generate(self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None,
+                  **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None,
+                         **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        if self.latency:
+            time.sleep(self.latency)                 # time to first token
+        for piece in self._pieces(self._reply(messages)):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager is not None:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for piece in self._pieces(self._reply(messages)):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager is not None:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+
+# --------------------------------------------------------------------------- #
+# Streamed turns
+# --------------------------------------------------------------------------- #
+
+class TokenStream:
+    """
+    Which chat-model runs a streaming transport may forward tokens from,
+    for one turn (see :func:`streaming_turn`).  Inside a streamed turn the
+    gateway makes one streamed attempt at a time: no hedging, and the
+    fallback model answers unstreamed.  A primary attempt the gateway gave
+    up on is abandoned here, so its late tokens are never interleaved with
+    the answer that replaced it; the final message carries the full reply.
+    """
+
+    def __init__(self) -> None:
+        self._abandoned: set = set()
+
+    def abandon(self, run_id: uuid.UUID) -> None:
+        self._abandoned.add(str(run_id))
+
+    def forwards(self, run_id: Any) -> bool:
+        return str(run_id) not in self._abandoned
+
+
+_token_stream: contextvars.ContextVar[Optional[TokenStream]] = contextvars.ContextVar(
+    "llm_token_stream", default=None
+)
+
+
+@contextmanager
+def streaming_turn() -> Iterator[TokenStream]:
+    """Mark the calls made in this context as streamed to a client."""
+    stream = TokenStream()
+    token = _token_stream.set(stream)
+    try:
+        yield stream
+    finally:
+        _token_stream.reset(token)
+
+
+# --------------------------------------------------------------------------- #
+# Breaker & latency tracking
+# --------------------------------------------------------------------------- #
+
+class CircuitBreaker:
+    """
+    Closed → open after N straight failures → half-open after a cool-down.
+    Half-open admits a single probe; its success closes the breaker, its
+    failure re-opens it.  A probe that never reports (cancelled caller) is
+    given up on after another cool-down, and the next call probes instead.
+    """
+
+    def __init__(self, failures: int, reset_seconds: float) -> None:
+        self._threshold = failures
+        self._reset = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self._opened_at >= self._reset else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self._reset:
+                return False
+            if self._probe_started is not None and now - self._probe_started < self._reset:
+                return False                     # a probe is already in flight
+            self._probe_started = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures, self._opened_at, self._probe_started = 0, None, None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_started = None
+            if self._failures >= self._threshold or self._opened_at is not None:
+                self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    def __init__(self, size: int = 200) -> None:
+        self._samples: deque = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self._samples) < _HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# --------------------------------------------------------------------------- #
+# Gateway
+# --------------------------------------------------------------------------- #
+
+def _prompt_key(prompt: Prompt) -> str:
+    if isinstance(prompt, str):
+        payload = prompt
+    else:
+        payload = json.dumps([(m.type, m.content) for m in prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _prompt_usage(reply: Any) -> tuple:
+    """``(prompt tokens, of which served from the provider's prefix cache)``."""
+    usage = (getattr(reply, "response_metadata", None) or {}).get("token_usage") or {}
+    prompt = usage.get("prompt_tokens") or 0
+    cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+    if not prompt:                                   # newer langchain: usage_metadata
+        meta = getattr(reply, "usage_metadata", None) or {}
+        prompt = meta.get("input_tokens") or 0
+        cached = (meta.get("input_token_details") or {}).get("cache_read") or 0
+    return prompt, cached
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        primary: Any,
+        fallback: Any = None,
+        timeout: float = 20.0,
+        hedge: bool = True,
+        hedge_min_delay: float = 1.0,
+        breaker: Optional[CircuitBreaker] = None,
+        answer_cache_size: int = 512,
+        max_workers: int = 32,
+    ) -> None:
+        self.primary = primary
+        self.fallback = fallback
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker or CircuitBreaker(5, 30.0)
+        self.latency = LatencyTracker()
+        # Split by whether the provider served part of the prompt from cache
+        self.latency_prefix_hit = LatencyTracker()
+        self.latency_prefix_miss = LatencyTracker()
+        self._answers: OrderedDict = OrderedDict()
+        self._answer_cache_size = answer_cache_size
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self.counters: Counter = Counter()
+
+    # ── bookkeeping ──────────────────────────────────────────────────────
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def _observe(self, reply: AIMessage, seconds: float) -> None:
+        self.latency.record(seconds)
+        prompt_tokens, cached_tokens = _prompt_usage(reply)
+        if not prompt_tokens:
+            return
+        (self.latency_prefix_hit if cached_tokens else self.latency_prefix_miss).record(seconds)
+        with self._lock:
+            self.counters["prompt_tokens"] += prompt_tokens
+            self.counters["cached_prompt_tokens"] += cached_tokens
+
+    def _remember(self, key: str, reply: AIMessage) -> None:
+        with self._lock:
+            self._answers[key] = reply
+            self._answers.move_to_end(key)
+            while len(self._answers) > self._answer_cache_size:
+                self._answers.popitem(last=False)
+
+    def _recall(self, key: str) -> Optional[AIMessage]:
+        with self._lock:
+            return self._answers.get(key)
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge:
+            return None
+        p95 = self.latency.percentile(0.95)
+        return None if p95 is None else max(self.hedge_min_delay, p95)
+
+    def _budgets(self, timeout: Optional[float]) -> tuple:
+        """Split the deadline between primary and fallback model."""
+        total = timeout or self.timeout
+        if self.fallback is None:
+            return total, 0.0
+        return total * 0.75, total * 0.25
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            "counters": counters,
+            "breaker": self.breaker.state,
+            "p50_seconds": self.latency.percentile(0.5),
+            "p95_seconds": self.latency.percentile(0.95),
+            "prompt_cache": {
+                "cached_token_ratio": (
+                    counters.get("cached_prompt_tokens", 0) / counters["prompt_tokens"]
+                    if counters.get("prompt_tokens") else None
+                ),
+                "p50_seconds_hit": self.latency_prefix_hit.percentile(0.5),
+                "p50_seconds_miss": self.latency_prefix_miss.percentile(0.5),
+            },
+        }
+
+    # ── sync path (graph nodes run in worker threads) ────────────────────
+    def _call_sync(self, provider: Any, prompt: Prompt, budget: float, hedge: bool,
+                   config: Optional[dict] = None) -> AIMessage:
+        started = time.monotonic()
+        deadline = started + budget
+        hedge_delay = self._hedge_delay() if hedge else None
+        hedge_at = started + hedge_delay if hedge_delay is not None else None
+
+        def submit():
+            # copy_context keeps LangChain callbacks (token streaming) attached
+            return self._pool.submit(contextvars.copy_context().run, provider.invoke, prompt, config)
+
+        pending = {submit()}
+        last_exc: Optional[BaseException] = None
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wait_for = deadline - now
+            if hedge_at is not None:
+                wait_for = min(wait_for, max(0.0, hedge_at - now))
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._observe(future.result(), time.monotonic() - started)
+                    return future.result()
+                last_exc = future.exception()
+            if hedge_at is not None and pending and time.monotonic() >= hedge_at:
+                pending.add(submit())
+                hedge_at = None
+                self._count("hedged")
+
+        if pending:
+            raise TimeoutError(f"LLM call exceeded {budget:.1f}s")
+        raise last_exc
+
+    @staticmethod
+    def _attempt_configs() -> tuple:
+        """``(stream, primary config, fallback config)`` for the current turn."""
+        stream = _token_stream.get()
+        if stream is None:
+            return None, None, None
+        # The primary streams under a known run id; the fallback not at all
+        return stream, {"run_id": uuid.uuid4()}, {"callbacks": []}
+
+    def invoke(self, prompt: Prompt, timeout: Optional[float] = None) -> AIMessage:
+        """Answer *prompt*, falling back as described in the module docstring."""
+        self._count("calls")
+        key = _prompt_key(prompt)
+        primary_budget, fallback_budget = self._budgets(timeout)
+        stream, primary_config, fallback_config = self._attempt_configs()
+
+        if self.breaker.allow():
+            try:
+                reply = self._call_sync(self.primary, prompt, primary_budget, hedge=stream is None,
+                                        config=primary_config)
+            except Exception as exc:                       # noqa: BLE001
+                if stream is not None:
+                    stream.abandon(primary_config["run_id"])
+                self.breaker.record_failure()
+                self._count("primary_failed")
+                logger.warning("Primary LLM failed: %r", exc)
+            else:
+                self.breaker.record_success()
+                self._remember(key, reply)
+                return reply
+        else:
+            self._count("breaker_skipped")
+
+        if self.fallback is not None:
+            try:
+                reply = self._call_sync(self.fallback, prompt, fallback_budget or primary_budget, hedge=False,
+                                        config=fallback_config)
+            except Exception as exc:                       # noqa: BLE001
+                logger.warning("Fallback LLM failed: %r", exc)
+            else:
+                self._count("fallback_model")
+                self._remember(key, reply)
+                return reply
+
+        return self._cached_or_raise(key)
+
+    # ── async path (batch jobs, async callers) ───────────────────────────
+    async def _call_async(self, provider: Any, prompt: Prompt, budget: float, hedge: bool,
+                          config: Optional[dict] = None) -> AIMessage:
+        started = time.monotonic()
+        hedge_delay = self._hedge_delay() if hedge else None
+        tasks = {asyncio.ensure_future(provider.ainvoke(prompt, config))}
+        try:
+            if hedge_delay is not None and hedge_delay < budget:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    tasks.add(asyncio.ensure_future(provider.ainvoke(prompt, config)))
+                    self._count("hedged")
+            remaining = budget - (time.monotonic() - started)
+            last_exc: Optional[BaseException] = None
+            while tasks and remaining > 0:
+                done, tasks = await asyncio.wait(tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._observe(task.result(), time.monotonic() - started)
+                        return task.result()
+                    last_exc = task.exception()
+                remaining = budget - (time.monotonic() - started)
+            if tasks:
+                raise TimeoutError(f"LLM call exceeded {budget:.1f}s")
+            raise last_exc
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def ainvoke(self, prompt: Prompt, timeout: Optional[float] = None) -> AIMessage:
+        self._count("calls")
+        key = _prompt_key(prompt)
+        primary_budget, fallback_budget = self._budgets(timeout)
+        stream, primary_config, fallback_config = self._attempt_configs()
+
+        if self.breaker.allow():
+            try:
+                reply = await self._call_async(self.primary, prompt, primary_budget, hedge=stream is None,
+                                               config=primary_config)
+            except Exception as exc:                       # noqa: BLE001
+                if stream is not None:
+                    stream.abandon(primary_config["run_id"])
+                self.breaker.record_failure()
+                self._count("primary_failed")
+                logger.warning("Primary LLM failed: %r", exc)
+            else:
+                self.breaker.record_success()
+                self._remember(key, reply)
+                return reply
+        else:
+            self._count("breaker_skipped")
+
+        if self.fallback is not None:
+            try:
+                reply = await self._call_async(self.fallback, prompt, fallback_budget or primary_budget,
+                                               hedge=False, config=fallback_config)
+            except Exception as exc:                       # noqa: BLE001
+                logger.warning("Fallback LLM failed: %r", exc)
+            else:
+                self._count("fallback_model")
+                self._remember(key, reply)
+                return reply
+
+        return self._cached_or_raise(key)
+
+    def _cached_or_raise(self, key: str) -> AIMessage:
+        cached = self._recall(key)
+        if cached is not None:
+            self._count("cached_answer")
+            return cached
+        self._count("unavailable")
+        raise LLMUnavailableError("No LLM or cached answer available")
+
+
+# --------------------------------------------------------------------------- #
+# Shared instance built from settings
+# --------------------------------------------------------------------------- #
+
+def _chat_model(model: str, timeout: float) -> Any:
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=model,
+        temperature=runtime_settings.llm_temperature,
+        api_key=runtime_settings.openai_api_key,
+        # The gateway's budget for this model: an abandoned call frees its
+        # thread when the gateway stops waiting, not seconds later
+        timeout=timeout,
+        max_retries=0,          # the gateway decides when to retry / fall back
+    )
+
+
+def _pool_size(concurrency: int, hedge: bool, fallback: bool) -> int:
+    """Threads for *concurrency* turns each running primary, hedge and fallback at once."""
+    return max(1, concurrency * (1 + int(hedge) + int(fallback)))
+
+
+class _LazyGateway:
+    """Builds the gateway on first use, so importing needs no API key."""
+
+    @cached_property
+    def _gateway(self) -> LLMGateway:
+        s = runtime_settings
+        if s.llm_provider == "fake":
+            primary, fallback = FakeChatProvider(latency=s.llm_fake_latency), None
+        else:
+            with_fallback = bool(s.llm_fallback_model)
+            primary_budget = s.llm_timeout_seconds * (0.75 if with_fallback else 1.0)
+            primary = _chat_model(s.llm_model, primary_budget)
+            fallback = (
+                _chat_model(s.llm_fallback_model, s.llm_timeout_seconds - primary_budget)
+                if with_fallback else None
+            )
+        return LLMGateway(
+            primary,
+            fallback=fallback,
+            timeout=s.llm_timeout_seconds,
+            hedge=s.llm_hedge,
+            hedge_min_delay=s.llm_hedge_min_delay,
+            breaker=CircuitBreaker(s.llm_breaker_failures, s.llm_breaker_reset_seconds),
+            answer_cache_size=s.llm_answer_cache_size,
+            max_workers=_pool_size(s.admission_llm_concurrency, s.llm_hedge, fallback is not None),
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._gateway, name)
+
+
+llm_gateway: LLMGateway = _LazyGateway()   # type: ignore[assignment]
@@ -0,0 +1,205 @@
+# backend/app/logging_setup.py
+"""
+One logging setup for the API and the CLIs (replaces per-module
+``logging.basicConfig``).
+
+• Callers only enqueue: a ``QueueHandler`` on the root logger hands records
+  to a ``QueueListener`` thread that formats and writes them, so no log
+  I/O happens on the event loop.  The thread is started by the first
+  record each process logs, never at import, so workers forked from a
+  preloaded master (gunicorn ``preload_app``) each run their own
+• JSON lines (``LOG_JSON``) carrying the request's correlation id, taken
+  from ``X-Request-ID`` or generated by :class:`CorrelationIdMiddleware`
+  and echoed back in the response
+• ``LOG_SAMPLE_RATE`` keeps that share of INFO/DEBUG records, per request
+  (a kept request keeps all its lines); warnings and errors always pass
+• Six-digit codes are masked and e-mail addresses shortened in every
+  message, so OTPs never reach the logs in plaintext
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+import zlib
+from typing import Any, Optional
+
+from backend.app.config import runtime_settings
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+_OTP = re.compile(r"\b\d{6}\b")
+_EMAIL = re.compile(r"\b([A-Za-z0-9._%+\-])[A-Za-z0-9._%+\-]*@([A-Za-z0-9.\-]+\.[A-Za-z]{2,})\b")
+
+_handler: Optional["_RedactingQueueHandler"] = None
+
+# --------------------------------------------------------------------------- #
+# Filters & formatting
+# --------------------------------------------------------------------------- #
+
+def redact(message: str) -> str:
+    """'code 123456 for jane@example.com' → 'code ****** for j***@example.com'"""
+    return _EMAIL.sub(r"\1***@\2", _OTP.sub("******", message))
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps *rate* of records below WARNING, deciding once per request id."""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        request_id = request_id_var.get()
+        if request_id is None:
+            return random.random() < self.rate
+        return zlib.crc32(request_id.encode("ascii", "ignore")) / 0xFFFFFFFF < self.rate
+
+
+class _RedactingQueueHandler(logging.handlers.QueueHandler):
+    """Queues for *target*; the listener belongs to the process that started it."""
+
+    def __init__(self, target: logging.Handler) -> None:
+        super().__init__(queue.SimpleQueue())
+        self.target = target
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._pid: Optional[int] = None
+
+    def _ensure_listener(self) -> None:
+        # Called under the handler lock, which logging re-creates after a fork
+        if self._pid == os.getpid():
+            return
+        # A forked child inherits the queue but not the thread draining it:
+        # start over with a fresh queue and a listener of its own
+        self.queue = queue.SimpleQueue()
+        self._listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+        self._listener.start()
+        self._pid = os.getpid()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._ensure_listener()
+        super().emit(record)
+
+    def stop(self) -> None:
+        """Flush and stop this process's listener (registered with atexit)."""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None           # and no restart in this process
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Runs on the caller's thread: capture the correlation id while the
+        # context is live, and never let an unredacted message be queued
+        record.request_id = request_id_var.get()
+        record = super().prepare(record)
+        record.msg = redact(record.msg)
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        return f"{line} [{request_id}]" if request_id else line
+
+
+# --------------------------------------------------------------------------- #
+# Setup
+# --------------------------------------------------------------------------- #
+
+def configure_logging(
+    level: Optional[str] = None,
+    json_output: Optional[bool] = None,
+    sample_rate: Optional[float] = None,
+) -> None:
+    """Install the queue handler on the root logger (idempotent; starts no thread)."""
+    global _handler
+    if _handler is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    use_json = runtime_settings.log_json if json_output is None else json_output
+    stream.setFormatter(
+        JsonFormatter() if use_json
+        else _TextFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+
+    handler = _RedactingQueueHandler(stream)
+    handler.addFilter(SamplingFilter(
+        runtime_settings.log_sample_rate if sample_rate is None else sample_rate
+    ))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel((level or runtime_settings.log_level).upper())
+
+    _handler = handler
+    atexit.register(handler.stop)
+
+
+# --------------------------------------------------------------------------- #
+# Correlation ids
+# --------------------------------------------------------------------------- #
+
+class CorrelationIdMiddleware:
+    """Pure ASGI: binds ``X-Request-ID`` (or a fresh id) for the request's logs."""
+
+    header = b"x-request-id"
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == self.header:
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), (self.header, request_id.encode("latin-1"))]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            logging.getLogger("backend.access").debug(
+                "%s %s %.1fms", scope.get("method", "WS"), scope["path"],
+                (time.perf_counter() - started) * 1000,
+            )
+            request_id_var.reset(token)
@@ -1,26 +1,133 @@
 # backend/app/main.py
 from __future__ import annotations
 
+import asyncio
+import hmac
+import json
+import os
+import time
 import uuid
 import logging
-from typing import Optional, Union, List, Dict
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional, Union, List, Dict
 
-import redis
-from fastapi import FastAPI, HTTPException
+from fastapi import (
+    Depends, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+from starlette.requests import HTTPConnection
 
 from backend.app.chat import router as chat_router          # (keep if you still expose /chat/* sub-routes)
+from backend.app.admission import (
+    LLM_POOL, OTP_POOL, AdmissionController, AdmissionPool, Rejected,
+)
 from backend.app.config import settings
+from backend.app.forwarding import client_address
+from backend.app.guide_cache import guide_cache
 from backend.app.langgraph_workflow import compiled_chat_graph, ChatState
+from backend.app.intent import intent_classifier
+from backend.app.llm_gateway import llm_gateway, streaming_turn
+from backend.app.monument_search import monument_search
+from backend.app.profiling import graph_profiler, memory_profiler
+from backend.app.redis_store import ReadThroughCache, connect, hash_tagged
+from backend.app.traffic_capture import CaptureMiddleware, TrafficRecorder
+from backend.app.logging_setup import CorrelationIdMiddleware, configure_logging
 from langchain_core.messages import AIMessage, HumanMessage
 
 # ────────────────────────── Logging ──────────────────────────
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+# ────────────────────────── Warmup & readiness ──────────────────────────
+# Everything the first request would otherwise pay for, warmed in parallel
+# at startup.  Failed steps are retried until they succeed; /ready reports
+# 503 until then, so a rolling deploy only routes traffic to warm workers.
+WARMUP_STEPS: Dict[str, Callable[[], object]] = {
+    "redis": lambda: redis_client.ping(),
+    "llm_clients": lambda: llm_gateway.primary,
+    "vector_index": lambda: monument_search.warm(),
+    "guide_cache": lambda: guide_cache.load(),
+}
+warmup_status: Dict[str, dict] = {name: {"ok": False} for name in WARMUP_STEPS}
+
+
+async def _warm_step(name: str) -> None:
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(WARMUP_STEPS[name])
+    except Exception as exc:                     # noqa: BLE001
+        logger.warning("Warmup step %s failed: %s", name, exc)
+        warmup_status[name] = {"ok": False, "error": str(exc) or type(exc).__name__}
+    else:
+        warmup_status[name] = {"ok": True, "seconds": round(time.perf_counter() - started, 3)}
+
+
+async def _warm_up() -> None:
+    pending, delay = list(WARMUP_STEPS), 1.0
+    while True:
+        await asyncio.gather(*(_warm_step(name) for name in pending))
+        pending = [name for name in pending if not warmup_status[name]["ok"]]
+        if not pending:
+            logger.info("Warmup complete: %s", warmup_status)
+            return
+        await asyncio.sleep(delay)
+        delay = min(30.0, delay * 2)
+
+
+def is_warm() -> bool:
+    return all(step["ok"] for step in warmup_status.values())
+
+
+class CachedCheck:
+    """Runs an async probe at most once per *ttl*; concurrent callers share the result."""
+
+    def __init__(self, probe: Callable[[], Awaitable[dict]], ttl: float) -> None:
+        self._probe = probe
+        self._ttl = ttl
+        self._result: Optional[dict] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._result is not None and time.monotonic() - self._checked_at < self._ttl
+
+    async def __call__(self) -> dict:
+        if not self._fresh():
+            async with self._lock:
+                if not self._fresh():
+                    self._result = await self._probe()
+                    self._checked_at = time.monotonic()
+        return self._result
+
+
+async def _probe_redis() -> dict:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            asyncio.to_thread(redis_client.ping), settings.health_check_timeout_seconds
+        )
+    except Exception as exc:                     # noqa: BLE001
+        return {"ok": False, "error": str(exc) or type(exc).__name__}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+redis_health = CachedCheck(_probe_redis, ttl=settings.health_check_ttl_seconds)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    state_cache.start()
+    warmup = asyncio.create_task(_warm_up())
+    yield
+    warmup.cancel()
+    state_cache.close()
+    if traffic_recorder is not None:
+        traffic_recorder.close()
+
 # ────────────────────────── FastAPI & CORS ──────────────────────────
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,8 +137,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ────────────────────────── Traffic capture (opt-in) ──────────────────────────
+traffic_recorder: Optional[TrafficRecorder] = None
+if settings.capture_dir:
+    traffic_recorder = TrafficRecorder(
+        settings.capture_dir,
+        key=settings.secret_key.encode("utf-8"),
+        sample_rate=settings.capture_sample_rate,
+    )
+    app.add_middleware(CaptureMiddleware, recorder=traffic_recorder)
+
+# Outermost, so every log line of a request (capture included) carries its id
+app.add_middleware(CorrelationIdMiddleware)
+
+# ────────────────────────── Admission control ──────────────────────────
+admission = AdmissionController({
+    LLM_POOL: AdmissionPool(
+        LLM_POOL,
+        max_concurrency=settings.admission_llm_concurrency,
+        max_queue=settings.admission_llm_queue,
+        queue_timeout=settings.admission_llm_queue_timeout,
+        per_client_limit=settings.admission_per_client,
+    ),
+    OTP_POOL: AdmissionPool(
+        OTP_POOL,
+        max_concurrency=settings.admission_otp_concurrency,
+        max_queue=settings.admission_otp_queue,
+        queue_timeout=settings.admission_otp_queue_timeout,
+        per_client_limit=settings.admission_per_client,
+    ),
+})
+
+@app.exception_handler(Rejected)
+async def _rejected_handler(_request: Request, exc: Rejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 # ────────────────────────── Redis ──────────────────────────
-redis_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+redis_client = connect(settings.redis_url)
+
+# Chat state is read through a short-lived local copy: consecutive turns
+# on this worker skip the GET; writes elsewhere invalidate it over pub/sub
+state_cache = ReadThroughCache(
+    redis_client,
+    channel=settings.state_cache_channel,
+    ttl=settings.state_cache_ttl_seconds,
+    max_entries=settings.state_cache_size,
+)
 
 # ────────────────────────── Include other routers (optional) ──────────────────────────
 # app.include_router(chat_router) # Commenting out to avoid routing conflict
@@ -53,7 +208,23 @@ class ChatRequest(BaseModel):
     user_input: Optional[str] = None
     last_monument_query: Optional[str] = None
 
+class BatchTurn(BaseModel):
+    user_query: str
+    session_id: Optional[str] = None
+
+class BatchChatRequest(BaseModel):
+    turns: List[BatchTurn] = Field(..., min_length=1, max_length=500)
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=256)
+    k: int = Field(4, ge=1, le=50)
+
 # ────────────────────────── Helper (de)serialisers ──────────────────────────
+def _state_key(session_id: str) -> str:
+    # Hash-tagged: on a cluster the session's OTP send window shares the slot
+    return hash_tagged("chat_state", session_id)
+
+
 def _dump_state(state: ChatState) -> str:
     return state.model_dump_json()
 
@@ -68,56 +239,265 @@ def _load_state(raw: Optional[str]) -> Optional[ChatState]:
         return None
 
 
+def _client_ip(http_request: HTTPConnection) -> Optional[str]:
+    """The address our trusted proxy saw (see backend/app/forwarding.py)."""
+    return client_address(
+        ",".join(http_request.headers.getlist("x-forwarded-for")),   # repeated headers form one list
+        http_request.client.host if http_request.client else None,
+    )
+
+
+# ────────────────────────── Graph helpers ──────────────────────────
+async def _run_graph(state: ChatState) -> ChatState:
+    if graph_profiler.until is not None and graph_profiler.wants():
+        # Sync invoke in one thread, so cProfile sees every node
+        result = await asyncio.to_thread(graph_profiler.run, compiled_chat_graph.invoke, state)
+    else:
+        result = await compiled_chat_graph.ainvoke(state)
+    return result if isinstance(result, ChatState) else ChatState.model_validate(result)
+
+
+def _reply_text(state: ChatState) -> str:
+    if state.messages and isinstance(state.messages[-1], AIMessage):
+        return state.messages[-1].content
+    return state.response or "No response generated."
+
+
 # ────────────────────────── Simple health check ──────────────────────────
 @app.get("/")
-def root():
-    return {"message": "Bot Agent API is running.", "redis_connected": redis_client.ping()}
+async def root():
+    return {"message": "Bot Agent API is running.", "redis_connected": (await redis_health())["ok"]}
 
 
 # ────────────────────────── Main chat endpoint ──────────────────────────
 @app.post("/chat/query")
-async def chat_query(request: QueryRequest):
+async def chat_query(request: QueryRequest, http_request: Request):
     """
     Stateless HTTP endpoint
 
     • The client supplies `session_id` in the body (or omits it on first turn).
-    • ChatState is persisted in Redis under key  chat_state:<session_id>.
+    • ChatState is persisted in Redis under key  chat_state:{<session_id>}.
     • The updated session_id is echoed back so the client can store it.
     """
     # 1) choose / create session ID
     session_id = request.session_id or str(uuid.uuid4())
-    redis_key = f"chat_state:{session_id}"
+    redis_key = _state_key(session_id)
+    client_ip = _client_ip(http_request)
 
-    # 2) fetch previous ChatState (if any)
-    state = _load_state(redis_client.get(redis_key)) or ChatState(messages=[], user_input=None)
+    # 2) fetch previous ChatState (if any; a new session has none)
+    raw = state_cache.get(redis_key) if request.session_id else None
+    state = _load_state(raw) or ChatState(messages=[], user_input=None)
 
-    # 3) inject current user message
-    state.user_input = request.user_query
+    # 3) wait for a slot in the OTP or LLM pool (or get a fast 429/503);
+    #    the pool follows the session's state, not just the text
+    async with admission.admit(request.user_query, client_ip or session_id, state.awaiting_otp):
+        # 4) inject current user message (and who sent it, for OTP rate limits)
+        state.user_input = request.user_query
+        state.session_id = session_id
+        state.client_ip = client_ip
 
-    try:
-        # 4) run LangGraph
-        final_state: ChatState = await compiled_chat_graph.ainvoke(state)
+        try:
+            # 5) run LangGraph
+            final_state = await _run_graph(state)
 
-        # 5) save updated state
-        redis_client.set(redis_key, _dump_state(final_state))
+            # 6) save updated state
+            state_cache.set(redis_key, _dump_state(final_state))
 
-        # 6) extract assistant reply
-        if final_state.messages and isinstance(final_state.messages[-1], AIMessage):
-            reply = final_state.messages[-1].content
-        else:
-            reply = final_state.response or "No response generated."
+            # 7) extract assistant reply and return JSON
+            return {"session_id": session_id, "message": _reply_text(final_state)}
 
-        # 7) return JSON
-        return {"session_id": session_id, "message": reply}
+        except Exception as exc:                     # noqa: BLE001
+            logger.exception("LangGraph error:")
+            raise HTTPException(status_code=500, detail=f"Chat processing failed: {exc}") from exc
+
+# ────────────────────────── Batch chat endpoint ──────────────────────────
+BATCH_CONCURRENCY = 8   # graphs running at once per batch request
+
+@app.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest, http_request: Request):
+    """
+    Process many independent turns in one request.
+
+    • All session states are fetched with one MGET (minus local hits) and
+      written back with one pipeline.
+    • Turns of the same session run in submission order; different
+      sessions run concurrently, at most BATCH_CONCURRENCY graphs at once.
+    • Every turn is admitted like a single /chat/query turn; one that is
+      turned away reports ``error`` and ``retry_after``.
+    • ``results[i]`` answers ``turns[i]``; a failed turn reports ``error``
+      and leaves its session state untouched.
+    """
+    client_ip = _client_ip(http_request)
+    turns = request.turns
+    session_ids = [t.session_id or str(uuid.uuid4()) for t in turns]
+
+    turns_by_session: Dict[str, List[int]] = {}
+    for i, session_id in enumerate(session_ids):
+        turns_by_session.setdefault(session_id, []).append(i)
+
+    unique_ids = list(turns_by_session)
+    raw_states = await asyncio.to_thread(state_cache.get_many, [_state_key(s) for s in unique_ids])
+    states = {
+        session_id: _load_state(raw) or ChatState(messages=[], user_input=None)
+        for session_id, raw in zip(unique_ids, raw_states)
+    }
+
+    results: List[Optional[dict]] = [None] * len(turns)
+    # More than the per-client limit at once would only be refused
+    slots = asyncio.Semaphore(min(BATCH_CONCURRENCY, settings.admission_per_client))
+
+    async def run_session(session_id: str) -> None:
+        for i in turns_by_session[session_id]:
+            state = states[session_id].model_copy(deep=True)
+            state.user_input = turns[i].user_query
+            state.session_id = session_id
+            state.client_ip = client_ip
+            try:
+                async with slots:
+                    async with admission.admit(state.user_input, client_ip or session_id, state.awaiting_otp):
+                        state = await _run_graph(state)
+            except Rejected as exc:
+                results[i] = {"session_id": session_id, "error": exc.detail, "retry_after": exc.retry_after}
+                continue
+            except Exception as exc:             # noqa: BLE001
+                logger.exception("LangGraph error in batch turn %d:", i)
+                results[i] = {"session_id": session_id, "error": f"Chat processing failed: {exc}"}
+                continue
+            states[session_id] = state
+            updated.add(session_id)
+            results[i] = {"session_id": session_id, "message": _reply_text(state)}
+
+    updated: set = set()
+    await asyncio.gather(*(run_session(s) for s in unique_ids))
+
+    if updated:
+        await asyncio.to_thread(
+            state_cache.set_many, {_state_key(s): _dump_state(states[s]) for s in updated}
+        )
+
+    return {"results": results}
+
+# ────────────────────────── WebSocket chat ──────────────────────────
+class _WriteBehind:
+    """
+    Persists a session's latest state off the turn path.  At most one Redis
+    write is in flight; turns finishing meanwhile just replace the pending
+    payload, so a burst of turns costs one or two writes, not one each.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self._pending: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, state: ChatState) -> None:
+        self._pending = _dump_state(state)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while self._pending is not None:
+            payload, self._pending = self._pending, None
+            try:
+                await asyncio.to_thread(state_cache.set, self.key, payload)
+            except Exception:                    # noqa: BLE001
+                logger.exception("Write-behind of %s failed", self.key)
+
+    async def flush(self) -> None:
+        if self._task is not None:
+            await self._task
+
+
+async def _stream_turn(websocket: WebSocket, state: ChatState) -> ChatState:
+    """
+    Run one turn, pushing LLM tokens down the socket as they arrive: only
+    from the model run the gateway is still waiting on (see
+    llm_gateway.streaming_turn), never from an abandoned or duplicate one.
+    """
+    final = None
+    with streaming_turn() as tokens:
+        async for event in compiled_chat_graph.astream_events(state, version="v2"):
+            kind = event["event"]
+            if kind == "on_chat_model_stream":
+                token = event["data"]["chunk"].content
+                if token and tokens.forwards(event["run_id"]):
+                    await websocket.send_json({"type": "token", "content": token})
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                final = event["data"]["output"]     # the graph's own end event
+    if final is None:
+        raise RuntimeError("LangGraph finished without a final state")
+    return final if isinstance(final, ChatState) else ChatState.model_validate(final)
+
+
+@app.websocket("/chat/ws")
+async def chat_ws(websocket: WebSocket, session_id: Optional[str] = None):
+    """
+    Long-lived chat transport.
+
+    • Connect with ``?session_id=…`` to resume (or omit it to start fresh);
+      the first frame sent is ``{"type": "session", "session_id": …}``.
+    • Send ``{"user_query": "…"}`` per turn; receive ``token`` frames while
+      the answer is generated, then one ``message`` frame (or ``error``).
+    • Each turn is admitted like a /chat/query turn; one that is turned
+      away gets an ``error`` frame with ``retry_after`` instead.
+    • ChatState is loaded once per connection and kept in memory; Redis is
+      written behind each turn and flushed on disconnect.
+    """
+    await websocket.accept()
+    session_id = session_id or str(uuid.uuid4())
+    client_ip = _client_ip(websocket)
+    raw = await asyncio.to_thread(state_cache.get, _state_key(session_id))
+    state = _load_state(raw) or ChatState(messages=[], user_input=None)
+    writer = _WriteBehind(_state_key(session_id))
+
+    await websocket.send_json({"type": "session", "session_id": session_id})
+    try:
+        while True:
+            try:
+                frame = json.loads(await websocket.receive_text())
+            except ValueError:
+                frame = None
+            user_query = frame.get("user_query") if isinstance(frame, dict) else None
+            if not isinstance(user_query, str):
+                await websocket.send_json({"type": "error", "detail": "Expected {\"user_query\": \"…\"}"})
+                continue
+
+            turn = state.model_copy(deep=True)
+            turn.user_input = user_query
+            turn.session_id = session_id
+            turn.client_ip = client_ip
+            try:
+                async with admission.admit(user_query, client_ip or session_id, turn.awaiting_otp):
+                    state = await _stream_turn(websocket, turn)
+            except Rejected as exc:
+                await websocket.send_json(
+                    {"type": "error", "detail": exc.detail, "retry_after": exc.retry_after}
+                )
+                continue
+            except WebSocketDisconnect:
+                raise
+            except Exception as exc:             # noqa: BLE001
+                logger.exception("LangGraph error on websocket turn:")
+                await websocket.send_json({"type": "error", "detail": f"Chat processing failed: {exc}"})
+                continue
+
+            writer.schedule(state)
+            await websocket.send_json({"type": "message", "message": _reply_text(state)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await writer.flush()
 
-    except Exception as exc:                     # noqa: BLE001
-        logger.exception("LangGraph error:")
-        raise HTTPException(status_code=500, detail=f"Chat processing failed: {exc}") from exc
 
 @app.post("/chat")
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
+    client_ip = _client_ip(http_request)
+    async with admission.admit(request.user_input, client_ip or "anonymous", request.awaiting_otp):
+        return await _chat_turn(request, client_ip)
+
+async def _chat_turn(request: ChatRequest, client_ip: Optional[str]):
     try:
-        logger.info("Received ChatRequest: awaiting_email=%s, awaiting_otp=%s, email=%s, user_input=%r",
+        logger.debug("Received ChatRequest: awaiting_email=%s, awaiting_otp=%s, email=%s, user_input=%r",
                     request.awaiting_email, request.awaiting_otp, request.email, request.user_input)
 
         # Convert messages to LangChain format
@@ -134,12 +514,12 @@ async def chat(request: ChatRequest):
             awaiting_email=request.awaiting_email,
             awaiting_otp=request.awaiting_otp,
             email=request.email,
-            last_monument_query=request.last_monument_query
+            last_monument_query=request.last_monument_query,
+            client_ip=client_ip,
         )
         
-        # Process the chat
-        result_dict = compiled_chat_graph.invoke(state.model_dump())
-        result_state = ChatState.model_validate(result_dict)
+        # Process the chat (off the event loop, so queued turns keep flowing)
+        result_state = await _run_graph(state)
         
         # Prepare response
         response = {
@@ -155,6 +535,122 @@ async def chat(request: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/search/batch")
+async def search_batch(request: BatchSearchRequest):
+    """
+    Rank monuments for many queries in one call (one embedding request,
+    one vectorised index search).  ``results[i]`` answers ``queries[i]``.
+    """
+    results = await asyncio.to_thread(monument_search.search_many, request.queries, request.k)
+    return {"results": results}
+
+@app.get("/stats/intents")
+async def intent_stats():
+    """Pre-router counters: how many turns skipped retrieval + LLM."""
+    return intent_classifier.stats()
+
+@app.get("/stats/llm")
+async def llm_stats():
+    """LLM gateway counters, breaker state and observed latency."""
+    return llm_gateway.stats()
+
+@app.get("/stats/state_cache")
+async def state_cache_stats():
+    """Local chat-state copies on this worker: hits, misses, invalidations."""
+    return state_cache.stats()
+
+@app.get("/stats/admission")
+async def admission_stats():
+    """Per-pool concurrency, queue depth, queue-time percentiles, rejections."""
+    return admission.stats()
+
+# ────────────────────────── Admin: on-demand profiling ──────────────────────────
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required.")
+
+admin = [Depends(require_admin)]
+
+
+def _download(content: bytes, filename: str) -> Response:
+    return Response(
+        content=content,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.post("/admin/profile/graph", dependencies=admin)
+async def start_graph_profile(
+    seconds: float = Query(60, gt=0, le=900),
+    sample_rate: float = Query(0.1, gt=0, le=1),
+    max_runs: int = Query(200, ge=1, le=10_000),
+):
+    """Profile a sampled share of graph runs on this worker for a bounded window."""
+    graph_profiler.start(seconds, sample_rate, max_runs)
+    return graph_profiler.status()
+
+@app.delete("/admin/profile/graph", dependencies=admin)
+async def stop_graph_profile():
+    graph_profiler.stop()
+    return graph_profiler.status()
+
+@app.get("/admin/profile/graph", dependencies=admin)
+async def graph_profile(
+    format: str = Query("text", pattern="^(text|pstats|status)$"),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|ncalls)$"),
+    limit: int = Query(40, ge=1, le=500),
+):
+    """``text``: top functions; ``pstats``: profile file for snakeviz / pstats."""
+    if format == "status":
+        return graph_profiler.status()
+    if format == "pstats":
+        data = graph_profiler.dump()
+        if data is None:
+            raise HTTPException(status_code=404, detail="No profiled runs yet.")
+        return _download(data, f"chat-graph-{os.getpid()}.prof")
+    report = await asyncio.to_thread(graph_profiler.report, sort, limit)
+    if report is None:
+        raise HTTPException(status_code=404, detail="No profiled runs yet.")
+    return PlainTextResponse(report)
+
+@app.post("/admin/profile/memory", dependencies=admin)
+async def start_memory_profile(
+    seconds: float = Query(120, gt=0, le=900),
+    frames: int = Query(10, ge=1, le=50),
+):
+    """Trace Python allocations on this worker until stopped or *seconds* pass."""
+    memory_profiler.start(frames, seconds)
+    return {"active": True, "seconds": seconds, "frames": frames}
+
+@app.delete("/admin/profile/memory", dependencies=admin)
+async def stop_memory_profile():
+    memory_profiler.stop()
+    return {"active": False}
+
+@app.get("/admin/profile/memory", dependencies=admin)
+async def memory_profile(
+    format: str = Query("json", pattern="^(json|snapshot)$"),
+    top: int = Query(25, ge=1, le=200),
+):
+    """``json``: top sites, growth, chat-state / index totals; ``snapshot``: tracemalloc dump."""
+    if format == "snapshot":
+        data = await asyncio.to_thread(memory_profiler.dump)
+        if data is None:
+            raise HTTPException(status_code=404, detail="Memory profiling is not active.")
+        return _download(data, f"worker-{os.getpid()}.tracemalloc")
+    return await asyncio.to_thread(memory_profiler.report, top)
+
 @app.get("/health")
 async def health_check():
+    """Liveness only: answers as soon as the process serves requests."""
     return {"status": "healthy"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once warmup finished and Redis answers, else 503."""
+    redis_check = await redis_health()
+    body = {"ready": is_warm() and redis_check["ok"], "warmup": warmup_status, "redis": redis_check}
+    return body if body["ready"] else JSONResponse(status_code=503, content=body)
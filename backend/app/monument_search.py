@@ -1,24 +1,67 @@
 # backend/app/monument_search.py
 """
-Light-weight Retrieval-QA wrapper over a local JSON list of monuments.
+Light-weight retrieval + QA over a local JSON list of monuments.
 
-• Loads monument data once  (st.cache_data)
-• Builds an in-memory FAISS index once (st.cache_resource)
-• Exposes answer_monument_query() for the Streamlit app
+• Streams monument data in fixed-size batches (JSON array or JSON Lines)
+• Builds a FAISS index (type chosen by INDEX_FACTORY: Flat, HNSW, SQ8,
+  IVF-PQ …) + columnar metadata store once, on disk (rebuilt only when
+  the source file or index type changes), and loads it once per process
+  (st.cache_resource).  Builds run from the CLI / gunicorn when_ready /
+  Streamlit startup, never from a request, and hold an exclusive lock on
+  ``<index dir>.lock`` through the swap; loads take it shared
+• Exposes model_answer() / fallback_answer() for the Streamlit app (LLM
+  calls go through backend.app.llm_gateway)
+• Exposes monument_search.search() for the LangGraph backend; places
+  named in a query ("monuments in Paris") restrict the vector search to
+  monuments there via the store's location inverted index
+• Precomputes each monument's nearest neighbours at build time
+  (``neighbors.npy`` next to the index), so monument_search.related() is
+  a row lookup, not a search
+
+Rebuild manually with  ``python -m backend.app.monument_search``
+(``--if-stale`` to skip an up-to-date index, ``--neighbors`` to recompute
+only the neighbour table).
 """
 
 from __future__ import annotations
-import json, os
+import contextlib, fcntl, functools, json, logging, os, shutil
+from itertools import islice
 from pathlib import Path
+from typing import Iterator, NamedTuple
+import faiss
+import numpy as np
 import streamlit as st
 
-from langchain.chains import RetrievalQA
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_community.vectorstores import FAISS
+try:                                    # optional: incremental JSON parsing
+    import ijson
+except ImportError:                     # pragma: no cover
+    ijson = None
+
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from backend.app.config import runtime_settings
+from backend.app.llm_gateway import LLMUnavailableError, llm_gateway
+from backend.app.monument_store import MonumentStore, MonumentStoreWriter, normalise_place
+from backend.app.prompts import describe_monument, monument_prompt
+
+logger = logging.getLogger(__name__)
 
 # ── Locate data/monuments.json ──────────────────────────────────────────────
 ROOT_DIR  = Path(__file__).resolve().parents[2]
-DATA_PATH = ROOT_DIR / "data" / "monuments.json"
+DATA_PATH = Path(os.getenv("MONUMENT_DATA_PATH", ROOT_DIR / "data" / "monuments.json"))
+
+# Records embedded + indexed per provider call while building the index
+INGEST_BATCH_SIZE = int(os.getenv("MONUMENT_INGEST_BATCH_SIZE", "256"))
+
+# Where the built FAISS index + metadata store live
+INDEX_DIR = Path(os.getenv("MONUMENT_INDEX_DIR", ROOT_DIR / "backend" / "vectorstore" / "monuments"))
+
+# Row i: the nearest other monuments of monument i, closest first
+NEIGHBORS_FILE = "neighbors.npy"
+
+class IndexNotBuiltError(RuntimeError):
+    """No index on disk: build it with ``python -m backend.app.monument_search``."""
 
 # ── Helper: fetch key from env or st.secrets ────────────────────────────────
 def _openai_key() -> str:
@@ -28,50 +71,499 @@ def _openai_key() -> str:
         or st.secrets.get("OPENAI_API_KEY", "")
     )
 
-# ── Cache monument JSON ─────────────────────────────────────────────────────
-@st.cache_data(show_spinner="📚 Loading monument data…")
-def _load_monuments() -> list[dict]:
-    with open(DATA_PATH, encoding="utf-8") as f:
-        return json.load(f)
-
-# ── Cache FAISS index + RetrievalQA chain ───────────────────────────────────
-@st.cache_resource(show_spinner="🔧 Building FAISS index…")
-def _build_qa_chain() -> RetrievalQA:
-    monuments  = _load_monuments()
-    texts      = [m["description"] for m in monuments]
-    metadatas  = [{"name": m["name"], "location": m["location"]} for m in monuments]
-    key        = _openai_key()
-
-    vs = FAISS.from_texts(
-        texts,
-        embedding=OpenAIEmbeddings(openai_api_key=key),
-        metadatas=metadatas,
-    )
-    retriever = vs.as_retriever()
+# ── Stream monument records ─────────────────────────────────────────────────
+def iter_monuments(path: Path = DATA_PATH) -> Iterator[dict]:
+    """
+    Yield monument records one at a time.
+    ``.jsonl`` files are read line by line; a ``.json`` array is parsed
+    incrementally with ijson when it is installed.
+    """
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif ijson is not None:
+        with open(path, "rb") as f:
+            yield from ijson.items(f, "item", use_float=True)
+    else:
+        logger.warning("ijson not installed; loading %s in one piece", path.name)
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)
 
-    return RetrievalQA.from_chain_type(
-        llm=ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7, api_key=key),
-        retriever=retriever,
-    )
+def iter_batches(records: Iterator[dict], size: int = INGEST_BATCH_SIZE) -> Iterator[list[dict]]:
+    """Group *records* into lists of at most *size*."""
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
 
-# ── Public helper for Streamlit UI ──────────────────────────────────────────
-def answer_monument_query(query: str) -> str:
+# ── Build the on-disk index + metadata store ───────────────────────────────
+def _source_fingerprint(source: Path) -> dict:
+    st_ = Path(source).stat()
+    return {"source": str(Path(source).resolve()), "size": st_.st_size, "mtime_ns": st_.st_mtime_ns}
+
+def _index_is_current(index_dir: Path, source: Path) -> bool:
+    try:
+        with open(index_dir / "index.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        return (
+            meta["fingerprint"] == _source_fingerprint(source)
+            and meta["factory"] == runtime_settings.index_factory
+            and meta["embeddings"] == _embeddings_id()
+        )
+    except (OSError, ValueError, KeyError):
+        return False
+
+def _embeddings_id() -> str:
+    # Vectors from fake (offline) and real embeddings must never mix
+    return "fake" if runtime_settings.llm_provider == "fake" else "openai"
+
+def match_threshold() -> float | None:
+    """``MATCH_MAX_DISTANCE``, or ``None`` for fake embeddings (their distances mean nothing)."""
+    return None if _embeddings_id() == "fake" else runtime_settings.match_max_distance
+
+def _new_index(dim: int, factory: str, train: np.ndarray) -> faiss.Index:
+    """
+    Create a *factory* index and train it on *train* if it needs training.
+    Too little data to train (e.g. IVF4096 over a handful of monuments)
+    falls back to an exact flat index.
+    """
+    index = faiss.index_factory(dim, factory)
+    if not index.is_trained:
+        try:
+            index.train(train)
+        except RuntimeError as exc:
+            logger.warning("Cannot train %r on %d vectors (%s); using Flat", factory, len(train), exc)
+            return faiss.IndexFlatL2(dim)
+    return index
+
+def _apply_search_params(index: faiss.Index) -> faiss.Index:
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = runtime_settings.index_nprobe
+    hnsw = getattr(faiss.downcast_index(index), "hnsw", None)
+    if hnsw is not None:
+        hnsw.efSearch = runtime_settings.index_ef_search
+    return index
+
+def _search_params(index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    """
+    Per-call parameters carrying *selector*.  They replace the index's own
+    nprobe / efSearch for that call, so the configured values are copied in.
+    """
+    if faiss.try_extract_index_ivf(index) is not None:
+        params = faiss.SearchParametersIVF()
+        params.nprobe = runtime_settings.index_nprobe
+    elif hasattr(faiss.downcast_index(index), "hnsw"):
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = runtime_settings.index_ef_search
+    else:
+        params = faiss.SearchParameters()
+    params.sel = selector
+    return params
+
+@contextlib.contextmanager
+def _index_lock(index_dir: Path, exclusive: bool):
+    """
+    ``flock`` on a file beside *index_dir*: builders (exclusive) are
+    serialised, and readers (shared) never see the directory mid-swap.
+    """
+    index_dir = Path(index_dir)
+    index_dir.parent.mkdir(parents=True, exist_ok=True)
+    with open(index_dir.with_name(f"{index_dir.name}.lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def build_index(
+    source: Path = DATA_PATH,
+    index_dir: Path = INDEX_DIR,
+    factory: str | None = None,
+) -> None:
+    """
+    Stream *source* into a FAISS index plus a columnar metadata store.
+    Row *i* of the store is vector id *i*.  The result is written to a
+    scratch directory and swapped in, so readers never see a partial build.
+
+    *factory* (default ``runtime_settings.index_factory``) selects the index
+    type.  Types that need training buffer the first ``index_train_size``
+    vectors, train on them, then stream the rest straight in; the others
+    add every batch as soon as it is embedded.
+    """
+    with _index_lock(index_dir, exclusive=True):
+        _build_index(Path(source), Path(index_dir), factory or runtime_settings.index_factory)
+
+def _build_index(source: Path, index_dir: Path, factory: str) -> None:
+    scratch = index_dir.with_name(f"{index_dir.name}.tmp-{os.getpid()}")
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    embeddings = _build_embeddings()
+    index = None
+    pending: list[np.ndarray] = []          # vectors held back for training
+    pending_rows = 0
+    with MonumentStoreWriter(scratch) as writer:
+        for batch in iter_batches(iter_monuments(source)):
+            vectors = np.asarray(
+                embeddings.embed_documents([m["description"] for m in batch]),
+                dtype="float32",
+            )
+            for m in batch:
+                writer.append(m)
+
+            if index is None and not pending_rows:
+                # Nothing to train (Flat, HNSW, SQfp16…): no buffer at all
+                untrained = faiss.index_factory(vectors.shape[1], factory)
+                if untrained.is_trained:
+                    index = untrained
+            if index is not None:
+                index.add(vectors)
+                continue
+            pending.append(vectors)
+            pending_rows += len(vectors)
+            if pending_rows >= runtime_settings.index_train_size:
+                train = np.concatenate(pending)
+                index = _new_index(train.shape[1], factory, train)
+                index.add(train)
+                pending = []
+
+    if index is None and pending:           # catalogue smaller than the sample
+        train = np.concatenate(pending)
+        index = _new_index(train.shape[1], factory, train)
+        index.add(train)
+
+    if index is None:
+        shutil.rmtree(scratch, ignore_errors=True)
+        raise RuntimeError(f"No monuments found in {source}")
+
+    faiss.write_index(index, str(scratch / "index.faiss"))
+    # After writing: an IVF direct map added for reconstruction stays out of the file
+    _save_neighbors(scratch, index)
+    with open(scratch / "index.json", "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "fingerprint": _source_fingerprint(source),
+                "factory": factory,
+                "embeddings": _embeddings_id(),
+                "count": index.ntotal,
+            },
+            f,
+        )
+
+    retired = index_dir.with_name(f"{index_dir.name}.old-{os.getpid()}")
+    if index_dir.exists():
+        os.replace(index_dir, retired)
+    os.replace(scratch, index_dir)
+    shutil.rmtree(retired, ignore_errors=True)
+    logger.info("Built monument index with %d vectors in %s", index.ntotal, index_dir)
+
+def build_neighbors(index: faiss.Index, k: int, batch_size: int = 1024) -> np.ndarray:
     """
-    Return a concise answer for *query* using the monument knowledge base.
-    Works with both old (str) and new (dict) LangChain outputs.
+    ``(ntotal, k)`` int32 adjacency table: row *i* holds the *k* nearest
+    other monuments of monument *i*, closest first, ``-1``-padded.  Every
+    stored vector is reconstructed (approximately, for PQ / SQ codes) and
+    searched in batches – an offline cost of one search per monument.
     """
-    qa_chain = _build_qa_chain()
+    n = index.ntotal
+    k = max(0, min(k, n - 1))
+    table = np.full((n, k), -1, dtype=np.int32)
+    if not k:
+        return table
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.make_direct_map()
+    for start in range(0, n, batch_size):
+        count = min(batch_size, n - start)
+        _, ids = index.search(index.reconstruct_n(start, count), k + 1)
+        for row, hits in enumerate(ids, start):
+            hits = hits[(hits >= 0) & (hits != row)][:k]
+            table[row, :len(hits)] = hits
+    return table
 
-    # Handle both invoke signatures automatically
+def _save_neighbors(index_dir: Path, index: faiss.Index) -> None:
+    """Write NEIGHBORS_FILE for *index*; index types that cannot reconstruct go without."""
+    if runtime_settings.index_neighbors <= 0:
+        return
     try:
-        result = qa_chain.invoke({"query": query})
-    except TypeError:
-        result = qa_chain.invoke(query)
+        table = build_neighbors(_apply_search_params(index), runtime_settings.index_neighbors)
+    except RuntimeError as exc:
+        logger.warning("Cannot compute monument neighbours (%s); related suggestions are off", exc)
+        return
+    scratch = index_dir / f"neighbors.tmp-{os.getpid()}.npy"
+    np.save(scratch, table)
+    os.replace(scratch, index_dir / NEIGHBORS_FILE)
+    logger.info("Stored %d neighbours for %d monuments", table.shape[1], len(table))
+
+def rebuild_neighbors(index_dir: Path = INDEX_DIR) -> None:
+    """Recompute the neighbour table of the index on disk (e.g. after changing INDEX_NEIGHBORS)."""
+    with _index_lock(index_dir, exclusive=True):
+        _save_neighbors(Path(index_dir), faiss.read_index(str(Path(index_dir) / "index.faiss")))
+
+def _index_is_ready(index_dir: Path, source: Path) -> bool:
+    return MonumentStore.exists(index_dir) and _index_is_current(index_dir, source)
+
+def ensure_index(source: Path = DATA_PATH, index_dir: Path = INDEX_DIR) -> None:
+    """Build the index unless the one on disk matches *source* and the settings."""
+    if _index_is_ready(index_dir, source):
+        return
+    with _index_lock(index_dir, exclusive=True):
+        # Another process may have built it while we waited for the lock
+        if not _index_is_ready(index_dir, source):
+            _build_index(Path(source), Path(index_dir), runtime_settings.index_factory)
+
+def _read_index(path: Path) -> faiss.Index:
+    """mmap the index when enabled (shared page cache), else read it into RAM."""
+    if runtime_settings.index_mmap:
+        # IO_FLAG_MMAP maps IVF lists; IO_FLAG_MMAP_IFC (faiss ≥ 1.8) flat/SQ/PQ codes
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        try:
+            return faiss.read_index(str(path), flags)
+        except RuntimeError as exc:
+            logger.warning("Cannot mmap %s (%s); reading it into memory", path, exc)
+    return faiss.read_index(str(path))
+
+# ── Cache embeddings + index/store (once per process) ──────────────────────
+@st.cache_resource(show_spinner=False)
+def _build_embeddings() -> Embeddings:
+    if runtime_settings.llm_provider == "fake":         # offline runs
+        return DeterministicFakeEmbedding(size=1536)
+    return OpenAIEmbeddings(openai_api_key=_openai_key())
+
+@st.cache_resource(show_spinner="🔧 Loading FAISS index…")
+def _load_index() -> tuple[faiss.Index, MonumentStore]:
+    # Never builds: that is minutes of work and must not run per worker
+    # on a request.  A stale index is still served until it is rebuilt.
+    with _index_lock(INDEX_DIR, exclusive=False):
+        if not MonumentStore.exists(INDEX_DIR):
+            raise IndexNotBuiltError(
+                f"No monument index in {INDEX_DIR}; run `python -m backend.app.monument_search`"
+            )
+        if not _index_is_current(INDEX_DIR, DATA_PATH):
+            logger.warning("Monument index in %s is stale; serving it until it is rebuilt", INDEX_DIR)
+        index = _apply_search_params(_read_index(INDEX_DIR / "index.faiss"))
+        store = MonumentStore.open(INDEX_DIR)
+    # Facets hold row ids and selectors of the index they were built for
+    _location_filter.cache_clear()
+    _accepts_selector.cache_clear()
+    return index, store
+
+@st.cache_resource(show_spinner=False)
+def _load_neighbors() -> np.ndarray | None:
+    _load_index()                                       # raises if not built
+    path = INDEX_DIR / NEIGHBORS_FILE
+    if not path.exists():
+        logger.info("No %s in %s; related suggestions are off", NEIGHBORS_FILE, INDEX_DIR)
+        return None
+    return np.load(path, mmap_mode="r")
+
+def preload_index() -> int:
+    """
+    Load index + store (+ neighbour table) into this process (gunicorn
+    master, before fork); workers inherit them instead of loading their own.
+    """
+    _load_neighbors()
+    return _load_index()[0].ntotal
+
+# ── Location facets ─────────────────────────────────────────────────────────
+# Index types without search-time selectors (PQ, LSH) over-fetch this many
+# times k and keep the hits inside the facet
+POST_FILTER_FETCH = 10
+
+class _Facet(NamedTuple):
+    ids: np.ndarray                              # sorted row ids in the places
+    params: faiss.SearchParameters | None        # None: post-filter instead
+    selector: faiss.IDSelector | None            # kept alive for params
+
+@functools.lru_cache(maxsize=4)
+def _accepts_selector(index: faiss.Index) -> bool:
+    """IndexPQ and IndexLSH raise on an IDSelector; probe once per index."""
+    probe = np.zeros((1, index.d), dtype="float32")
+    ids = np.zeros(1, dtype=np.int64)
+    selector = faiss.IDSelectorBatch(1, faiss.swig_ptr(ids))
+    try:
+        index.search(probe, 1, params=_search_params(index, selector))
+    except RuntimeError:
+        logger.info("%s takes no ID selector; location facets are post-filtered", type(index).__name__)
+        return False
+    return True
+
+@functools.lru_cache(maxsize=1024)
+def _location_filter(places: tuple[str, ...]) -> _Facet | None:
+    """
+    How to restrict search to monuments in any of *places*, or ``None``
+    when that would not narrow anything.  Cleared whenever the index is
+    (re)loaded, so it never hands out row ids of a previous store.
+    """
+    index, store = _load_index()
+    ids = np.unique(np.concatenate([store.location_ids(p) for p in places]))
+    if not len(ids) or len(ids) >= index.ntotal:
+        return None
+    if not _accepts_selector(index):
+        return _Facet(ids, None, None)
+    selector = faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids))
+    return _Facet(ids, _search_params(index, selector), selector)
+
+def _facet_search(index: faiss.Index, queries: np.ndarray, k: int, facet: _Facet) -> tuple:
+    """``index.search`` restricted to *facet*: by selector, else by post-filter."""
+    if facet.params is not None:
+        return index.search(queries, k, params=facet.params)
+    found_d, found_i = index.search(queries, min(index.ntotal, k * POST_FILTER_FETCH))
+    distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+    ids = np.full((len(queries), k), -1, dtype=np.int64)
+    inside = np.isin(found_i, facet.ids)
+    for row in range(len(queries)):
+        kept = np.flatnonzero(inside[row])[:k]
+        distances[row, :len(kept)], ids[row, :len(kept)] = found_d[row, kept], found_i[row, kept]
+    return distances, ids
+
+# ── Plain similarity search (no LLM) ────────────────────────────────────────
+# Words after which a catalogue place is read as a location filter, and the
+# words that may sit between it and the place ("in the uk", "agra or delhi")
+_PLACE_PREFIXES = frozenset({"in", "near", "around", "at", "inside", "outside", "within", "across"})
+_PLACE_JOINERS = frozenset({"the", "and", "or"})
+
+class MonumentSearch:
+    """Vector search returning monument records (with their row ``id``) as dicts."""
+
+    def detect_locations(self, query: str) -> tuple[str, ...]:
+        """
+        Places from the catalogue named in *query*, longest match first:
+        "what to see in new delhi" → ("new delhi",), not ("delhi",).
+        A place counts only where a location phrase puts it ("in", "near",
+        "around" …, or listed after one: "in agra and jaipur"), so place
+        names that are also ordinary words ("a nice view", "reading about
+        forts", "split the trip") never filter a search.
+        """
+        store = _load_index()[1]
+        words = normalise_place(query).split()
+        found, i, anchored = [], 0, False
+        while i < len(words):
+            if anchored:
+                for n in range(min(store.max_location_words, len(words) - i), 0, -1):
+                    place = " ".join(words[i:i + n])
+                    if place in store.location_terms:
+                        found.append(place)
+                        i += n
+                        break
+                else:
+                    anchored = words[i] in _PLACE_PREFIXES or words[i] in _PLACE_JOINERS
+                    i += 1
+                continue
+            anchored = words[i] in _PLACE_PREFIXES
+            i += 1
+        return tuple(dict.fromkeys(found))
+
+    def search(self, query: str, k: int = 4, max_distance: float | None = None) -> list[dict]:
+        return self.search_many([query], k=k, max_distance=max_distance)[0]
+
+    def search_many(
+        self, queries: list[str], k: int = 4, max_distance: float | None = None
+    ) -> list[list[dict]]:
+        """
+        Rank monuments for every query at once: one embedding request for
+        all queries and one FAISS search per distinct location facet (all
+        queries naming no place share a single search).  Queries naming a
+        place are searched only among monuments there (ID-selector search,
+        not a post-filter, except on PQ / LSH indexes, which take no
+        selector), falling back to the full index if that finds nothing or
+        only weak matches (beyond match_threshold).  Returns one
+        result list per query, in input order;
+        hits farther than *max_distance* (see match_threshold) are dropped.
+        """
+        if not queries:
+            return []
+        index, store = _load_index()
+        matrix = np.asarray(_build_embeddings().embed_documents(list(queries)), dtype="float32")
+        k = min(k, index.ntotal)
+
+        groups: dict[tuple, list[int]] = {}
+        for row, query in enumerate(queries):
+            places = self.detect_locations(query) if runtime_settings.location_filter else ()
+            facet = _location_filter(places) if places else None
+            groups.setdefault(places if facet else (), []).append(row)
+
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        missed: list[int] = []
+        weak = match_threshold()
+        for places, rows in groups.items():
+            if not places:
+                distances[rows], ids[rows] = index.search(matrix[rows], k)
+                continue
+            distances[rows], ids[rows] = _facet_search(index, matrix[rows], k, _location_filter(places))
+            missed += [
+                row for row in rows
+                if ids[row, 0] < 0 or (weak is not None and distances[row, 0] > weak)
+            ]
+        if missed:
+            distances[missed], ids[missed] = index.search(matrix[missed], k)
+        limit = np.inf if max_distance is None else max_distance
+        return [
+            [store.get(int(i)) for i, d in zip(id_row, d_row) if i >= 0 and d <= limit]
+            for id_row, d_row in zip(ids, distances)
+        ]
+
+    def get(self, monument_id: int) -> dict | None:
+        """O(1) lookup of a monument by its row id."""
+        return _load_index()[1].get(monument_id)
+
+    def related(self, monument_id: int, k: int = 3, exclude: tuple[int, ...] = ()) -> list[dict]:
+        """
+        The *k* monuments most similar to *monument_id*, from the
+        precomputed neighbour table (a row read: no embedding, no search).
+        Empty when the table is missing.
+        """
+        table = _load_neighbors()
+        if table is None or not 0 <= monument_id < len(table):
+            return []
+        ids = [int(i) for i in table[monument_id] if i >= 0 and int(i) not in exclude]
+        store = _load_index()[1]
+        return [store.get(i) for i in ids[:k]]
+
+    def warm(self) -> int:
+        """Load the (already built) index and create the embeddings client."""
+        _build_embeddings()
+        return preload_index()
+
+monument_search = MonumentSearch()
+
+# ── Public helpers for Streamlit UI ─────────────────────────────────────────
+def model_answer(query: str) -> str:
+    """
+    Return a concise answer for *query* using the monument knowledge base:
+    retrieve the closest monuments, then answer through the LLM gateway.
+    Raises :class:`LLMUnavailableError` when no model can answer, so
+    callers that memoise answers never store a degraded one.
+    """
+    monuments = monument_search.search(query, k=4)
+    return llm_gateway.invoke(monument_prompt(monuments, query)).content
+
+
+def fallback_answer(query: str) -> str:
+    """The retrieved facts for *query*, for when no model is available."""
+    context = "\n\n".join(describe_monument(m) for m in monument_search.search(query, k=4))
+    return context or "Sorry, I can't answer right now. Please try again shortly."
+
+
+def answer_monument_query(query: str) -> str:
+    """:func:`model_answer`, degrading to :func:`fallback_answer` rather than failing the turn."""
+    try:
+        return model_answer(query)
+    except LLMUnavailableError:
+        return fallback_answer(query)
+
+# ── CLI: rebuild the on-disk index ──────────────────────────────────────────
+if __name__ == "__main__":
+    import sys
 
-    if isinstance(result, dict):               # LC ≥0.2
-        for k in ("result", "output_text", "answer"):
-            if isinstance(result.get(k), str):
-                return result[k]
-        return str(result)                     # fallback
+    from backend.app.logging_setup import configure_logging
 
-    return str(result)                         # LC ≤0.1 returns str
+    configure_logging(json_output=False)
+    if "--neighbors" in sys.argv[1:]:
+        rebuild_neighbors()
+    elif "--if-stale" in sys.argv[1:]:
+        ensure_index()
+    else:
+        build_index()
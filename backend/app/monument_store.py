@@ -0,0 +1,228 @@
+# backend/app/monument_store.py
+"""
+Compact, memory-mappable monument metadata.
+
+Row *i* is the monument whose vector has id *i* in the FAISS index, so a
+search hit is resolved without any per-record Python objects.
+
+On-disk layout (one directory, written once, read-only afterwards):
+
+    name.bin / name.offsets.npy                 UTF-8 blob + int64 offsets
+    description.bin / description.offsets.npy   UTF-8 blob + int64 offsets
+    location.codes.npy / location.table.json    uint32 codes → interned strings
+    location.postings.npy / location.terms.json inverted index: location token
+                                                → sorted int64 row ids
+    store.json                                  row count + format version
+
+Everything is opened with ``mmap`` so all workers on a box share the same
+page-cache pages instead of each holding a private copy.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+STORE_VERSION = 2
+TEXT_COLUMNS = ("name", "description")
+
+_LOCATION_SPLIT = re.compile(r"\s*[,;/|]\s*")
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+
+def normalise_place(text: str) -> str:
+    """'  Île-de-France ' → 'ile de france' (lower-case, no accents or punctuation)."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def location_tokens(location: str) -> List[str]:
+    """'Agra, Uttar Pradesh, India' → ['agra', 'uttar pradesh', 'india']"""
+    tokens = (normalise_place(part) for part in _LOCATION_SPLIT.split(location or ""))
+    return list(dict.fromkeys(t for t in tokens if t))
+
+
+def _write_location_index(directory: Path, codes: np.ndarray, table: List[str]) -> None:
+    """
+    Invert ``row → location code`` into ``token → sorted row ids``.  One
+    argsort groups the rows by code; each token's postings are the union
+    of the groups of the locations that mention it.
+    """
+    order = np.argsort(codes, kind="stable").astype(np.int64)
+    bounds = np.searchsorted(codes[order], np.arange(len(table) + 1))
+
+    token_codes: Dict[str, List[int]] = {}
+    for code, location in enumerate(table):
+        for token in location_tokens(location):
+            token_codes.setdefault(token, []).append(code)
+
+    terms: Dict[str, Tuple[int, int]] = {}
+    postings: List[np.ndarray] = []
+    start = 0
+    for token, token_code_list in sorted(token_codes.items()):
+        ids = np.sort(np.concatenate([order[bounds[c]:bounds[c + 1]] for c in token_code_list]))
+        terms[token] = (start, start + len(ids))
+        postings.append(ids)
+        start += len(ids)
+
+    np.save(directory / "location.postings.npy",
+            np.concatenate(postings) if postings else np.empty(0, dtype=np.int64))
+    with open(directory / "location.terms.json", "w", encoding="utf-8") as f:
+        json.dump(terms, f, ensure_ascii=False)
+
+# --------------------------------------------------------------------------- #
+# Writer
+# --------------------------------------------------------------------------- #
+
+class MonumentStoreWriter:
+    """
+    Append monuments one at a time; only the offsets (8 bytes/row) and the
+    distinct locations are held in memory while writing.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._blobs = {c: open(self.directory / f"{c}.bin", "wb") for c in TEXT_COLUMNS}
+        self._offsets = {c: array("q", [0]) for c in TEXT_COLUMNS}
+        self._codes = array("I")
+        self._locations: Dict[str, int] = {}
+        self.count = 0
+
+    def append(self, monument: dict) -> int:
+        """Write *monument* and return its row id."""
+        for column in TEXT_COLUMNS:
+            data = (monument.get(column) or "").encode("utf-8")
+            self._blobs[column].write(data)
+            self._offsets[column].append(self._offsets[column][-1] + len(data))
+        location = monument.get("location") or ""
+        self._codes.append(self._locations.setdefault(location, len(self._locations)))
+        self.count += 1
+        return self.count - 1
+
+    def close(self) -> None:
+        for column, blob in self._blobs.items():
+            blob.close()
+            np.save(self.directory / f"{column}.offsets.npy",
+                    np.frombuffer(self._offsets[column], dtype=np.int64))
+        codes = np.frombuffer(self._codes, dtype=np.uint32)
+        np.save(self.directory / "location.codes.npy", codes)
+        with open(self.directory / "location.table.json", "w", encoding="utf-8") as f:
+            json.dump(list(self._locations), f, ensure_ascii=False)
+        _write_location_index(self.directory, codes, list(self._locations))
+        # Written last: its presence marks a complete store
+        with open(self.directory / "store.json", "w", encoding="utf-8") as f:
+            json.dump({"version": STORE_VERSION, "count": self.count}, f)
+
+    def __enter__(self) -> "MonumentStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, *_exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            for blob in self._blobs.values():
+                blob.close()
+
+
+# --------------------------------------------------------------------------- #
+# Reader
+# --------------------------------------------------------------------------- #
+
+class MonumentStore:
+    """Read-only columnar view over a directory written by the writer."""
+
+    def __init__(
+        self,
+        blobs: Dict[str, np.ndarray],
+        offsets: Dict[str, np.ndarray],
+        location_codes: np.ndarray,
+        location_table: List[str],
+        location_postings: np.ndarray,
+        location_terms: Dict[str, Tuple[int, int]],
+    ) -> None:
+        self._blobs = blobs
+        self._offsets = offsets
+        self.location_codes = location_codes
+        self.location_table = location_table
+        self._postings = location_postings
+        self.location_terms = location_terms
+        # Longest location token in words, bounds query n-gram lookups
+        self.max_location_words = max((t.count(" ") + 1 for t in location_terms), default=0)
+
+    @classmethod
+    def open(cls, directory: Path, mmap: bool = True) -> "MonumentStore":
+        directory = Path(directory)
+        with open(directory / "store.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported monument store version in {directory}")
+
+        mode = "r" if mmap else None
+        blobs, offsets = {}, {}
+        for column in TEXT_COLUMNS:
+            blob_path = directory / f"{column}.bin"
+            # np.memmap cannot map an empty file
+            if mmap and os.path.getsize(blob_path):
+                blobs[column] = np.memmap(blob_path, dtype=np.uint8, mode="r")
+            else:
+                blobs[column] = np.fromfile(blob_path, dtype=np.uint8)
+            offsets[column] = np.load(directory / f"{column}.offsets.npy", mmap_mode=mode)
+        codes = np.load(directory / "location.codes.npy", mmap_mode=mode)
+        with open(directory / "location.table.json", encoding="utf-8") as f:
+            table = json.load(f)
+        postings = np.load(directory / "location.postings.npy", mmap_mode=mode)
+        with open(directory / "location.terms.json", encoding="utf-8") as f:
+            terms = {token: tuple(span) for token, span in json.load(f).items()}
+        return cls(blobs, offsets, codes, table, postings, terms)
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        """True for a complete store in the current format (older ones get rebuilt)."""
+        try:
+            with open(Path(directory) / "store.json", encoding="utf-8") as f:
+                return json.load(f).get("version") == STORE_VERSION
+        except (OSError, ValueError):
+            return False
+
+    def __len__(self) -> int:
+        return len(self.location_codes)
+
+    def _text(self, column: str, row: int) -> str:
+        offsets = self._offsets[column]
+        start, end = int(offsets[row]), int(offsets[row + 1])
+        return self._blobs[column][start:end].tobytes().decode("utf-8")
+
+    def name(self, row: int) -> str:
+        return self._text("name", row)
+
+    def description(self, row: int) -> str:
+        return self._text("description", row)
+
+    def location(self, row: int) -> str:
+        return self.location_table[int(self.location_codes[row])]
+
+    def location_ids(self, token: str) -> np.ndarray:
+        """Sorted row ids whose location mentions *token* (a normalised place)."""
+        span = self.location_terms.get(token)
+        if span is None:
+            return self._postings[:0]
+        return self._postings[span[0]:span[1]]
+
+    def get(self, row: int) -> Optional[dict]:
+        """Materialise row *row* as a monument dict (``None`` if out of range)."""
+        if not 0 <= row < len(self):
+            return None
+        return {
+            "id": row,
+            "name": self.name(row),
+            "location": self.location(row),
+            "description": self.description(row),
+        }
@@ -6,15 +6,19 @@ and e-mail delivery for the Streamlit-only build.
 
 from __future__ import annotations
 
+import functools
+import logging
+import os
 import random
 import re
-from typing import Tuple, Optional
+import uuid
+from typing import Dict, NamedTuple, Optional, Tuple
 
-import redis
 import streamlit as st
 
 # backend/app/otp.py  – top of file
-from .email_utils import send_via_sendgrid
+from .email_utils import EMAIL_BACKEND, send_via_sendgrid
+from .redis_store import Client, connect, hash_tagged, is_cluster
 
 
 # --------------------------------------------------------------------------- #
@@ -23,12 +27,61 @@ from .email_utils import send_via_sendgrid
 
 DEFAULT_TTL_SECONDS = 300  # 5 minutes
 
-# Connect to your cloud Redis (e.g., Upstash) via Streamlit secrets
-redis_client = redis.from_url(st.secrets["REDIS_URL"], decode_responses=True)
+# Sliding-window send limits: scope → (max sends, window in seconds)
+OTP_SEND_LIMITS: Dict[str, Tuple[int, int]] = {
+    "email": (5, 3600),
+    "session": (10, 3600),
+    "ip": (20, 3600),
+}
+RESEND_COOLDOWN_SECONDS = 60
+
+# Replay / load tests only: every generated OTP is this code, so recorded
+# conversations can be re-driven.  Refused unless e-mail is stubbed out
+# (EMAIL_BACKEND=null), so a real deployment can never hand out known codes.
+OTP_FIXED_CODE = os.getenv("OTP_FIXED_CODE") or None
+if OTP_FIXED_CODE and EMAIL_BACKEND != "null":
+    raise RuntimeError("OTP_FIXED_CODE is only allowed with EMAIL_BACKEND=null (replay / load tests)")
+if OTP_FIXED_CODE:
+    logging.getLogger(__name__).warning("OTP_FIXED_CODE is set: all OTPs are %s", "*" * len(OTP_FIXED_CODE))
+
+@functools.lru_cache(maxsize=1)
+def get_redis_client() -> Client:
+    """
+    Connect to your cloud Redis (e.g., Upstash) via Streamlit secrets, on
+    first use.  ``REDIS_CLUSTER`` comes from the same secrets as the URL.
+    """
+    cluster = str(st.secrets.get("REDIS_CLUSTER", False)).strip().lower() in ("1", "true", "yes")
+    return connect(st.secrets["REDIS_URL"], cluster=cluster)
 
 # Regex patterns
-EMAIL_REGEX = re.compile(r"[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}")
+EMAIL_PATTERN = r"[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}"
+EMAIL_REGEX = re.compile(EMAIL_PATTERN)
 OTP_REGEX = re.compile(r"\b(\d{4,8})\b")  # 4- to 8-digit number
+OTP_DIGITS = 6
+
+# One alternation so a single left-to-right pass finds both token kinds;
+# digits inside an e-mail address are consumed by the e-mail branch.
+INPUT_TOKEN_REGEX = re.compile(rf"(?P<email>{EMAIL_PATTERN})|\b(?P<otp>\d{{{OTP_DIGITS}}})\b")
+
+
+# --------------------------------------------------------------------------- #
+# Keys
+# --------------------------------------------------------------------------- #
+
+# Hash-tagged, so on a cluster an address's code, cooldown and send window
+# share a slot (one script call), and a session's window sits with its
+# chat state (``chat_state:{<session_id>}``).
+
+def otp_key(email: str) -> str:
+    return hash_tagged("otp", email)
+
+
+def cooldown_key(email: str) -> str:
+    return hash_tagged("otp_cooldown", email)
+
+
+def rate_key(scope: str, value: str) -> str:
+    return hash_tagged(f"otp_rate:{scope}", value)
 
 
 # --------------------------------------------------------------------------- #
@@ -37,22 +90,24 @@ OTP_REGEX = re.compile(r"\b(\d{4,8})\b")  # 4- to 8-digit number
 
 def generate_otp(length: int = 6) -> str:
     """Return a random numeric OTP (default 6 digits, zero-padded)."""
+    if OTP_FIXED_CODE:
+        return OTP_FIXED_CODE
     return "".join(str(random.randint(0, 9)) for _ in range(length))
 
 
 def store_otp(email: str, otp: str, ttl_seconds: int = DEFAULT_TTL_SECONDS) -> None:
-    """Store *otp* under key ``otp:<email>`` with a configurable TTL."""
-    redis_client.setex(f"otp:{email}", ttl_seconds, otp)
+    """Store *otp* under key ``otp:{<email>}`` with a configurable TTL."""
+    get_redis_client().setex(otp_key(email), ttl_seconds, otp)
 
 
 def retrieve_stored_otp(email: str) -> Optional[str]:
     """Return the stored OTP for *email* (or ``None`` if expired/missing)."""
-    return redis_client.get(f"otp:{email}")
+    return get_redis_client().get(otp_key(email))
 
 
 def delete_otp(email: str) -> None:
     """Remove the OTP for *email* – called after successful verification."""
-    redis_client.delete(f"otp:{email}")
+    get_redis_client().delete(otp_key(email))
 
 
 def verify_otp(email: str, otp: str) -> bool:
@@ -67,6 +122,164 @@ def verify_otp(email: str, otp: str) -> bool:
     return False
 
 
+# --------------------------------------------------------------------------- #
+# Send rate limiting
+# --------------------------------------------------------------------------- #
+
+# One atomic script per check, so a decision costs a single round-trip
+# (one per slot on a cluster, see check_otp_send).
+#   KEYS[1]   otp:{<email>}            – the currently valid code (if any)
+#   KEYS[2]   otp_cooldown:{<email>}   – present while a resend is blocked
+#   KEYS[3..] sliding-window sorted sets, one per limited scope
+#   ARGV      member, cooldown_ms, then (limit, window_ms) per window key
+# With cooldown_ms = -1 there are no code/cooldown keys: KEYS[1..] are windows.
+_SEND_CHECK_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local member = ARGV[1]
+local cooldown = tonumber(ARGV[2])
+local first = 1
+
+if cooldown >= 0 then
+  first = 3
+  local wait = redis.call('PTTL', KEYS[2])
+  if wait > 0 then
+    return {'cooldown', wait, redis.call('GET', KEYS[1]) or ''}
+  end
+end
+
+for i = first, #KEYS do
+  local limit = tonumber(ARGV[2 * (i - first) + 3])
+  local window = tonumber(ARGV[2 * (i - first) + 4])
+  redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now - window)
+  if redis.call('ZCARD', KEYS[i]) >= limit then
+    local oldest = redis.call('ZRANGE', KEYS[i], 0, 0, 'WITHSCORES')
+    return {'limited', tonumber(oldest[2]) + window - now, ''}
+  end
+end
+
+for i = first, #KEYS do
+  redis.call('ZADD', KEYS[i], now, member)
+  redis.call('PEXPIRE', KEYS[i], tonumber(ARGV[2 * (i - first) + 4]))
+end
+if first == 1 then
+  return {'ok', 0, ''}
+end
+if cooldown > 0 then
+  redis.call('SET', KEYS[2], '1', 'PX', cooldown)
+end
+return {'ok', 0, redis.call('GET', KEYS[1]) or ''}
+"""
+
+
+def _send_check(keys: list, args: list) -> list:
+    # EVALSHA, loading the script on the first NOSCRIPT reply
+    return get_redis_client().register_script(_SEND_CHECK_LUA)(keys=keys, args=args)
+
+
+class OtpSendDecision(NamedTuple):
+    """Outcome of :func:`check_otp_send`."""
+
+    allowed: bool                 # may an e-mail go out now?
+    reason: str                   # "ok" | "cooldown" | "limited"
+    retry_after: float            # seconds until the next send is permitted
+    reuse_otp: Optional[str]      # still-valid code to resend, if any
+
+
+def check_otp_send(
+    email: str,
+    session_id: Optional[str] = None,
+    ip: Optional[str] = None,
+    cooldown_seconds: int = RESEND_COOLDOWN_SECONDS,
+) -> OtpSendDecision:
+    """
+    Check (and, when allowed, record) an OTP send for *email*.
+
+    Every scope that is known – e-mail, session, client IP – is limited by
+    its own sliding window from ``OTP_SEND_LIMITS``.  Inside the resend
+    cooldown nothing is sent; after it, a code that is still valid is
+    handed back so the caller resends it instead of minting a new one.
+
+    On a cluster the session and IP windows live in other slots, so each
+    gets its own script call after the e-mail's; a refusal there takes the
+    send back out of the windows already recorded and lifts the cooldown.
+    """
+    member = uuid.uuid4().hex
+    limit, window = OTP_SEND_LIMITS["email"]
+    keys = [otp_key(email), cooldown_key(email), rate_key("email", email)]
+    args: list = [member, cooldown_seconds * 1000, limit, window * 1000]
+    others = []
+    for scope, value in (("session", session_id), ("ip", ip)):
+        if not value:
+            continue
+        limit, window = OTP_SEND_LIMITS[scope]
+        if is_cluster(get_redis_client()):
+            others.append((rate_key(scope, value), limit, window))
+            continue
+        keys.append(rate_key(scope, value))
+        args.extend([limit, window * 1000])
+
+    reason, wait_ms, existing = _send_check(keys=keys, args=args)
+    recorded = keys[2:]
+    for key, limit, window in others:
+        if reason != "ok":
+            break
+        reason, wait_ms, _ = _send_check(keys=[key], args=[member, -1, limit, window * 1000])
+        if reason == "ok":
+            recorded.append(key)
+        else:
+            existing = ""
+            _undo_send(recorded, cooldown_key(email), member)
+
+    return OtpSendDecision(
+        allowed=reason == "ok",
+        reason=reason,
+        retry_after=max(int(wait_ms), 0) / 1000,
+        reuse_otp=existing or None,
+    )
+
+
+def _undo_send(windows: list, cooldown: str, member: str) -> None:
+    pipe = get_redis_client().pipeline(transaction=False)
+    for key in windows:
+        pipe.zrem(key, member)
+    pipe.delete(cooldown)
+    pipe.execute()
+
+
+def issue_otp(
+    email: str,
+    session_id: Optional[str] = None,
+    ip: Optional[str] = None,
+    ttl_seconds: int = DEFAULT_TTL_SECONDS,
+) -> Tuple[OtpSendDecision, Optional[str]]:
+    """
+    Return ``(decision, code)`` where *code* is the OTP to e-mail now.
+
+    *code* is ``None`` when the send is refused; otherwise it is either the
+    still-valid stored code (TTL refreshed) or a freshly generated one.
+    """
+    decision = check_otp_send(email, session_id=session_id, ip=ip)
+    if not decision.allowed:
+        return decision, None
+
+    otp_code = decision.reuse_otp or generate_otp()
+    store_otp(email, otp_code, ttl_seconds=ttl_seconds)
+    return decision, otp_code
+
+
+def describe_refusal(decision: OtpSendDecision) -> str:
+    """Human-readable explanation for a refused send."""
+    wait = max(1, round(decision.retry_after))
+    if decision.reason == "cooldown":
+        return (
+            "A code was sent moments ago – please check your inbox "
+            f"or request a new one in {wait} seconds."
+        )
+    minutes = max(1, round(wait / 60))
+    return f"Too many codes requested. Please try again in about {minutes} minute(s)."
+
+
 # --------------------------------------------------------------------------- #
 # Validation / extraction helpers
 # --------------------------------------------------------------------------- #
@@ -82,29 +295,65 @@ def find_email(text: str) -> Optional[str]:
     return match.group(0) if match else None
 
 
-def extract_otp(text: str, digits: int = 6) -> Optional[str]:
+@functools.lru_cache(maxsize=8)
+def _otp_pattern(digits: int) -> re.Pattern:
+    return re.compile(rf"\b(\d{{{digits}}})\b")
+
+
+def extract_otp(text: str, digits: int = OTP_DIGITS) -> Optional[str]:
     """Return the first *digits*-long number found in *text*, else ``None``."""
-    pattern = re.compile(rf"\b(\d{{{digits}}})\b")
-    match = pattern.search(text)
+    match = _otp_pattern(digits).search(text)
     return match.group(1) if match else None
 
 
+class InputScan(NamedTuple):
+    """What a chat input contains, classified once per turn."""
+
+    kind: str                 # "email" | "otp" | "text"
+    email: Optional[str]      # first e-mail address, if any
+    otp: Optional[str]        # first standalone 6-digit code, if any
+
+
+def scan_input(text: Optional[str]) -> InputScan:
+    """
+    Single pass over *text* with a precompiled pattern.  ``kind`` is
+    ``"email"`` when an address is present, else ``"otp"`` for a 6-digit
+    code, else ``"text"``; both fields are filled when both occur.
+    """
+    email = otp = None
+    for match in INPUT_TOKEN_REGEX.finditer(text or ""):
+        if match.lastgroup == "email":
+            email = email or match.group("email")
+        else:
+            otp = otp or match.group("otp")
+        if email and otp:
+            break
+    kind = "email" if email else "otp" if otp else "text"
+    return InputScan(kind, email, otp)
+
+
 # --------------------------------------------------------------------------- #
 # Convenience wrapper
 # --------------------------------------------------------------------------- #
 
 def generate_and_send_otp(
-    email: str, ttl_seconds: int = DEFAULT_TTL_SECONDS
+    email: str,
+    ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    session_id: Optional[str] = None,
+    ip: Optional[str] = None,
 ) -> Tuple[bool, str]:
     """
-    1. Generate an OTP.
-    2. Store it in Redis.
+    1. Check the send limits (see :func:`issue_otp`).
+    2. Generate and store an OTP, or reuse the still-valid one.
     3. Send it to *email* via SendGrid.
 
     Returns ``(True, "…")`` on success, else ``(False, "error …")``.
     """
-    otp_code = generate_otp()
-    store_otp(email, otp_code, ttl_seconds=ttl_seconds)
+    decision, otp_code = issue_otp(
+        email, session_id=session_id, ip=ip, ttl_seconds=ttl_seconds
+    )
+    if otp_code is None:
+        return False, describe_refusal(decision)
 
     sent = send_via_sendgrid(
         to_email=email,
@@ -0,0 +1,221 @@
+# backend/app/profiling.py
+"""
+On-demand profiling of a live worker (driven by the ``/admin/profile/*``
+endpoints in ``backend/app/main.py``).
+
+• :class:`GraphProfiler` – for a bounded window, a sampled fraction of
+  chat-graph runs execute under ``cProfile`` (wall-clock timer, so waits on
+  Redis / the LLM show up).  Results accumulate into one ``pstats`` profile,
+  downloadable in the standard marshal format (``snakeviz``, ``pstats``,
+  ``gprof2dot`` …).
+• :class:`MemoryProfiler` – ``tracemalloc`` for a bounded window: top
+  allocation sites, growth since the window opened, and totals for the
+  chat-state and vector-index code paths; snapshots download in the
+  ``tracemalloc.Snapshot.load`` format.
+
+While no window is open the request path pays one attribute check.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# --------------------------------------------------------------------------- #
+# Graph runs (cProfile)
+# --------------------------------------------------------------------------- #
+
+class GraphProfiler:
+    def __init__(self) -> None:
+        self.until: Optional[float] = None       # monotonic end of window; None → off
+        self.sample_rate = 1.0
+        self.max_runs = 0
+        self.runs = 0
+        self.skipped_busy = 0
+        self._stats: Optional[pstats.Stats] = None
+        # One profiler at a time: since 3.12 cProfile hooks are process-wide
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+
+    def start(self, seconds: float, sample_rate: float, max_runs: int) -> None:
+        with self._lock:
+            self._stats, self.runs, self.skipped_busy = None, 0, 0
+        self.sample_rate, self.max_runs = sample_rate, max_runs
+        self.until = time.monotonic() + seconds
+
+    def stop(self) -> None:
+        self.until = None
+
+    def wants(self) -> bool:
+        """Should this run be profiled?  Closes the window once it is spent."""
+        until = self.until
+        if until is None:
+            return False
+        if time.monotonic() >= until or self.runs >= self.max_runs:
+            self.until = None
+            return False
+        return random.random() < self.sample_rate
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Call ``fn(*args)`` under cProfile (unprofiled if another run holds it)."""
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            return fn(*args)
+        try:
+            profile = cProfile.Profile(time.perf_counter)
+            profile.enable()
+            try:
+                return fn(*args)
+            finally:
+                profile.disable()
+                with self._lock:
+                    if self._stats is None:
+                        self._stats = pstats.Stats(profile)
+                    else:
+                        self._stats.add(profile)
+                    self.runs += 1
+        finally:
+            self._busy.release()
+
+    def status(self) -> dict:
+        return {
+            "active": self.until is not None,
+            "seconds_left": max(0.0, self.until - time.monotonic()) if self.until else 0.0,
+            "sample_rate": self.sample_rate,
+            "runs": self.runs,
+            "max_runs": self.max_runs,
+            "skipped_busy": self.skipped_busy,
+        }
+
+    def report(self, sort: str = "cumulative", limit: int = 40) -> Optional[str]:
+        with self._lock:
+            if self._stats is None:
+                return None
+            out = io.StringIO()
+            self._stats.stream = out
+            self._stats.sort_stats(sort).print_stats(limit)
+            return out.getvalue()
+
+    def dump(self) -> Optional[bytes]:
+        """The accumulated profile in ``pstats`` file format."""
+        with self._lock:
+            return None if self._stats is None else marshal.dumps(self._stats.stats)
+
+
+# --------------------------------------------------------------------------- #
+# Allocations (tracemalloc)
+# --------------------------------------------------------------------------- #
+
+# Code paths whose allocations are summed separately (matched on any frame)
+AREAS: Dict[str, Tuple[str, ...]] = {
+    "chat_state": (
+        "*/backend/app/langgraph_workflow.py",
+        "*/langchain_core/messages/*",
+        "*/pydantic/*",
+    ),
+    "index": (
+        "*/backend/app/monument_search.py",
+        "*/backend/app/monument_store.py",
+        "*/faiss/*",
+        "*/numpy/*",
+    ),
+}
+
+_NOISE = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _stat_row(stat: Any) -> dict:
+    frame = stat.traceback[0]
+    row = {"where": f"{frame.filename}:{frame.lineno}", "kib": round(stat.size / 1024, 1), "count": stat.count}
+    if hasattr(stat, "size_diff"):
+        row["kib_diff"] = round(stat.size_diff / 1024, 1)
+    return row
+
+
+class MemoryProfiler:
+    def __init__(self) -> None:
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.until: Optional[float] = None
+
+    @property
+    def active(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int, seconds: float) -> None:
+        """Start tracing now; stops by itself after *seconds* (call on the event loop)."""
+        self.stop()
+        tracemalloc.start(frames)
+        self._baseline = self._snapshot()
+        self.until = time.monotonic() + seconds
+        self._timer = asyncio.get_running_loop().call_later(seconds, self.stop)
+
+    def stop(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._baseline, self.until = None, None
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_NOISE)
+
+    def report(self, top: int = 25) -> dict:
+        """Top allocation sites, growth since start and per-area totals (blocking; run off-loop)."""
+        if not self.active:
+            return {"active": False}
+        snapshot = self._snapshot()
+        areas = {}
+        for area, patterns in AREAS.items():
+            traces = snapshot.filter_traces([tracemalloc.Filter(True, p, all_frames=True) for p in patterns])
+            stats = traces.statistics("lineno")
+            areas[area] = {
+                "kib": round(sum(s.size for s in stats) / 1024, 1),
+                "top": [_stat_row(s) for s in stats[:top]],
+            }
+        traced, peak = tracemalloc.get_traced_memory()
+        return {
+            "active": True,
+            "seconds_left": max(0.0, self.until - time.monotonic()) if self.until else 0.0,
+            "traced_kib": round(traced / 1024, 1),
+            "peak_kib": round(peak / 1024, 1),
+            "top": [_stat_row(s) for s in snapshot.statistics("lineno")[:top]],
+            "growth": [
+                _stat_row(s) for s in snapshot.compare_to(self._baseline, "lineno")[:top]
+            ] if self._baseline is not None else [],
+            "areas": areas,
+        }
+
+    def dump(self) -> Optional[bytes]:
+        """Current snapshot in ``tracemalloc.Snapshot.load`` format (blocking; run off-loop)."""
+        if not self.active:
+            return None
+        fd, path = tempfile.mkstemp(suffix=".tracemalloc")
+        os.close(fd)
+        try:
+            self._snapshot().dump(path)
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.unlink(path)
+
+
+graph_profiler = GraphProfiler()
+memory_profiler = MemoryProfiler()
@@ -0,0 +1,91 @@
+# backend/app/prompts.py
+"""
+Prompt assembly laid out for provider-side prefix caching.
+
+Every prompt is ``[system instructions] + [monument context] + [question]``:
+the instructions never change, the context depends only on which monuments
+were retrieved, and the user's words come last.  Providers that cache
+prompt prefixes (OpenAI does so automatically from 1024 tokens) can then
+reuse everything up to the question across users asking about the same
+monument.  The gateway reports how many prompt tokens were served from
+that cache (``GET /stats/llm``).
+
+Context messages are built once per monument id (row id in the store) and
+kept in a bounded LRU, so the hot path does no string formatting.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import List, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+# --------------------------------------------------------------------------- #
+# Stable prefixes
+# --------------------------------------------------------------------------- #
+
+MONUMENT_SYSTEM = SystemMessage(content=(
+    "You are a historical monument guide. Using only the monument information "
+    "provided, answer the user's question concisely while covering all key "
+    "aspects. If the information does not contain the answer, say that you "
+    "don't know rather than making one up."
+))
+
+OFF_TOPIC_SYSTEM = SystemMessage(content=(
+    "You are a historical monument guide. The user's message is not about a "
+    "historical monument: politely say that you only answer questions about "
+    "historical monuments."
+))
+
+CONTEXT_CACHE_SIZE = 4096
+
+
+def describe_monument(monument: dict) -> str:
+    return f"{monument['name']} ({monument['location']}): {monument['description']}"
+
+
+class ContextPrefixes:
+    """``tuple of monument ids → context SystemMessage``, least recently used evicted."""
+
+    def __init__(self, maxsize: int = CONTEXT_CACHE_SIZE) -> None:
+        self._maxsize = maxsize
+        self._messages: "OrderedDict[Tuple[int, ...], SystemMessage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, monuments: Sequence[dict]) -> SystemMessage:
+        key = tuple(m.get("id", -1) for m in monuments)
+        if -1 in key:                     # records without a row id: build uncached
+            return self._build(monuments)
+        with self._lock:
+            message = self._messages.get(key)
+            if message is not None:
+                self._messages.move_to_end(key)
+                return message
+        message = self._build(monuments)
+        with self._lock:
+            self._messages[key] = message
+            while len(self._messages) > self._maxsize:
+                self._messages.popitem(last=False)
+        return message
+
+    @staticmethod
+    def _build(monuments: Sequence[dict]) -> SystemMessage:
+        return SystemMessage(
+            content="Monument information:\n" + "\n".join(describe_monument(m) for m in monuments)
+        )
+
+
+context_prefixes = ContextPrefixes()
+
+# --------------------------------------------------------------------------- #
+# Builders (question always last)
+# --------------------------------------------------------------------------- #
+
+def monument_prompt(monuments: Sequence[dict], question: str) -> List[BaseMessage]:
+    return [MONUMENT_SYSTEM, context_prefixes.get(monuments), HumanMessage(content=question)]
+
+
+def off_topic_prompt(question: str) -> List[BaseMessage]:
+    return [OFF_TOPIC_SYSTEM, HumanMessage(content=question)]
@@ -0,0 +1,240 @@
+# backend/app/redis_store.py
+"""
+Redis access shared by the API and the Streamlit build.
+
+• :func:`connect` – one factory for a single node or a Redis Cluster
+  (``REDIS_CLUSTER``), so callers never care which one they talk to
+• :func:`hash_tagged` – key naming: the part in ``{…}`` picks the cluster
+  slot, so keys sharing a tag (a session's state and its OTP send window,
+  an address's code, cooldown and window) live on one node and can be used
+  together in a pipeline or a Lua script
+• :class:`ReadThroughCache` – a short-TTL in-process copy of hot values
+  (chat state), written through and invalidated across workers over
+  pub/sub, so a conversation served by one worker rarely reads Redis
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+import redis
+
+from backend.app.config import runtime_settings
+
+logger = logging.getLogger(__name__)
+
+Client = Union[redis.Redis, "redis.RedisCluster"]
+
+# --------------------------------------------------------------------------- #
+# Connection & key naming
+# --------------------------------------------------------------------------- #
+
+def connect(url: str, cluster: Optional[bool] = None) -> Client:
+    """A client for *url*; a cluster client when *cluster* (default ``REDIS_CLUSTER``)."""
+    if runtime_settings.redis_cluster if cluster is None else cluster:
+        return redis.RedisCluster.from_url(url, decode_responses=True)
+    return redis.Redis.from_url(url, decode_responses=True)
+
+
+def is_cluster(client: Client) -> bool:
+    return isinstance(client, redis.RedisCluster)
+
+
+def hash_tagged(prefix: str, tag: str) -> str:
+    """``hash_tagged("otp", "a@b.c")`` → ``"otp:{a@b.c}"`` (slot chosen by the tag)."""
+    return f"{prefix}:{{{tag}}}"
+
+
+def mget(client: Client, keys: List[str]) -> List[Optional[str]]:
+    """MGET across slots (a cluster client splits it per node)."""
+    if is_cluster(client):
+        return client.mget_nonatomic(keys)
+    return client.mget(keys)
+
+# --------------------------------------------------------------------------- #
+# Local read-through tier
+# --------------------------------------------------------------------------- #
+
+class ReadThroughCache:
+    """
+    Short-lived local copies of string values, in front of *client*.
+
+    Writes go through this cache: Redis is updated, the local copy replaced
+    and the key announced on *channel*; every other process drops its copy
+    when the announcement arrives.  Entries also expire after *ttl* seconds,
+    which bounds staleness should an announcement be lost.  While the
+    subscriber is not connected nothing is served locally.
+
+    A value read from Redis is kept only if no invalidation or local write
+    touched its key while the read was in flight; otherwise an announcement
+    that overtook the reply would be lost and the stale value served until
+    it expires.  Keys are tracked by generation counters, striped by hash so
+    the bookkeeping stays fixed-size.
+    """
+
+    STRIPES = 1024
+
+    def __init__(self, client: Client, channel: str, ttl: float, max_entries: int) -> None:
+        self.client = client
+        self.channel = channel
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = self.misses = self.invalidations = 0
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generations = [0] * self.STRIPES      # bumped on every invalidation / write
+        self._origin = uuid.uuid4().hex              # our own announcements are skipped
+        self._live = False
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    # ── reads ────────────────────────────────────────────────────────────
+    def _local(self, key: str) -> Optional[str]:
+        if not self._live:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _stripe(self, key: str) -> int:
+        return hash(key) % self.STRIPES
+
+    def _generation(self, key: str) -> int:
+        with self._lock:
+            return self._generations[self._stripe(key)]
+
+    def _bump(self, keys) -> None:
+        # Callers hold the lock
+        for key in keys:
+            self._generations[self._stripe(key)] += 1
+
+    def _keep(self, key: str, value: Optional[str], generation: int) -> None:
+        """Cache *value* unless *key* changed since *generation* was taken."""
+        if not self._live or value is None:
+            return
+        with self._lock:
+            if self._generations[self._stripe(key)] != generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._local(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        generation = self._generation(key)
+        value = self.client.get(key)
+        self._keep(key, value, generation)
+        return value
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        found: Dict[str, Optional[str]] = {key: self._local(key) for key in keys}
+        missing = [key for key, value in found.items() if value is None]
+        self.hits += len(found) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            generations = [self._generation(key) for key in missing]
+            for key, value, generation in zip(missing, mget(self.client, missing), generations):
+                found[key] = value
+                self._keep(key, value, generation)
+        return [found[key] for key in keys]
+
+    # ── writes ───────────────────────────────────────────────────────────
+    def set(self, key: str, value: str) -> None:
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[str, str]) -> None:
+        with self._lock:                          # reads in flight must not keep older values
+            self._bump(items)
+            generations = [self._generations[self._stripe(key)] for key in items]
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(key, value)
+        if self.enabled:
+            pipe.publish(self.channel, json.dumps([self._origin, list(items)]))
+        pipe.execute()
+        for (key, value), generation in zip(items.items(), generations):
+            self._keep(key, value, generation)
+
+    # ── invalidation ─────────────────────────────────────────────────────
+    def _drop(self, keys: List[str]) -> None:
+        with self._lock:
+            self._bump(keys)                      # also voids reads still in flight
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._generations = [g + 1 for g in self._generations]
+            self._entries.clear()
+
+    def _on_message(self, data: str) -> None:
+        try:
+            origin, keys = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if origin != self._origin:
+            self._drop(keys)
+
+    def _listen(self) -> None:
+        while not self._closed.is_set():
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                self._clear()            # anything cached before may have missed announcements
+                self._live = True
+                while not self._closed.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._on_message(message["data"])
+            except redis.RedisError as exc:
+                logger.warning("Cache invalidation channel lost (%s); serving from Redis", exc)
+                self._closed.wait(1.0)
+            finally:
+                self._live = False
+                self._clear()
+                pubsub.close()
+
+    def start(self) -> None:
+        """Subscribe for invalidations (per process: call after forking)."""
+        if self.enabled and self._thread is None:
+            self._closed.clear()
+            self._thread = threading.Thread(target=self._listen, name="cache-invalidation", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "live": self._live,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
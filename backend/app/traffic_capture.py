@@ -0,0 +1,256 @@
+# backend/app/traffic_capture.py
+"""
+Opt-in capture of chat traffic for replay (``backend/bench/replay.py``).
+
+Enabled by ``CAPTURE_DIR``.  For every ``POST /chat/query`` and ``POST /chat``
+the middleware keeps the raw request/response bytes, status and server
+time, and hands them to a background thread; the event loop never parses,
+redacts or writes anything.  The thread then
+
+• pseudonymises session ids, client IPs and e-mail addresses with an HMAC
+  keyed on ``SECRET_KEY`` (stable across workers, not reversible)
+• replaces 6-digit codes with ``{{otp}}`` and masks other long numbers
+• samples whole conversations (``CAPTURE_SAMPLE_RATE``); turns with no
+  session id (``POST /chat``) are sampled one by one
+• appends one JSON line per turn to a gzip file of its own
+  (``capture-<host>-<pid>-<start>.jsonl.gz``), flushed about once a second
+
+If the queue backs up, records are dropped (and counted), never waited for.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import random
+import re
+import socket
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from backend.app.forwarding import client_address
+from backend.app.otp import EMAIL_REGEX, scan_input
+
+logger = logging.getLogger(__name__)
+
+CAPTURED_PATHS = frozenset({"/chat/query", "/chat"})
+OTP_PLACEHOLDER = "{{otp}}"
+
+_MAX_BODY_BYTES = 64 * 1024
+_MAX_QUEUE = 10_000
+_FLUSH_SECONDS = 1.0
+
+_CODE = re.compile(r"\b\d{6}\b")
+_LONG_NUMBER = re.compile(r"\d{7,}")
+
+# --------------------------------------------------------------------------- #
+# Anonymisation
+# --------------------------------------------------------------------------- #
+
+class Anonymiser:
+    def __init__(self, key: bytes) -> None:
+        self._key = key
+
+    def pseudonym(self, prefix: str, value: Optional[str]) -> Optional[str]:
+        if not value:
+            return None
+        digest = hmac.new(self._key, value.encode("utf-8"), hashlib.sha256).hexdigest()
+        return f"{prefix}-{digest[:16]}"
+
+    def text(self, value: str) -> str:
+        value = EMAIL_REGEX.sub(lambda m: f"{self.pseudonym('user', m.group(0).lower())}@example.com", value)
+        value = _CODE.sub(OTP_PLACEHOLDER, value)
+        return _LONG_NUMBER.sub(lambda m: "0" * len(m.group(0)), value)
+
+    def payload(self, value: Any) -> Any:
+        """Redact every string in a JSON body; session ids become pseudonyms."""
+        if isinstance(value, dict):
+            return {
+                k: self.pseudonym("s", v) if k == "session_id" and isinstance(v, str) else self.payload(v)
+                for k, v in value.items()
+            }
+        if isinstance(value, list):
+            return [self.payload(v) for v in value]
+        if isinstance(value, str):
+            return self.text(value)
+        return value
+
+
+# --------------------------------------------------------------------------- #
+# Recorder (background writer)
+# --------------------------------------------------------------------------- #
+
+# (ts, path, client, request body, status, duration_ms, response body)
+RawTurn = Tuple[float, str, Optional[str], bytes, int, float, bytes]
+
+
+def _user_text(path: str, body: dict) -> str:
+    return (body.get("user_query") if path == "/chat/query" else body.get("user_input")) or ""
+
+
+class TrafficRecorder:
+    def __init__(self, directory: Path, key: bytes, sample_rate: float = 1.0) -> None:
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.anonymiser = Anonymiser(key)
+        self.counters: Counter = Counter()
+        self._queue: "queue.Queue[Optional[RawTurn]]" = queue.Queue(maxsize=_MAX_QUEUE)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    # ── request path ─────────────────────────────────────────────────────
+    def record(self, turn: RawTurn) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(turn)
+        except queue.Full:
+            self.counters["dropped"] += 1
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+                self._thread.start()
+
+    def close(self) -> None:
+        """Flush and stop the writer (application shutdown)."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+    # ── writer thread ────────────────────────────────────────────────────
+    def _sampled(self, conversation: Optional[str]) -> bool:
+        """Keep or drop whole conversations, so replays stay coherent."""
+        if self.sample_rate >= 1.0:
+            return True
+        if conversation is None:                 # nothing to keep together
+            return random.random() < self.sample_rate
+        bucket = int(hashlib.sha1(conversation.encode("utf-8")).hexdigest()[:8], 16)
+        return bucket / 0xFFFFFFFF < self.sample_rate
+
+    def _line(self, turn: RawTurn) -> Optional[str]:
+        ts, path, client, raw_request, status, duration_ms, raw_response = turn
+        try:
+            body = json.loads(raw_request or b"{}")
+        except ValueError:
+            self.counters["unparsable"] += 1
+            return None
+        try:
+            response = json.loads(raw_response) if raw_response else {}
+        except ValueError:
+            response = {}
+
+        anon = self.anonymiser
+        session = anon.pseudonym("s", body.get("session_id") or response.get("session_id"))
+        if not self._sampled(session):
+            self.counters["sampled_out"] += 1
+            return None
+        return json.dumps({
+            "ts": round(ts, 3),
+            "path": path,
+            "session": session,
+            "client": anon.pseudonym("c", client),
+            "kind": scan_input(_user_text(path, body)).kind,
+            "body": anon.payload(body),
+            "status": status,
+            "duration_ms": round(duration_ms, 2),
+        }, ensure_ascii=False)
+
+    def _run(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = f"capture-{socket.gethostname()}-{os.getpid()}-{time.strftime('%Y%m%dT%H%M%S')}.jsonl.gz"
+        path = self.directory / name
+        logger.info("Capturing chat traffic to %s", path)
+        last_flush = time.monotonic()
+        with gzip.open(path, "at", encoding="utf-8") as out:
+            while True:
+                try:
+                    turn = self._queue.get(timeout=_FLUSH_SECONDS)
+                except queue.Empty:
+                    pass
+                else:
+                    if turn is None:
+                        break
+                    self._write(out, turn)
+                if time.monotonic() - last_flush >= _FLUSH_SECONDS:
+                    out.flush()          # sync-flush: readers see complete lines
+                    last_flush = time.monotonic()
+
+    def _write(self, out: Any, turn: RawTurn) -> None:
+        try:
+            line = self._line(turn)
+        except Exception:                                # noqa: BLE001
+            logger.exception("Could not capture a chat turn")
+            return
+        if line is not None:
+            out.write(line + "\n")
+            self.counters["written"] += 1
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), **self.counters}
+
+
+# --------------------------------------------------------------------------- #
+# ASGI middleware
+# --------------------------------------------------------------------------- #
+
+class CaptureMiddleware:
+    """Pure ASGI (no body re-buffering): copies bytes as they stream past."""
+
+    def __init__(self, app: Any, recorder: TrafficRecorder) -> None:
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in CAPTURED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        ts, started = time.time(), time.perf_counter()
+        request_body, response_body = bytearray(), bytearray()
+        status = 500
+
+        async def receive_and_copy() -> dict:
+            message = await receive()
+            if message["type"] == "http.request" and len(request_body) < _MAX_BODY_BYTES:
+                request_body.extend(message.get("body", b""))
+            return message
+
+        async def send_and_copy(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and len(response_body) < _MAX_BODY_BYTES:
+                response_body.extend(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_and_copy, send_and_copy)
+        finally:
+            self.recorder.record((
+                ts,
+                scope["path"],
+                _client(scope),
+                bytes(request_body),
+                status,
+                (time.perf_counter() - started) * 1000,
+                bytes(response_body),
+            ))
+
+
+def _client(scope: dict) -> Optional[str]:
+    """Same rule as main._client_ip (see backend/app/forwarding.py)."""
+    forwarded = ",".join(
+        value.decode("latin-1") for name, value in scope.get("headers", ()) if name == b"x-forwarded-for"
+    )
+    client = scope.get("client")
+    return client_address(forwarded, client[0] if client else None)
@@ -0,0 +1,114 @@
+# backend/bench/index_recall.py
+"""
+Recall-vs-latency benchmark of FAISS index types against the exact Flat
+baseline.
+
+By default it runs on synthetic clustered vectors shaped like OpenAI
+embeddings, so it needs no API key; ``--from-index`` reuses the vectors
+of the built monument index instead.
+
+    python -m backend.bench.index_recall --n 1000000 --dim 1536 \\
+        --factories "HNSW32" "SQ8" "IVF4096,PQ64" "IVF4096,SQ8"
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+DEFAULT_FACTORIES = ["HNSW32", "SQ8", "IVF1024,SQ8", "IVF1024,PQ32"]
+
+
+def synthetic_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors drawn around a few hundred centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((max(16, n // 1000), dim), dtype=np.float32)
+    xb = centroids[rng.integers(0, len(centroids), n)]
+    xb += 0.3 * rng.standard_normal((n, dim), dtype=np.float32)
+    faiss.normalize_L2(xb)
+    return xb
+
+
+def index_vectors(path: str) -> np.ndarray:
+    index = faiss.read_index(path)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def timed_search(index: faiss.Index, queries: np.ndarray, k: int):
+    """Return (ids, per-query latencies in ms) using one query per call."""
+    latencies = np.empty(len(queries))
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    for i, q in enumerate(queries):
+        t0 = time.perf_counter()
+        _, ids[i] = index.search(q[None, :], k)
+        latencies[i] = (time.perf_counter() - t0) * 1000
+    return ids, latencies
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(np.intersect1d(f, t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def run(xb: np.ndarray, factories: list, nq: int, k: int, train_size: int,
+        nprobe: int, ef_search: int) -> None:
+    n, dim = xb.shape
+    rng = np.random.default_rng(1)
+    xq = xb[rng.choice(n, nq, replace=False)] + 0.05 * rng.standard_normal((nq, dim), dtype=np.float32)
+    faiss.normalize_L2(xq)
+
+    rows = []
+    for factory in ["Flat"] + list(factories):
+        index = faiss.index_factory(dim, factory)
+        t0 = time.perf_counter()
+        if not index.is_trained:
+            index.train(xb[rng.choice(n, min(n, train_size), replace=False)])
+        train_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        index.add(xb)
+        add_s = time.perf_counter() - t0
+
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = nprobe
+        if hasattr(index, "hnsw"):
+            index.hnsw.efSearch = ef_search
+
+        ids, lat = timed_search(index, xq, k)
+        if factory == "Flat":
+            truth = ids
+        rows.append((
+            factory,
+            recall_at_k(ids, truth),
+            np.percentile(lat, 50),
+            np.percentile(lat, 99),
+            faiss.serialize_index(index).nbytes / 2**20,
+            train_s,
+            add_s,
+        ))
+
+    print(f"\nn={n:,} dim={dim} queries={nq} k={k} nprobe={nprobe} efSearch={ef_search}")
+    print(f"{'index':<16}{'recall@k':>9}{'p50 ms':>9}{'p99 ms':>9}{'MiB':>9}{'train s':>9}{'add s':>9}")
+    for factory, recall, p50, p99, mib, train_s, add_s in rows:
+        print(f"{factory:<16}{recall:>9.3f}{p50:>9.3f}{p99:>9.3f}{mib:>9.1f}{train_s:>9.1f}{add_s:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--n", type=int, default=100_000, help="synthetic vectors")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--from-index", metavar="PATH", help="use vectors of an existing index.faiss")
+    parser.add_argument("--factories", nargs="+", default=DEFAULT_FACTORIES)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--train-size", type=int, default=100_000)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef-search", type=int, default=64)
+    ns = parser.parse_args()
+
+    vectors = index_vectors(ns.from_index) if ns.from_index else synthetic_vectors(ns.n, ns.dim)
+    run(vectors, ns.factories, min(ns.queries, len(vectors)), ns.k,
+        ns.train_size, ns.nprobe, ns.ef_search)
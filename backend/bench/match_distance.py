@@ -0,0 +1,82 @@
+# backend/bench/match_distance.py
+"""
+Calibrate ``MATCH_MAX_DISTANCE`` for the embedding model behind the built
+monument index.
+
+Embeds on-topic queries (by default "Tell me about <name>" for catalogue
+monuments) and off-topic ones (a built-in list), prints the distance of
+each query's nearest monument and the cutoff that misroutes the fewest of
+them.  Bring your own queries, one per line, with ``--on`` / ``--off``:
+
+    python -m backend.bench.match_distance --on on_topic.txt --off off_topic.txt
+"""
+
+from __future__ import annotations
+
+import argparse
+from itertools import islice
+from typing import List, Optional
+
+import numpy as np
+
+from backend.app.monument_search import _build_embeddings, _load_index
+
+OFF_TOPIC = [
+    "What's the weather like tomorrow?",
+    "Give me a recipe for banana bread",
+    "How do I reset my router?",
+    "Who won the football match last night?",
+    "Explain quantum entanglement simply",
+    "Recommend a good science fiction novel",
+    "How many calories are in an apple?",
+    "Translate 'good morning' into Spanish",
+    "What is the capital gains tax rate?",
+    "Write a haiku about autumn",
+    "How do I learn Python quickly?",
+    "What's a good stretching routine for runners?",
+]
+
+
+def nearest_distances(queries: List[str]) -> np.ndarray:
+    index, _ = _load_index()
+    vectors = np.asarray(_build_embeddings().embed_documents(queries), dtype="float32")
+    distances, _ = index.search(vectors, 1)
+    return distances[:, 0]
+
+
+def best_cutoff(on: np.ndarray, off: np.ndarray) -> tuple:
+    """``(cutoff, misrouted on-topic, misrouted off-topic)`` with the fewest errors."""
+    best = None
+    for cutoff in np.unique(np.concatenate([on, off])):
+        errors = (int((on > cutoff).sum()), int((off <= cutoff).sum()))
+        if best is None or sum(errors) < sum(best[1:]):
+            best = (float(cutoff), *errors)
+    return best
+
+
+def _read(path: Optional[str]) -> Optional[List[str]]:
+    if path is None:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def run(on_topic: List[str], off_topic: List[str]) -> None:
+    on, off = nearest_distances(on_topic), nearest_distances(off_topic)
+    for label, d in (("on-topic", on), ("off-topic", off)):
+        print(f"{label:<10} n={len(d):<5} min={d.min():.3f} p50={np.median(d):.3f} max={d.max():.3f}")
+    cutoff, missed_on, missed_off = best_cutoff(on, off)
+    print(f"\nMATCH_MAX_DISTANCE={cutoff:.3f}  "
+          f"(on-topic sent off-topic: {missed_on}/{len(on)}, off-topic answered: {missed_off}/{len(off)})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--on", metavar="FILE", help="on-topic queries, one per line")
+    parser.add_argument("--off", metavar="FILE", help="off-topic queries, one per line")
+    parser.add_argument("--sample", type=int, default=200, help="catalogue monuments used by default")
+    ns = parser.parse_args()
+
+    store = _load_index()[1]
+    default_on = [f"Tell me about {store.name(row)}" for row in islice(range(len(store)), ns.sample)]
+    run(_read(ns.on) or default_on, _read(ns.off) or OFF_TOPIC)
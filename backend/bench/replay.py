@@ -0,0 +1,253 @@
+# backend/bench/replay.py
+"""
+Re-drive captured chat traffic (``CAPTURE_DIR``, see
+``backend/app/traffic_capture.py``) against a running instance and compare
+latency distributions between builds.
+
+Conversations keep their turn order and, at ``--speed 1``, their original
+timing; ``--speed 10`` compresses gaps tenfold, ``--speed max`` sends each
+turn as soon as the previous one in its conversation has answered.
+Captured ``{{otp}}`` placeholders are replaced by ``--otp``, so start the
+target with external services stubbed and a matching fixed code:
+
+    LLM_PROVIDER=fake EMAIL_BACKEND=null OTP_FIXED_CODE=123456 \\
+        uvicorn backend.app.main:app --port 8000
+
+    python -m backend.bench.replay run captures/ --speed max --out new.jsonl
+    python -m backend.bench.replay compare old.jsonl new.jsonl
+    python -m backend.bench.replay compare captures/ new.jsonl   # vs production
+
+``OTP_FIXED_CODE`` is refused unless ``EMAIL_BACKEND=null``.  Requires
+``httpx`` (in both requirements files).
+
+``compare`` reads replay results or capture files (using their recorded
+server time) and prints per endpoint / input kind percentiles and deltas.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+OTP_PLACEHOLDER = "{{otp}}"
+PERCENTILES = (50, 90, 99)
+
+# --------------------------------------------------------------------------- #
+# Reading captures / results
+# --------------------------------------------------------------------------- #
+
+def _files(paths: List[str]) -> Iterator[Path]:
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            yield from sorted(p for p in path.iterdir() if p.name.endswith((".jsonl", ".jsonl.gz")))
+        else:
+            yield path
+
+
+def read_records(paths: List[str]) -> List[dict]:
+    """All JSON lines from *paths*; a capture cut short by a crash ends early, cleanly."""
+    records = []
+    for path in _files(paths):
+        opener = gzip.open if path.suffix == ".gz" else open
+        try:
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        records.append(json.loads(line))
+        except (EOFError, gzip.BadGzipFile, json.JSONDecodeError):
+            print(f"warning: {path} is truncated; using the complete lines")
+    return records
+
+
+def conversations(records: List[dict]) -> List[List[dict]]:
+    """Group captured turns by session (``/chat`` carries its history, so each turn stands alone)."""
+    groups: Dict[str, List[dict]] = defaultdict(list)
+    for n, record in enumerate(sorted(records, key=lambda r: r["ts"])):
+        key = record.get("session") if record["path"] == "/chat/query" else None
+        groups[key or f"turn-{n}"].append(record)
+    return sorted(groups.values(), key=lambda turns: turns[0]["ts"])
+
+# --------------------------------------------------------------------------- #
+# Replay
+# --------------------------------------------------------------------------- #
+
+def _fill(value: Any, otp: str) -> Any:
+    if isinstance(value, str):
+        return value.replace(OTP_PLACEHOLDER, otp)
+    if isinstance(value, list):
+        return [_fill(v, otp) for v in value]
+    if isinstance(value, dict):
+        return {k: _fill(v, otp) for k, v in value.items()}
+    return value
+
+
+def _client_ip(pseudonym: Optional[str]) -> str:
+    """A stable private address per captured client, for per-client admission limits."""
+    digest = hashlib.sha1((pseudonym or "anonymous").encode("utf-8")).digest()
+    return f"10.{digest[0]}.{digest[1]}.{digest[2]}"
+
+
+class Replayer:
+    def __init__(self, base_url: str, speed: Optional[float], otp: str,
+                 concurrency: int, timeout: float) -> None:
+        self.base_url = base_url
+        self.speed = speed                      # None → as fast as possible
+        self.otp = otp
+        self.slots = asyncio.Semaphore(concurrency)
+        self.timeout = timeout
+        self.results: List[dict] = []
+
+    async def _turn(self, client: httpx.AsyncClient, turn: dict, session_id: Optional[str]) -> Optional[str]:
+        body = _fill(turn["body"], self.otp)
+        if turn["path"] == "/chat/query":
+            body["session_id"] = session_id
+        started = time.perf_counter()
+        status, error = None, None
+        try:
+            response = await client.post(
+                turn["path"], json=body, headers={"X-Forwarded-For": _client_ip(turn.get("client"))}
+            )
+            status = response.status_code
+            if status == 200 and turn["path"] == "/chat/query":
+                session_id = response.json().get("session_id", session_id)
+        except httpx.HTTPError as exc:
+            error = type(exc).__name__
+        self.results.append({
+            "path": turn["path"],
+            "kind": turn.get("kind", "text"),
+            "status": status,
+            "error": error,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+            "captured_ms": turn.get("duration_ms"),
+        })
+        return session_id
+
+    async def _conversation(self, client: httpx.AsyncClient, turns: List[dict],
+                            t0: float, started: float) -> None:
+        session_id = None
+        for turn in turns:
+            if self.speed:
+                delay = started + (turn["ts"] - t0) / self.speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            async with self.slots:
+                session_id = await self._turn(client, turn, session_id)
+
+    async def run(self, convs: List[List[dict]]) -> float:
+        t0 = convs[0][0]["ts"]
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits) as client:
+            started = time.monotonic()
+            await asyncio.gather(*(self._conversation(client, c, t0, started) for c in convs))
+            return time.monotonic() - started
+
+# --------------------------------------------------------------------------- #
+# Reporting
+# --------------------------------------------------------------------------- #
+
+def _latency(record: dict) -> Optional[float]:
+    return record.get("latency_ms", record.get("duration_ms"))
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def summarise(records: List[dict]) -> Dict[str, dict]:
+    """``"path kind" → {n, errors, 429, 503, p50, p90, p99, max}`` plus an ``all`` row."""
+    groups: Dict[str, List[dict]] = defaultdict(list)
+    for record in records:
+        groups[f"{record['path']} {record.get('kind', 'text')}"].append(record)
+        groups["all"].append(record)
+
+    summary = {}
+    for name, rows in sorted(groups.items()):
+        latencies = sorted(x for x in map(_latency, rows) if x is not None)
+        statuses = [r.get("status") for r in rows]
+        row = {
+            "n": len(rows),
+            "errors": sum(1 for r in rows if r.get("error") or (r.get("status") or 0) >= 500),
+            "429": statuses.count(429),
+            "503": statuses.count(503),
+        }
+        if latencies:
+            row.update({f"p{q}": _percentile(latencies, q) for q in PERCENTILES})
+            row["max"] = latencies[-1]
+        summary[name] = row
+    return summary
+
+
+def print_summary(summary: Dict[str, dict]) -> None:
+    print(f"{'group':<24}{'n':>7}{'err':>6}{'429':>6}{'503':>6}"
+          + "".join(f"{f'p{q} ms':>10}" for q in PERCENTILES) + f"{'max ms':>10}")
+    for name, row in summary.items():
+        print(f"{name:<24}{row['n']:>7}{row['errors']:>6}{row['429']:>6}{row['503']:>6}"
+              + "".join(f"{row.get(f'p{q}', float('nan')):>10.1f}" for q in PERCENTILES)
+              + f"{row.get('max', float('nan')):>10.1f}")
+
+
+def print_comparison(base: Dict[str, dict], new: Dict[str, dict]) -> None:
+    print(f"{'group':<24}" + "".join(f"{f'p{q} base → new':>26}" for q in PERCENTILES) + f"{'errors':>12}")
+    for name in sorted(set(base) & set(new)):
+        cells = []
+        for q in PERCENTILES:
+            b, n = base[name].get(f"p{q}"), new[name].get(f"p{q}")
+            if b is None or n is None:
+                cells.append(f"{'-':>26}")
+                continue
+            delta = (n - b) / b * 100 if b else 0.0
+            cells.append(f"{f'{b:.1f} → {n:.1f} ({delta:+.0f}%)':>26}")
+        errors = f"{base[name]['errors']} → {new[name]['errors']}"
+        print(f"{name:<24}" + "".join(cells) + f"{errors:>12}")
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+
+def _speed(value: str) -> Optional[float]:
+    return None if value == "max" else float(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay captured chat traffic.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = commands.add_parser("run", help="replay captures against an instance")
+    run_cmd.add_argument("captures", nargs="+", help="capture files or directories")
+    run_cmd.add_argument("--url", default="http://localhost:8000")
+    run_cmd.add_argument("--speed", type=_speed, default=1.0, help="1, N (times faster) or max")
+    run_cmd.add_argument("--otp", default="123456", help="the target's OTP_FIXED_CODE")
+    run_cmd.add_argument("--concurrency", type=int, default=256, help="requests in flight")
+    run_cmd.add_argument("--timeout", type=float, default=60.0)
+    run_cmd.add_argument("--out", type=Path, help="write per-turn results (JSON Lines)")
+
+    cmp_cmd = commands.add_parser("compare", help="diff latency distributions")
+    cmp_cmd.add_argument("baseline", help="results file, capture file or capture directory")
+    cmp_cmd.add_argument("candidate", help="results file, capture file or capture directory")
+    ns = parser.parse_args()
+
+    if ns.command == "compare":
+        print_comparison(summarise(read_records([ns.baseline])), summarise(read_records([ns.candidate])))
+        raise SystemExit(0)
+
+    convs = conversations(read_records(ns.captures))
+    if not convs:
+        raise SystemExit("no captured turns found")
+    replayer = Replayer(ns.url, ns.speed, ns.otp, ns.concurrency, ns.timeout)
+    elapsed = asyncio.run(replayer.run(convs))
+    print(f"{len(replayer.results)} turns in {len(convs)} conversations, {elapsed:.1f}s\n")
+    print_summary(summarise(replayer.results))
+    if ns.out:
+        with open(ns.out, "w", encoding="utf-8") as f:
+            for result in replayer.results:
+                f.write(json.dumps(result) + "\n")
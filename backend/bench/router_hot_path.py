@@ -0,0 +1,73 @@
+# backend/bench/router_hot_path.py
+"""
+Micro-benchmark of the per-turn input routing hot path.
+
+Compares the old routing (``find_email`` plus an ``extract_otp`` that
+compiled its regex per call, repeated in ``process_otp_input``) with the
+single-pass ``scan_input`` whose result is cached on the state.
+
+    python -m backend.bench.router_hot_path [--number 200000]
+    python -m backend.bench.router_hot_path --node   # whole process_user_input node
+
+Importing ``backend.app.otp`` needs REDIS_URL in Streamlit secrets (no
+connection is made); ``--node`` also needs the backend's environment.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import timeit
+
+from backend.app.otp import find_email, scan_input
+
+INPUTS = [
+    "Tell me about the Taj Mahal",
+    "my email is jane.doe@example.com",
+    "the code is 482913",
+    "482913",
+    "thanks!",
+    "What is the history of the Great Wall of China and who built it?",
+]
+
+
+def legacy_route(text: str) -> None:
+    """The pre-scanner path: e-mail search, then OTP search twice."""
+    digits = 6
+    find_email(text)
+    for _ in range(2):   # process_user_input + process_otp_input
+        re.compile(rf"\b(\d{{{digits}}})\b").search(text)
+
+
+def scanned_route(text: str) -> None:
+    scan_input(text)
+
+
+def bench(fn, number: int) -> float:
+    """Mean nanoseconds per input."""
+    total = timeit.timeit(lambda: [fn(t) for t in INPUTS], number=number)
+    return total / (number * len(INPUTS)) * 1e9
+
+
+def bench_node(number: int) -> float:
+    from backend.app.langgraph_workflow import ChatState, process_user_input
+
+    def run() -> None:
+        for text in INPUTS:
+            process_user_input(ChatState(user_input=text, awaiting_otp=text.isdigit()))
+
+    return timeit.timeit(run, number=number) / (number * len(INPUTS)) * 1e9
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Router hot-path micro-benchmark.")
+    parser.add_argument("--number", type=int, default=100_000, help="iterations over the input set")
+    parser.add_argument("--node", action="store_true", help="also time process_user_input")
+    ns = parser.parse_args()
+
+    legacy = bench(legacy_route, ns.number)
+    scanned = bench(scanned_route, ns.number)
+    print(f"legacy find_email + extract_otp x2 : {legacy:8.0f} ns/input")
+    print(f"scan_input (single pass, cached)   : {scanned:8.0f} ns/input  ({legacy / scanned:.1f}x)")
+    if ns.node:
+        print(f"process_user_input node            : {bench_node(ns.number // 10):8.0f} ns/input")
@@ -0,0 +1,124 @@
+# backend/bench/worker_rss.py
+"""
+Memory per worker for N processes serving the same FAISS index.
+
+Modes, each run with N forked workers that load the index, search every
+vector once (touching all pages) and report RSS and PSS while all of them
+are alive:
+
+    copy     every worker reads index.faiss into its own memory
+             (the old one-copy-per-worker behaviour)
+    mmap     every worker maps the file read-only (INDEX_MMAP=true)
+    preload  the parent reads it once before forking
+             (gunicorn preload_app + when_ready, see backend/gunicorn.conf.py)
+
+PSS (proportional set size) splits shared pages between the processes
+sharing them, so the PSS total is what the box actually pays.
+
+    python -m backend.bench.worker_rss --workers 8 --n 200000 --dim 1536
+    python -m backend.bench.worker_rss --index backend/vectorstore/monuments/index.faiss
+
+Linux only (reads /proc/self/smaps_rollup).
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+
+import faiss
+import numpy as np
+
+MODES = ("copy", "mmap", "preload")
+
+
+def _mmap_flags() -> int:
+    return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+
+
+def _write_synthetic(path: str, n: int, dim: int) -> None:
+    rng = np.random.default_rng(0)
+    index = faiss.IndexFlatL2(dim)
+    for start in range(0, n, 50_000):
+        index.add(rng.standard_normal((min(50_000, n - start), dim), dtype=np.float32))
+    faiss.write_index(index, path)
+
+
+def _memory_kib() -> tuple:
+    """(RSS, PSS) of this process in KiB."""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0])
+    return values["Rss"], values["Pss"]
+
+
+def _worker(mode, path, inherited, loaded, done, results) -> None:
+    if mode == "preload":
+        index = inherited
+    elif mode == "mmap":
+        index = faiss.read_index(path, _mmap_flags())
+    else:
+        index = faiss.read_index(path)
+
+    # A flat search reads every stored vector, as real traffic eventually does
+    faiss.omp_set_num_threads(1)
+    batch = np.zeros((1, index.d), dtype=np.float32)
+    index.search(batch, 1)
+
+    loaded.wait()                       # measure while every worker is alive
+    results.put(_memory_kib())
+    done.wait()
+
+
+def run(mode: str, path: str, workers: int) -> tuple:
+    ctx = mp.get_context("fork")
+    inherited = faiss.read_index(path) if mode == "preload" else None
+    loaded, done = ctx.Barrier(workers), ctx.Barrier(workers + 1)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(mode, path, inherited, loaded, done, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    samples = [results.get() for _ in procs]
+    done.wait()
+    for p in procs:
+        p.join()
+    rss = [s[0] for s in samples]
+    pss = [s[1] for s in samples]
+    return sum(rss) / len(rss) / 1024, sum(pss) / 1024
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-worker memory of a shared FAISS index.")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--index", metavar="PATH", help="existing index.faiss (default: synthetic Flat)")
+    parser.add_argument("--n", type=int, default=200_000, help="synthetic vectors")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    ns = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = ns.index
+        if path is None:
+            path = os.path.join(tmp, "index.faiss")
+            # Built in a spawned process: the parent must not start FAISS'
+            # OpenMP pool before forking the workers
+            builder = mp.get_context("spawn").Process(
+                target=_write_synthetic, args=(path, ns.n, ns.dim)
+            )
+            builder.start()
+            builder.join()
+
+        size = os.path.getsize(path) / 2**20
+        print(f"index {path}: {size:.1f} MiB, {ns.workers} workers")
+        print(f"{'mode':<10}{'RSS/worker MiB':>16}{'PSS total MiB':>16}")
+        for mode in ns.modes:
+            rss, pss = run(mode, path, ns.workers)
+            print(f"{mode:<10}{rss:>16.1f}{pss:>16.1f}")
@@ -0,0 +1,36 @@
+# backend/gunicorn.conf.py
+"""
+Multi-worker serving with one shared copy of the monument index.
+
+    gunicorn -c backend/gunicorn.conf.py backend.app.main:app
+
+• preload_app imports the app (graph, guide cache, intent model) once in
+  the master; workers inherit it copy-on-write instead of importing it
+  WEB_CONCURRENCY times
+• when_ready builds a stale index in a child process, then loads index +
+  store in the master before any worker is forked.  With INDEX_MMAP
+  (default) both are file-backed read-only mappings, so N workers share
+  one copy in the page cache.  ``python -m backend.bench.worker_rss``
+  measures the difference.
+"""
+
+import os
+import subprocess
+import sys
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+
+
+def when_ready(server):
+    # Building trains/adds with FAISS' OpenMP pool; that pool must not exist
+    # in the master when it forks, so the build runs in its own process.
+    subprocess.run([sys.executable, "-m", "backend.app.monument_search", "--if-stale"], check=True)
+
+    from backend.app.monument_search import preload_index
+
+    server.log.info("Preloaded monument index (%d vectors)", preload_index())
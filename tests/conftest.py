@@ -0,0 +1,91 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# The Streamlit-build modules read st.secrets at import, and Streamlit looks
+# for them in ./.streamlit/secrets.toml: run from a scratch dir holding a
+# minimal offline set (no SendGrid, no real Redis)
+_workdir = Path(tempfile.mkdtemp(prefix="monument-tests-"))
+(_workdir / ".streamlit").mkdir()
+(_workdir / ".streamlit" / "secrets.toml").write_text(
+    'REDIS_URL = "redis://localhost:6379/15"\n'
+    'EMAIL_BACKEND = "null"\n',
+    encoding="utf-8",
+)
+os.chdir(_workdir)
+
+
+@pytest.fixture
+def fake_redis():
+    """An in-memory Redis with Lua support (fakeredis + lupa)."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+class _QueryEmbeddings:
+    """Embeds each known query text to the vector the test placed it at."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [self.vectors[text] for text in texts]
+
+
+@pytest.fixture
+def tiny_index(tmp_path, monkeypatch):
+    """
+    ``build(monuments, vectors, queries)`` → the live ``monument_search``
+    over a real store and Flat index of hand-placed *vectors*; *queries*
+    maps query text to its embedding.
+    """
+    faiss = pytest.importorskip("faiss")
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("streamlit")
+    pytest.importorskip("langchain_openai")
+    from backend.app import monument_search
+    from backend.app.monument_store import MonumentStore, MonumentStoreWriter
+
+    def build(monuments, vectors, queries):
+        with MonumentStoreWriter(tmp_path / "store") as writer:
+            for monument in monuments:
+                writer.append(monument)
+        store = MonumentStore.open(tmp_path / "store")
+        matrix = np.asarray(vectors, dtype="float32")
+        index = faiss.IndexFlatL2(matrix.shape[1])
+        index.add(matrix)
+        monkeypatch.setattr(monument_search, "_load_index", lambda: (index, store))
+        monkeypatch.setattr(monument_search, "_build_embeddings", lambda: _QueryEmbeddings(queries))
+        monument_search._location_filter.cache_clear()
+        return monument_search.monument_search
+
+    yield build
+    monument_search._location_filter.cache_clear()
+
+
+@pytest.fixture
+def backend(monkeypatch, fake_redis):
+    """
+    ``backend.app.main`` with chat state in *fake_redis*.  Use it through a
+    ``TestClient`` without ``with``: the lifespan (warm-up) does not run.
+    """
+    for module in ("fastapi", "httpx", "langgraph", "faiss", "streamlit", "sendgrid"):
+        pytest.importorskip(module)
+    for name, value in {
+        "OPENAI_API_KEY": "test", "SENDGRID_API_KEY": "test",
+        "EMAIL_SENDER": "guide@example.com", "SECRET_KEY": "test",
+    }.items():
+        monkeypatch.setenv(name, value)
+    from backend.app import main
+    from backend.app.redis_store import ReadThroughCache
+
+    monkeypatch.setattr(main, "state_cache", ReadThroughCache(fake_redis, channel="test-state", ttl=0, max_entries=0))
+    return main
@@ -0,0 +1,141 @@
+# tests/test_admission.py
+import asyncio
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("sendgrid")
+
+from backend.app.admission import (  # noqa: E402
+    LLM_POOL, OTP_POOL, AdmissionController, AdmissionPool, Rejected,
+)
+
+
+def _pool(**overrides) -> AdmissionPool:
+    options = dict(max_concurrency=1, max_queue=4, queue_timeout=1.0, per_client_limit=4)
+    options.update(overrides)
+    return AdmissionPool("test", **options)
+
+
+async def _hold(pool: AdmissionPool, client: str, release: asyncio.Event, served: list) -> None:
+    async with pool.admit(client):
+        served.append(client)
+        await release.wait()
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+# --------------------------------------------------------------------------- #
+# Pool choice
+# --------------------------------------------------------------------------- #
+
+@pytest.mark.parametrize("user_input, awaiting_otp, expected", [
+    ("tell me about the Taj Mahal", False, LLM_POOL),
+    ("is the fort open at 123456?", False, LLM_POOL),   # a number is not a code here
+    ("123456", False, LLM_POOL),
+    ("123456", True, OTP_POOL),
+    ("no code yet", True, OTP_POOL),                    # re-prompt, no LLM
+    ("mail it to jane@example.com", False, OTP_POOL),   # send_otp branch
+])
+def test_pool_for_follows_the_graph(user_input, awaiting_otp, expected):
+    assert AdmissionController.pool_for(user_input, awaiting_otp) == expected
+
+# --------------------------------------------------------------------------- #
+# Admission
+# --------------------------------------------------------------------------- #
+
+def test_admits_up_to_concurrency_and_releases():
+    async def scenario():
+        pool = _pool(max_concurrency=2)
+        async with pool.admit("a"):
+            async with pool.admit("b"):
+                assert pool.active == 2 and pool.queued == 0
+        assert pool.active == 0 and pool.counters["admitted"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_per_client_limit_is_429():
+    async def scenario():
+        pool = _pool(max_concurrency=4, per_client_limit=1)
+        async with pool.admit("a"):
+            with pytest.raises(Rejected) as excinfo:
+                async with pool.admit("a"):
+                    pass
+            async with pool.admit("b"):           # other clients are unaffected
+                pass
+        assert excinfo.value.status_code == 429 and excinfo.value.retry_after >= 1
+        assert pool.counters["rejected_client_limit"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_is_503():
+    async def scenario():
+        pool = _pool(max_queue=1)
+        release, served = asyncio.Event(), []
+        tasks = [asyncio.create_task(_hold(pool, c, release, served)) for c in ("a", "b")]
+        await _settle()
+        assert pool.active == 1 and pool.queued == 1
+        with pytest.raises(Rejected) as excinfo:
+            async with pool.admit("c"):
+                pass
+        release.set()
+        await asyncio.gather(*tasks)
+        assert excinfo.value.status_code == 503
+        assert pool.counters["rejected_queue_full"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_queue_deadline_is_503():
+    async def scenario():
+        pool = _pool(queue_timeout=0.05)
+        release, served = asyncio.Event(), []
+        holder = asyncio.create_task(_hold(pool, "a", release, served))
+        await _settle()
+        with pytest.raises(Rejected) as excinfo:
+            async with pool.admit("b"):
+                pass
+        assert excinfo.value.status_code == 503 and pool.queued == 0
+        release.set()
+        await holder
+        assert pool.active == 0 and pool.counters["rejected_queue_timeout"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_waiters_are_served_round_robin_per_client():
+    async def scenario():
+        pool = _pool()
+        release, served = asyncio.Event(), []
+        tasks = [asyncio.create_task(_hold(pool, "first", release, served))]
+        await _settle()
+        for client in ("a", "a", "a", "b"):
+            tasks.append(asyncio.create_task(_hold(pool, client, release, served)))
+            await _settle()
+        release.set()
+        await asyncio.gather(*tasks)
+        return served
+
+    assert asyncio.run(scenario()) == ["first", "a", "b", "a", "a"]
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        pool = _pool()
+        release, served = asyncio.Event(), []
+        holder = asyncio.create_task(_hold(pool, "a", release, served))
+        await _settle()
+        waiter = asyncio.create_task(_hold(pool, "b", release, served))
+        await _settle()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert pool.queued == 0
+        release.set()
+        await holder
+        assert served == ["a"] and pool.active == 0 and not pool._per_client
+
+    asyncio.run(scenario())
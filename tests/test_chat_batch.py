@@ -0,0 +1,69 @@
+# tests/test_chat_batch.py
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+
+
+@pytest.fixture
+def client(backend, monkeypatch):
+    async def echo_graph(state):
+        """Answers with every question the session has asked so far."""
+        messages = [*state.messages, HumanMessage(content=state.user_input)]
+        asked = [m.content for m in messages if m.type == "human"]
+        state.messages = [*messages, AIMessage(content=" | ".join(asked))]
+        return state
+
+    monkeypatch.setattr(backend, "_run_graph", echo_graph)
+    return TestClient(backend.app)
+
+
+def _batch(client, *turns):
+    response = client.post("/chat/batch", json={
+        "turns": [{"user_query": query, "session_id": session} for session, query in turns],
+    })
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+def test_results_follow_the_turns_and_sessions_keep_their_order(client):
+    results = _batch(client, ("a", "taj?"), ("b", "petra?"), ("a", "and agra fort?"), ("b", "thanks"))
+    assert [r["session_id"] for r in results] == ["a", "b", "a", "b"]
+    assert [r["message"] for r in results] == [
+        "taj?", "petra?",
+        "taj? | and agra fort?",             # the second turn sees the first
+        "petra? | thanks",
+    ]
+
+
+def test_states_are_read_and_written_once_per_batch(client, backend, monkeypatch):
+    _batch(client, ("a", "taj?"))
+    calls = []
+    cache = backend.state_cache
+    for name in ("get", "get_many", "set", "set_many"):
+        real = getattr(cache, name)
+        monkeypatch.setattr(cache, name, lambda *args, _name=name, _real=real: calls.append(_name) or _real(*args))
+
+    results = _batch(client, ("a", "hampi?"), ("c", "petra?"), ("a", "bye"))
+    assert calls == ["get_many", "set_many"]
+    assert results[2]["message"] == "taj? | hampi? | bye"        # carried over from the earlier batch
+    assert _batch(client, ("c", "more?"))[0]["message"] == "petra? | more?"
+
+
+def test_failed_turn_leaves_its_session_untouched(client, backend, monkeypatch):
+    _batch(client, ("a", "taj?"))
+    echo_graph = backend._run_graph
+
+    async def flaky_graph(state):
+        if state.user_input == "boom":
+            raise RuntimeError("model down")
+        return await echo_graph(state)
+
+    monkeypatch.setattr(backend, "_run_graph", flaky_graph)
+    results = _batch(client, ("a", "boom"), ("b", "petra?"))
+    assert results[0] == {"session_id": "a", "error": "Chat processing failed: model down"}
+    assert results[1]["message"] == "petra?"
+    assert _batch(client, ("a", "agra?"))[0]["message"] == "taj? | agra?"
@@ -0,0 +1,82 @@
+# tests/test_guide_cache.py
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("streamlit")
+pytest.importorskip("langchain_openai")
+
+from backend.app.guide_cache import GuideCache, content_hash, monument_key  # noqa: E402
+
+CHURCH_YORK = {"name": "St. Mary's Church", "location": "York, England", "description": "Medieval parish church."}
+CHURCH_DOVER = {"name": "St. Mary's Church", "location": "Dover, England", "description": "Saxon church in a castle."}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return GuideCache(tmp_path / "guides.jsonl")
+
+
+def test_key_includes_the_location():
+    assert monument_key(CHURCH_YORK) == "st-mary-s-church--york-england"
+    assert monument_key({"name": "Fort", "location": None}) == "fort"
+
+
+def test_same_named_monuments_keep_their_own_guides(cache, tmp_path):
+    cache.put(CHURCH_YORK, "York guide")
+    cache.put(CHURCH_DOVER, "Dover guide")
+
+    reloaded = GuideCache(tmp_path / "guides.jsonl")
+    assert reloaded.get(CHURCH_YORK) == "York guide"
+    assert reloaded.get(CHURCH_DOVER) == "Dover guide"
+    assert reloaded.load() == 2
+
+
+def test_missing_and_empty_fields_hash_alike():
+    raw = {"name": "Fort", "location": None, "description": "Old walls."}
+    stored = {"id": 7, "name": "Fort", "location": "", "description": "Old walls."}
+    assert content_hash(raw) == content_hash(stored)
+
+
+def test_legacy_name_only_entry_still_serves_its_own_record(cache, tmp_path):
+    legacy = {"key": "st-mary-s-church", "hash": content_hash(CHURCH_YORK), "name": "St. Mary's Church",
+              "guide": "Old York guide"}
+    (tmp_path / "guides.jsonl").write_text(json.dumps(legacy) + "\n", encoding="utf-8")
+    assert cache.get(CHURCH_YORK) == "Old York guide"
+    assert cache.get(CHURCH_DOVER) is None               # same name, different record
+
+
+def test_compact_keeps_guides_appended_meanwhile(cache, tmp_path, monkeypatch):
+    cache.put(CHURCH_YORK, "York guide v1")
+    cache.put(CHURCH_YORK, "York guide v2")
+    worker = GuideCache(tmp_path / "guides.jsonl")      # a web worker, storing a miss
+    real_read = cache._read
+
+    def read_then_race():
+        entries = real_read()
+        racer = threading.Thread(target=worker.put, args=(CHURCH_DOVER, "Dover guide"))
+        racer.start()
+        racer.join(timeout=0.2)
+        assert racer.is_alive()                         # held off until the rewrite is in place
+        read_then_race.racer = racer
+        return entries
+
+    monkeypatch.setattr(cache, "_read", read_then_race)
+    cache.compact()
+    read_then_race.racer.join(timeout=5)
+
+    reloaded = GuideCache(tmp_path / "guides.jsonl")
+    assert reloaded.get(CHURCH_YORK) == "York guide v2"
+    assert reloaded.get(CHURCH_DOVER) == "Dover guide"
+    lines = (tmp_path / "guides.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 2                              # compacted York, then Dover
+
+
+def test_written_in_needs_the_run_and_the_current_record(cache):
+    cache.put(CHURCH_YORK, "York guide", run_id="r1")
+    assert cache.written_in(CHURCH_YORK, "r1")
+    assert not cache.written_in(CHURCH_YORK, "r2")
+    assert not cache.written_in({**CHURCH_YORK, "description": "Rebuilt in 1850."}, "r1")
+    assert not cache.written_in(CHURCH_DOVER, "r1")
@@ -0,0 +1,65 @@
+# tests/test_guide_pipeline.py
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("faiss")
+pytest.importorskip("streamlit")
+pytest.importorskip("langchain_openai")
+
+from backend.app import guide_pipeline  # noqa: E402
+from backend.app.guide_cache import GuideCache  # noqa: E402
+from backend.app.guide_pipeline import GuidePipeline  # noqa: E402
+from backend.app.llm_gateway import FakeChatProvider  # noqa: E402
+
+MONUMENTS = [
+    {"name": f"Fort {n}", "location": "Agra, India", "description": f"Walls of fort {n}."} for n in range(4)
+]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = GuideCache(tmp_path / "guides.jsonl")
+    monkeypatch.setattr(guide_pipeline, "guide_cache", cache)
+    monkeypatch.setattr(guide_pipeline, "llm_gateway", SimpleNamespace(primary=FakeChatProvider()))
+    return cache
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "monuments.jsonl"
+    path.write_text("".join(json.dumps(m) + "\n" for m in MONUMENTS), encoding="utf-8")
+    return path
+
+
+def _run(source, **options) -> GuidePipeline:
+    pipeline = GuidePipeline(concurrency=2, **options)
+    asyncio.run(pipeline.run(source))
+    return pipeline
+
+
+def test_rerun_skips_fresh_guides(cache, source):
+    assert _run(source).written == 4
+    again = _run(source)
+    assert (again.written, again.skipped) == (0, 4)
+
+
+def test_forced_run_rewrites_every_guide_once(cache, source):
+    first = _run(source)
+    forced = _run(source, force=True)
+    assert (forced.written, forced.skipped) == (4, 0)
+    assert forced.run_id != first.run_id
+    assert all(cache.written_in(m, forced.run_id) for m in MONUMENTS)
+
+
+def test_resumed_forced_run_skips_what_it_already_rewrote(cache, source):
+    _run(source, run_id="old")
+    for monument in MONUMENTS[:3]:                  # the forced run got this far, then crashed
+        cache.put(monument, "rewritten", run_id="forced")
+    resumed = _run(source, force=True, run_id="forced")
+    assert (resumed.written, resumed.skipped) == (1, 3)
+    assert cache.get(MONUMENTS[0]) == "rewritten"
+    assert cache.written_in(MONUMENTS[3], "forced")
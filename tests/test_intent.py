@@ -0,0 +1,124 @@
+# tests/test_intent.py
+import sys
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from backend.app.intent import (  # noqa: E402
+    MONUMENT_QUERY, REPLIES, IntentClassifier, _load_model, follow_up_choice,
+)
+
+# --------------------------------------------------------------------------- #
+# Rules
+# --------------------------------------------------------------------------- #
+
+@pytest.mark.parametrize("text, expected", [
+    ("", "empty"),
+    ("  ?! ", "empty"),
+    ("hi", "greeting"),
+    ("Hiii there!", "greeting"),
+    ("good  evening :)", "greeting"),
+    ("Namaste", "greeting"),
+    ("thanks", "thanks"),
+    ("Thank you so much again!", "thanks"),
+    ("thx", "thanks"),
+    ("ok", "acknowledgement"),
+    ("Got it.", "acknowledgement"),
+    ("bye!", "goodbye"),
+    ("see ya", "goodbye"),
+    ("what can you do?", "help"),
+    ("Who are you", "help"),
+])
+def test_rules_answer_small_talk(text, expected):
+    intent = IntentClassifier().classify(text)
+    assert (intent.name, intent.source) == (expected, "rule")
+    assert intent.reply == REPLIES[expected]
+
+
+@pytest.mark.parametrize("text", [
+    "hi-tech fortifications of the Maginot line",
+    "thanks to the Mughals, what survives in Agra?",
+    "hello kitty museum",
+    "ok so who built the Red Fort?",
+    "great wall of china",
+    "nice cathedral",
+    "help me plan a visit to Hampi",
+    "goodbye to Berlin wall: when did it fall?",
+    "Who are you named after, Taj Mahal?",
+])
+def test_questions_starting_with_small_talk_words_reach_the_graph(text):
+    intent = IntentClassifier().classify(text)
+    assert (intent.name, intent.reply, intent.source) == (MONUMENT_QUERY, None, "default")
+
+# --------------------------------------------------------------------------- #
+# Optional model
+# --------------------------------------------------------------------------- #
+
+def test_without_joblib_the_model_is_skipped(monkeypatch):
+    monkeypatch.setitem(sys.modules, "joblib", None)        # import raises ImportError
+    assert _load_model("intent.joblib") is None
+
+
+@pytest.mark.parametrize("prediction, expected", [
+    (("thanks", 0.95), "thanks"),
+    (("thanks", 0.5), MONUMENT_QUERY),                     # below the threshold
+    (("weather", 0.99), MONUMENT_QUERY),                   # no canned reply for it
+])
+def test_model_answers_only_when_confident(prediction, expected):
+    classifier = IntentClassifier(model=lambda text: prediction, threshold=0.85)
+    intent = classifier.classify("much obliged, friend")
+    assert intent.name == expected
+    assert intent.source == ("model" if expected != MONUMENT_QUERY else "default")
+
+
+def test_failing_model_falls_back_to_the_graph():
+    def broken(text):
+        raise ValueError("bad pickle")
+
+    assert IntentClassifier(model=broken).classify("much obliged").name == MONUMENT_QUERY
+
+# --------------------------------------------------------------------------- #
+# Counters
+# --------------------------------------------------------------------------- #
+
+def test_stats_count_intents_and_avoided_llm_calls():
+    classifier = IntentClassifier()
+    assert classifier.stats() == {"counts": {}, "total": 0, "llm_calls_avoided": 0, "avoided_ratio": 0.0}
+    for text in ("hi", "thanks", "Tell me about Hampi", "What is Petra?"):
+        classifier.classify(text)
+    assert classifier.stats() == {
+        "counts": {"greeting": 1, "thanks": 1, MONUMENT_QUERY: 2},
+        "total": 4,
+        "llm_calls_avoided": 2,
+        "avoided_ratio": 0.5,
+    }
+
+# --------------------------------------------------------------------------- #
+# Follow-ups
+# --------------------------------------------------------------------------- #
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("next", 0),
+    ("The next one please", 0),
+    ("tell me more about the second one", 1),
+    ("what about the 3rd?", 2),
+    ("ok, show me another", 0),
+    ("and the first monument.", 0),
+    ("How about the THIRD site!", 2),
+])
+def test_follow_up_positions(text, expected):
+    assert follow_up_choice(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    None,
+    "tell me about the Taj Mahal",
+    "the second world war memorial in London",    # a position word inside a real question
+    "next week I'm visiting Agra",
+    "fourth",
+])
+def test_other_input_is_not_a_follow_up(text):
+    assert follow_up_choice(text) is None
@@ -0,0 +1,66 @@
+# tests/test_langgraph_workflow.py
+import pytest
+
+pytest.importorskip("langgraph")
+pytest.importorskip("faiss")
+pytest.importorskip("streamlit")
+pytest.importorskip("sendgrid")
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+from backend.app import langgraph_workflow, monument_search  # noqa: E402
+from backend.app.config import runtime_settings  # noqa: E402
+from backend.app.langgraph_workflow import ChatState, check_query_type  # noqa: E402
+
+MONUMENTS = [
+    {"name": "Taj Mahal", "location": "Agra, India", "description": "Marble mausoleum."},
+    {"name": "Eiffel Tower", "location": "Paris, France", "description": "Iron tower."},
+]
+QUERIES = {
+    "taj mahal opening hours": [0.9, 0.1],       # squared distance 0.02 to the Taj Mahal
+    "banana bread recipe": [-0.5, -0.5],         # 2.5 from both
+}
+
+
+@pytest.fixture
+def search(tiny_index, monkeypatch):
+    monkeypatch.setattr(monument_search, "_embeddings_id", lambda: "openai")   # real distances
+    return tiny_index(MONUMENTS, [[1.0, 0.0], [0.0, 1.0]], QUERIES)
+
+
+def _route(query: str) -> ChatState:
+    return check_query_type(ChatState(messages=[HumanMessage(content=query)], user_input=None))
+
+
+def test_without_a_cutoff_every_query_gets_a_monument(search, monkeypatch):
+    monkeypatch.setattr(runtime_settings, "match_max_distance", None)
+    assert runtime_settings.model_fields["match_max_distance"].default is None     # baseline routing
+    state = _route("banana bread recipe")
+    assert state.next_step == "generate_monument_response"
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("taj mahal opening hours", "generate_monument_response"),     # inside the cutoff
+    ("banana bread recipe", "generate_non_monument_response"),     # beyond it
+])
+def test_cutoff_routes_both_sides(search, monkeypatch, query, expected):
+    monkeypatch.setattr(runtime_settings, "match_max_distance", 0.5)
+    state = _route(query)
+    assert state.next_step == expected
+    if expected == "generate_monument_response":
+        assert state.monument_results[0]["name"] == "Taj Mahal"
+
+
+def test_fake_embeddings_never_apply_a_cutoff(search, monkeypatch):
+    monkeypatch.setattr(runtime_settings, "match_max_distance", 0.5)
+    monkeypatch.setattr(monument_search, "_embeddings_id", lambda: "fake")
+    assert langgraph_workflow.match_threshold() is None
+
+
+def test_calibration_picks_the_cutoff_with_fewest_misroutes():
+    np = pytest.importorskip("numpy")
+    from backend.bench.match_distance import best_cutoff
+
+    on, off = np.array([0.1, 0.2, 0.3, 0.9]), np.array([0.5, 0.8, 1.2])
+    assert best_cutoff(on, off) == (0.3, 1, 0)          # the 0.9 outlier stays misrouted
+    assert best_cutoff(np.array([0.1]), np.array([0.05]))[1:] == (0, 1)
@@ -0,0 +1,178 @@
+# tests/test_llm_gateway.py
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("langchain_core")
+
+import asyncio  # noqa: E402
+import time  # noqa: E402
+
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+
+from backend.app import llm_gateway  # noqa: E402
+from backend.app.llm_gateway import (  # noqa: E402
+    CircuitBreaker, FakeChatProvider, LLMGateway, LLMUnavailableError, streaming_turn,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_gateway.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(3):
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failures=3, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_half_open_admits_a_single_probe(clock):
+    breaker = CircuitBreaker(failures=3, reset_seconds=30)
+    _open(breaker)
+    clock[0] += 30
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert not breaker.allow()
+
+
+def test_probe_success_closes(clock):
+    breaker = CircuitBreaker(failures=3, reset_seconds=30)
+    _open(breaker)
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_probe_failure_reopens(clock):
+    breaker = CircuitBreaker(failures=3, reset_seconds=30)
+    _open(breaker)
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    clock[0] += 30
+    assert breaker.allow()
+
+
+def test_lost_probe_is_replaced_after_a_cool_down(clock):
+    breaker = CircuitBreaker(failures=3, reset_seconds=30)
+    _open(breaker)
+    clock[0] += 30
+    assert breaker.allow()                       # never reports back
+    clock[0] += 29
+    assert not breaker.allow()
+    clock[0] += 1
+    assert breaker.allow()
+
+
+# --------------------------------------------------------------------------- #
+# Gateway (offline, FakeChatProvider)
+# --------------------------------------------------------------------------- #
+
+class _Broken(FakeChatProvider):
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise RuntimeError("provider down")
+
+
+def _gateway(primary, fallback=None, timeout=5.0, **options) -> LLMGateway:
+    options.setdefault("breaker", CircuitBreaker(5, 30.0))
+    return LLMGateway(primary, fallback=fallback, timeout=timeout, hedge_min_delay=0.05, **options)
+
+
+def _force_hedging(gateway: LLMGateway) -> None:
+    """Known latencies far below the provider's: every call gets hedged."""
+    for _ in range(llm_gateway._HEDGE_MIN_SAMPLES):
+        gateway.latency.record(0.01)
+
+
+def test_slow_call_is_hedged_once_latencies_are_known():
+    gateway = _gateway(FakeChatProvider(latency=0.3))
+    assert gateway.invoke("first").content.startswith("[offline answer")
+    assert gateway.counters["hedged"] == 0              # no samples yet: no hedge
+    _force_hedging(gateway)
+    gateway.invoke("second")
+    assert gateway.counters["hedged"] == 1
+
+
+def test_deadline_is_split_between_primary_and_fallback():
+    gateway = _gateway(FakeChatProvider(latency=2.0), fallback=FakeChatProvider(), timeout=0.4)
+    assert gateway._budgets(None) == pytest.approx((0.3, 0.1))
+    started = time.monotonic()
+    reply = gateway.invoke("slow primary")
+    assert time.monotonic() - started < 0.4             # primary abandoned at its 0.3s share
+    assert reply.content.startswith("[offline answer")
+    assert gateway.counters["primary_failed"] == 1 and gateway.counters["fallback_model"] == 1
+
+
+def test_open_breaker_goes_straight_to_fallback():
+    gateway = _gateway(_Broken(), fallback=FakeChatProvider(), breaker=CircuitBreaker(1, 30.0))
+    gateway.invoke("trips the breaker")
+    gateway.invoke("skips the primary")
+    assert gateway.breaker.state == "open"
+    assert gateway.counters["primary_failed"] == 1 and gateway.counters["breaker_skipped"] == 1
+    assert gateway.counters["fallback_model"] == 2
+
+
+def test_last_good_answer_is_the_last_resort():
+    gateway = _gateway(FakeChatProvider())
+    good = gateway.invoke("known prompt")
+    gateway.primary = _Broken()
+    assert gateway.invoke("known prompt").content == good.content
+    assert gateway.counters["cached_answer"] == 1
+    with pytest.raises(LLMUnavailableError):
+        gateway.invoke("never answered")
+
+
+def test_pool_is_sized_for_hedges_and_fallbacks():
+    assert llm_gateway._pool_size(32, hedge=True, fallback=True) == 96
+    assert llm_gateway._pool_size(32, hedge=False, fallback=False) == 32
+
+# --------------------------------------------------------------------------- #
+# Streamed turns
+# --------------------------------------------------------------------------- #
+
+async def _stream(gateway: LLMGateway, prompt: str) -> tuple:
+    """Drive one node through astream_events like /chat/ws: (forwarded, all tokens, reply)."""
+    node = RunnableLambda(lambda text: gateway.invoke(text).content)
+    forwarded, seen, reply = [], [], None
+    with streaming_turn() as tokens:
+        async for event in node.astream_events(prompt, version="v2"):
+            if event["event"] == "on_chat_model_stream":
+                seen.append(event["data"]["chunk"].content)
+                if tokens.forwards(event["run_id"]):
+                    forwarded.append(event["data"]["chunk"].content)
+            elif event["event"] == "on_chain_end" and not event.get("parent_ids"):
+                reply = event["data"]["output"]
+    return forwarded, seen, reply
+
+
+def test_streamed_turn_is_never_hedged():
+    gateway = _gateway(FakeChatProvider(latency=0.3))
+    _force_hedging(gateway)
+    forwarded, seen, reply = asyncio.run(_stream(gateway, "stream me"))
+    assert gateway.counters["hedged"] == 0
+    assert "".join(forwarded) == reply                  # one completion, no duplicates
+    assert seen == forwarded
+
+
+def test_streamed_turn_drops_the_abandoned_primary_and_does_not_stream_the_fallback():
+    # primary budget 1.2s: it is abandoned, then streams at 1.3s while the
+    # fallback (unstreamed) is still answering
+    gateway = _gateway(FakeChatProvider(latency=1.3), fallback=FakeChatProvider(latency=0.3), timeout=1.6)
+    forwarded, seen, reply = asyncio.run(_stream(gateway, "stream me"))
+    assert gateway.counters["fallback_model"] == 1
+    assert seen and forwarded == []                     # late primary tokens were held back
+    assert reply.startswith("[offline answer")
@@ -0,0 +1,112 @@
+# tests/test_logging_setup.py
+import io
+import logging
+import os
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from backend.app import logging_setup  # noqa: E402
+from backend.app.logging_setup import (  # noqa: E402
+    SamplingFilter, _RedactingQueueHandler, redact, request_id_var,
+)
+
+
+def _record(msg: str, level: int = logging.INFO, *args) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, msg, args, None)
+
+
+@pytest.fixture
+def handler():
+    out = io.StringIO()
+    target = logging.StreamHandler(out)
+    target.setFormatter(logging.Formatter("%(message)s"))
+    handler = _RedactingQueueHandler(target)
+    yield handler, out
+    handler.stop()
+
+# --------------------------------------------------------------------------- #
+# Redaction
+# --------------------------------------------------------------------------- #
+
+@pytest.mark.parametrize("message, expected", [
+    ("code 123456 for jane@example.com", "code ****** for j***@example.com"),
+    ("order 1234567 stays", "order 1234567 stays"),
+    ("no secrets here", "no secrets here"),
+])
+def test_redact(message, expected):
+    assert redact(message) == expected
+
+
+def test_queued_records_are_redacted_after_formatting(handler):
+    handler, out = handler
+    handler.handle(_record("OTP %s sent to %s", logging.INFO, "654321", "jane@example.com"))
+    handler.stop()
+    assert out.getvalue() == "OTP ****** sent to j***@example.com\n"
+
+# --------------------------------------------------------------------------- #
+# Sampling
+# --------------------------------------------------------------------------- #
+
+def test_sampling_always_keeps_warnings():
+    keep_none = SamplingFilter(0.0)
+    assert keep_none.filter(_record("boom", logging.WARNING))
+    assert not keep_none.filter(_record("chatter"))
+    assert SamplingFilter(1.0).filter(_record("chatter"))
+
+
+def test_sampling_decides_once_per_request():
+    sampler = SamplingFilter(0.5)
+    for request_id in ("a", "b", "c", "d"):
+        token = request_id_var.set(request_id)
+        try:
+            decisions = {sampler.filter(_record(f"line {n}")) for n in range(10)}
+        finally:
+            request_id_var.reset(token)
+        assert len(decisions) == 1
+
+# --------------------------------------------------------------------------- #
+# Per-process listener
+# --------------------------------------------------------------------------- #
+
+def test_configure_starts_no_thread(monkeypatch):
+    monkeypatch.setattr(logging_setup, "_handler", None)
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    try:
+        logging_setup.configure_logging(json_output=False)
+        assert logging_setup._handler._listener is None
+    finally:
+        logging_setup._handler.stop()
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+
+def test_listener_starts_on_first_record(handler):
+    handler, _ = handler
+    assert handler._listener is None
+    handler.handle(_record("hello"))
+    assert handler._listener is not None and handler._pid == os.getpid()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_child_runs_its_own_listener(handler, tmp_path):
+    handler, _ = handler
+    handler.handle(_record("parent"))                   # parent's listener is running
+    child_log = tmp_path / "child.log"
+    pid = os.fork()
+    if pid == 0:                                        # child: log, flush, report
+        status = 1
+        try:
+            with open(child_log, "w") as f:
+                handler.target = logging.StreamHandler(f)
+                handler.handle(_record("from child"))
+                handler.stop()
+            status = 0
+        finally:
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert child_log.read_text() == "from child\n"
+    assert handler._pid == os.getpid()                  # the parent's is untouched
@@ -0,0 +1,199 @@
+# tests/test_monument_search.py
+import functools
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("streamlit")
+pytest.importorskip("langchain_openai")
+
+from backend.app import monument_search  # noqa: E402
+from backend.app.config import runtime_settings  # noqa: E402
+from backend.app.monument_search import MonumentSearch  # noqa: E402
+from backend.app.monument_store import MonumentStore  # noqa: E402
+
+PLACES = ["agra", "new delhi", "delhi", "nice", "reading", "bath", "split", "uk"]
+
+
+@pytest.fixture
+def search(monkeypatch):
+    store = SimpleNamespace(
+        location_terms={place: (0, 0) for place in PLACES},
+        max_location_words=2,
+    )
+    monkeypatch.setattr(monument_search, "_load_index", lambda: (None, store))
+    return MonumentSearch()
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Monuments in Agra?", ("agra",)),
+    ("what to see in New Delhi", ("new delhi",)),
+    ("forts near agra or delhi", ("agra", "delhi")),
+    ("castles in the UK", ("uk",)),
+    ("a nice view of the Taj", ()),
+    ("reading about Mughal forts", ()),
+    ("is there a roman bath worth seeing", ()),
+    ("how to split the trip", ()),
+    ("Agra fort history", ()),
+])
+def test_places_need_a_location_phrase(search, query, expected):
+    assert search.detect_locations(query) == expected
+
+# --------------------------------------------------------------------------- #
+# Location facets over a real index
+# --------------------------------------------------------------------------- #
+
+MONUMENTS = [
+    {"name": "Taj Mahal", "location": "Agra, India", "description": "Marble mausoleum."},
+    {"name": "Agra Fort", "location": "Agra, India", "description": "Red sandstone fort."},
+    {"name": "Eiffel Tower", "location": "Paris, France", "description": "Iron tower."},
+    {"name": "Louvre", "location": "Paris, France", "description": "Museum palace."},
+]
+VECTORS = [[1.0, 0.0], [0.0, 1.0], [0.9, 0.1], [0.8, 0.2]]
+QUERIES = {
+    "towers in agra": [0.85, 0.15],                  # nearest overall: the Paris rows
+    "forts in agra": [0.1, 0.9],
+    "museums in paris": [0.8, 0.2],
+    "iron towers": [0.9, 0.1],
+    "a palace museum in agra": [0.7, 0.3],           # Agra has nothing close
+}
+
+_real_load_index = monument_search._load_index
+
+
+def _names(results):
+    return [hit["name"] for hit in results]
+
+
+@pytest.mark.parametrize("selector_support", [True, False])
+def test_facet_keeps_only_monuments_in_the_place(tiny_index, monkeypatch, selector_support):
+    search = tiny_index(MONUMENTS, VECTORS, QUERIES)
+    monkeypatch.setattr(monument_search, "_accepts_selector", lambda index: selector_support)
+    assert _names(search.search("towers in agra", k=2)) == ["Taj Mahal", "Agra Fort"]
+
+
+def test_one_search_per_location_facet(tiny_index, monkeypatch):
+    search = tiny_index(MONUMENTS, VECTORS, QUERIES)
+    facets = []
+    real_facet_search = monument_search._facet_search
+
+    def facet_search(index, queries, k, facet):
+        facets.append((len(queries), facet.ids.tolist()))
+        return real_facet_search(index, queries, k, facet)
+
+    monkeypatch.setattr(monument_search, "_facet_search", facet_search)
+    results = search.search_many(["towers in agra", "iron towers", "museums in paris", "forts in agra"], k=1)
+    assert sorted(facets) == [(1, [2, 3]), (2, [0, 1])]            # both Agra queries in one search
+    assert [_names(r) for r in results] == [["Taj Mahal"], ["Eiffel Tower"], ["Louvre"], ["Agra Fort"]]
+
+
+def test_weak_facet_hits_fall_back_to_the_full_index(tiny_index, monkeypatch):
+    search = tiny_index(MONUMENTS, VECTORS, QUERIES)
+    monkeypatch.setattr(monument_search, "_embeddings_id", lambda: "openai")      # real distances
+    monkeypatch.setattr(runtime_settings, "match_max_distance", None)
+    assert _names(search.search("a palace museum in agra", k=1)) == ["Taj Mahal"]
+    monkeypatch.setattr(runtime_settings, "match_max_distance", 0.1)              # Taj Mahal: 0.18
+    assert _names(search.search("a palace museum in agra", k=1)) == ["Louvre"]
+    assert _names(search.search("forts in agra", k=1)) == ["Agra Fort"]          # 0.02: kept
+
+
+def test_hits_beyond_max_distance_are_dropped(tiny_index):
+    search = tiny_index(MONUMENTS, VECTORS, QUERIES)
+    assert _names(search.search("iron towers", k=4, max_distance=0.01)) == ["Eiffel Tower"]
+    assert len(search.search("iron towers", k=4)) == 4
+
+
+def test_indexes_without_selectors_are_detected():
+    faiss = pytest.importorskip("faiss")
+    assert monument_search._accepts_selector(faiss.IndexFlatL2(4))
+    assert not monument_search._accepts_selector(faiss.IndexLSH(4, 8))
+
+
+def test_loading_the_index_drops_facets_of_the_previous_one(tiny_index, tmp_path, monkeypatch):
+    faiss = pytest.importorskip("faiss")
+    search = tiny_index(MONUMENTS, VECTORS, QUERIES)
+    search.search("towers in agra")
+    assert monument_search._location_filter.cache_info().currsize == 1
+
+    faiss.write_index(monument_search._load_index()[0], str(tmp_path / "store" / "index.faiss"))
+    monkeypatch.setattr(monument_search, "INDEX_DIR", tmp_path / "store")
+    monkeypatch.setattr(monument_search, "_load_index", _real_load_index)
+    _real_load_index.clear()
+    try:
+        _real_load_index()
+    finally:
+        _real_load_index.clear()
+    assert monument_search._location_filter.cache_info().currsize == 0
+
+# --------------------------------------------------------------------------- #
+# Building
+# --------------------------------------------------------------------------- #
+
+@pytest.fixture
+def catalogue(tmp_path, monkeypatch):
+    """Five monuments embedded in batches of two."""
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    source = tmp_path / "monuments.jsonl"
+    source.write_text("".join(
+        json.dumps({"name": f"Monument {n}", "location": "Agra, India", "description": f"Site {n}."}) + "\n"
+        for n in range(5)
+    ), encoding="utf-8")
+    monkeypatch.setattr(monument_search, "_build_embeddings", lambda: DeterministicFakeEmbedding(size=8))
+    monkeypatch.setattr(monument_search, "iter_batches", functools.partial(monument_search.iter_batches, size=2))
+    return source
+
+
+def test_untrained_index_types_are_not_buffered(catalogue, tmp_path, monkeypatch):
+    monkeypatch.setattr(runtime_settings, "index_train_size", 100)
+    monkeypatch.setattr(monument_search, "_new_index", pytest.fail)      # the training path
+    monument_search.build_index(catalogue, tmp_path / "index", factory="Flat")
+    assert MonumentStore.open(tmp_path / "index").get(4)["name"] == "Monument 4"
+
+
+def test_trained_index_types_train_on_the_first_rows(catalogue, tmp_path, monkeypatch):
+    monkeypatch.setattr(runtime_settings, "index_train_size", 3)
+    trained_on = []
+    real_new_index = monument_search._new_index
+
+    def new_index(dim, factory, train):
+        trained_on.append(len(train))
+        return real_new_index(dim, factory, train)
+
+    monkeypatch.setattr(monument_search, "_new_index", new_index)
+    monument_search.build_index(catalogue, tmp_path / "index", factory="PQ2x2")
+    assert trained_on == [4]                                            # two batches of two
+    with open(tmp_path / "index" / "index.json", encoding="utf-8") as f:
+        assert json.load(f)["count"] == 5
+
+# --------------------------------------------------------------------------- #
+# Answers
+# --------------------------------------------------------------------------- #
+
+class _Gateway:
+    def __init__(self, reply=None):
+        self.reply = reply
+
+    def invoke(self, prompt):
+        if self.reply is None:
+            raise monument_search.LLMUnavailableError("all models down")
+        return SimpleNamespace(content=self.reply)
+
+
+def test_model_answer_raises_instead_of_degrading(tiny_index, monkeypatch):
+    tiny_index(MONUMENTS, VECTORS, QUERIES)
+    monkeypatch.setattr(monument_search, "llm_gateway", _Gateway())
+    with pytest.raises(monument_search.LLMUnavailableError):       # nothing for a memo to keep
+        monument_search.model_answer("iron towers")
+    assert monument_search.answer_monument_query("iron towers").startswith(
+        "Eiffel Tower (Paris, France): Iron tower."
+    )
+
+
+def test_answers_come_from_the_model_when_it_is_up(tiny_index, monkeypatch):
+    tiny_index(MONUMENTS, VECTORS, QUERIES)
+    monkeypatch.setattr(monument_search, "llm_gateway", _Gateway("It is in Paris."))
+    assert monument_search.model_answer("iron towers") == "It is in Paris."
+    assert monument_search.answer_monument_query("iron towers") == "It is in Paris."
@@ -0,0 +1,138 @@
+# tests/test_monument_store.py
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.app.monument_store import (  # noqa: E402
+    STORE_VERSION, MonumentStore, MonumentStoreWriter, location_tokens,
+)
+
+MONUMENTS = [
+    {"name": "Taj Mahal", "location": "Agra, Uttar Pradesh, India", "description": "Marble mausoleum."},
+    {"name": "Château de Chambord", "location": "Loir-et-Cher, France", "description": "Renaissance château."},
+    {"name": "Agra Fort", "location": "Agra, Uttar Pradesh, India", "description": ""},
+    {"name": "Nameless cairn", "location": None, "description": None},
+]
+
+
+def _write(directory, monuments=MONUMENTS):
+    with MonumentStoreWriter(directory) as writer:
+        rows = [writer.append(m) for m in monuments]
+    return rows
+
+
+def _set_version(directory, version):
+    meta = json.loads((directory / "store.json").read_text(encoding="utf-8"))
+    (directory / "store.json").write_text(json.dumps({**meta, "version": version}), encoding="utf-8")
+
+
+def test_location_tokens():
+    assert location_tokens("Agra, Uttar Pradesh; India") == ["agra", "uttar pradesh", "india"]
+    assert location_tokens("Île-de-France / France") == ["ile de france", "france"]
+    assert location_tokens(None) == []
+
+# --------------------------------------------------------------------------- #
+# Round trip
+# --------------------------------------------------------------------------- #
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_rows_read_back_as_written(tmp_path, mmap):
+    assert _write(tmp_path) == [0, 1, 2, 3]
+    store = MonumentStore.open(tmp_path, mmap=mmap)
+    assert len(store) == 4
+    assert store.get(1) == {"id": 1, **MONUMENTS[1]}
+    assert store.get(2)["description"] == ""
+    assert store.get(3) == {"id": 3, "name": "Nameless cairn", "location": "", "description": ""}
+    assert store.get(4) is None and store.get(-1) is None
+
+
+def test_locations_are_interned_and_inverted(tmp_path):
+    _write(tmp_path)
+    store = MonumentStore.open(tmp_path)
+    assert store.location_table == ["Agra, Uttar Pradesh, India", "Loir-et-Cher, France", ""]
+    assert store.location_ids("agra").tolist() == [0, 2]
+    assert store.location_ids("uttar pradesh").tolist() == [0, 2]
+    assert store.location_ids("loir et cher").tolist() == [1]
+    assert store.location_ids("paris").tolist() == []
+    assert store.max_location_words == 3
+
+
+def test_empty_store(tmp_path):
+    _write(tmp_path, [])
+    store = MonumentStore.open(tmp_path)
+    assert len(store) == 0 and store.location_terms == {} and store.max_location_words == 0
+
+
+def test_failed_write_leaves_no_store(tmp_path):
+    with pytest.raises(KeyError):
+        with MonumentStoreWriter(tmp_path) as writer:
+            writer.append(MONUMENTS[0])
+            raise KeyError("boom")
+    assert not MonumentStore.exists(tmp_path)
+
+# --------------------------------------------------------------------------- #
+# Format version
+# --------------------------------------------------------------------------- #
+
+def test_other_versions_are_not_opened(tmp_path):
+    _write(tmp_path)
+    assert MonumentStore.exists(tmp_path)
+    _set_version(tmp_path, STORE_VERSION - 1)
+    assert not MonumentStore.exists(tmp_path)
+    with pytest.raises(ValueError, match="version"):
+        MonumentStore.open(tmp_path)
+
+
+def test_version_mismatch_forces_a_rebuild(tmp_path, monkeypatch):
+    pytest.importorskip("faiss")
+    pytest.importorskip("streamlit")
+    pytest.importorskip("langchain_openai")
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    from backend.app import monument_search
+
+    source = tmp_path / "monuments.jsonl"
+    source.write_text("".join(json.dumps(m) + "\n" for m in MONUMENTS[:2]), encoding="utf-8")
+    index_dir = tmp_path / "index"
+    monkeypatch.setattr(monument_search, "_build_embeddings", lambda: DeterministicFakeEmbedding(size=8))
+    builds = []
+    real_build = monument_search._build_index
+    monkeypatch.setattr(monument_search, "_build_index", lambda *args: builds.append(args) or real_build(*args))
+
+    monument_search.ensure_index(source, index_dir)
+    monument_search.ensure_index(source, index_dir)
+    assert len(builds) == 1                                 # current: left alone
+
+    _set_version(index_dir, STORE_VERSION - 1)
+    monument_search.ensure_index(source, index_dir)
+    assert len(builds) == 2
+    assert MonumentStore.exists(index_dir)
+    assert MonumentStore.open(index_dir).get(0)["name"] == "Taj Mahal"
+
+
+@pytest.mark.parametrize("factory, expected", [
+    ("Flat", "IndexFlat"),
+    ("SQ8", "IndexScalarQuantizer"),
+    ("IVF64,Flat", "IndexFlat"),            # 64 lists over 10 vectors: too few to train
+])
+def test_index_factory_trains_or_falls_back_to_flat(factory, expected):
+    faiss = pytest.importorskip("faiss")
+    pytest.importorskip("streamlit")
+    pytest.importorskip("langchain_openai")
+    from backend.app.monument_search import _new_index
+
+    train = np.random.default_rng(0).random((10, 8), dtype=np.float32)
+    index = _new_index(8, factory, train)
+    assert index.is_trained
+    assert type(faiss.downcast_index(index)).__name__.startswith(expected)
+
+
+def test_recall_benchmark_counts_true_neighbours_found():
+    pytest.importorskip("faiss")
+    from backend.bench.index_recall import recall_at_k
+
+    truth = np.array([[1, 2, 3], [4, 5, 6]])
+    assert recall_at_k(truth, truth) == 1.0
+    assert recall_at_k(np.array([[3, 2, 9], [7, 8, 9]]), truth) == pytest.approx(2 / 6)
@@ -0,0 +1,176 @@
+# tests/test_otp.py
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("sendgrid")
+
+from backend.app import otp  # noqa: E402
+
+EMAIL = "jane@example.com"
+
+
+@pytest.fixture
+def client(fake_redis, monkeypatch):
+    monkeypatch.setattr(otp, "get_redis_client", lambda: fake_redis)
+    return fake_redis
+
+
+def _expire_cooldown(client, email=EMAIL):
+    client.delete(otp.cooldown_key(email))
+
+
+# --------------------------------------------------------------------------- #
+# scan_input
+# --------------------------------------------------------------------------- #
+
+@pytest.mark.parametrize("text, expected", [
+    ("my mail is jane@example.com", ("email", "jane@example.com", None)),
+    ("the code is 123456", ("otp", None, "123456")),
+    ("tell me about the Taj Mahal", ("text", None, None)),
+    ("jane123456@example.com", ("email", "jane123456@example.com", None)),
+    ("1234567 is too long", ("text", None, None)),
+    ("123456 jane@example.com", ("email", "jane@example.com", "123456")),
+    (None, ("text", None, None)),
+])
+def test_scan_input(text, expected):
+    assert tuple(otp.scan_input(text)) == expected
+
+
+# --------------------------------------------------------------------------- #
+# Keys
+# --------------------------------------------------------------------------- #
+
+def test_keys_are_hash_tagged():
+    assert otp.otp_key(EMAIL) == "otp:{jane@example.com}"
+    assert otp.cooldown_key(EMAIL) == "otp_cooldown:{jane@example.com}"
+    assert otp.rate_key("session", "s1") == "otp_rate:session:{s1}"
+
+
+# --------------------------------------------------------------------------- #
+# check_otp_send / issue_otp
+# --------------------------------------------------------------------------- #
+
+def test_first_send_is_allowed_and_recorded(client):
+    decision = otp.check_otp_send(EMAIL, session_id="s1", ip="10.0.0.1")
+    assert decision.allowed and decision.reason == "ok"
+    assert decision.reuse_otp is None
+    assert client.zcard(otp.rate_key("email", EMAIL)) == 1
+    assert client.zcard(otp.rate_key("session", "s1")) == 1
+    assert client.zcard(otp.rate_key("ip", "10.0.0.1")) == 1
+    assert client.pttl(otp.cooldown_key(EMAIL)) > 0
+
+
+def test_cooldown_refuses_and_hands_back_the_code(client):
+    _, code = otp.issue_otp(EMAIL)
+    decision, again = otp.issue_otp(EMAIL)
+    assert again is None
+    assert decision.reason == "cooldown"
+    assert 0 < decision.retry_after <= otp.RESEND_COOLDOWN_SECONDS
+    assert decision.reuse_otp == code
+
+
+def test_after_cooldown_the_valid_code_is_reused(client):
+    _, code = otp.issue_otp(EMAIL)
+    _expire_cooldown(client)
+    decision, again = otp.issue_otp(EMAIL)
+    assert decision.allowed
+    assert again == code
+
+
+def test_refused_send_records_nothing(client):
+    otp.check_otp_send(EMAIL, ip="10.0.0.1")
+    otp.check_otp_send(EMAIL, ip="10.0.0.1")         # inside the cooldown
+    assert client.zcard(otp.rate_key("email", EMAIL)) == 1
+    assert client.zcard(otp.rate_key("ip", "10.0.0.1")) == 1
+
+
+@pytest.mark.parametrize("limited_scope", ["email", "session", "ip"])
+def test_each_window_applies_its_own_limit(client, monkeypatch, limited_scope):
+    # Distinct limits per scope, so a mix-up in the ARGV arithmetic shows
+    limits = {"email": (50, 3600), "session": (50, 3600), "ip": (50, 3600)}
+    limits[limited_scope] = (2, 3600)
+    monkeypatch.setattr(otp, "OTP_SEND_LIMITS", limits)
+
+    for n in range(2):
+        email = EMAIL if limited_scope == "email" else f"user{n}@example.com"
+        assert otp.check_otp_send(email, session_id="s1", ip="10.0.0.1").allowed
+        _expire_cooldown(client, email)
+
+    email = EMAIL if limited_scope == "email" else "user9@example.com"
+    decision = otp.check_otp_send(email, session_id="s1", ip="10.0.0.1")
+    assert decision.reason == "limited"
+    assert 3590 < decision.retry_after <= 3600
+    assert decision.reuse_otp is None
+
+
+def test_window_keys_expire_with_their_window(client):
+    otp.check_otp_send(EMAIL, ip="10.0.0.1")
+    window_ms = otp.OTP_SEND_LIMITS["ip"][1] * 1000
+    assert 0 < client.pttl(otp.rate_key("ip", "10.0.0.1")) <= window_ms
+
+
+def test_cluster_refusal_undoes_the_recorded_send(client, monkeypatch):
+    monkeypatch.setattr(otp, "is_cluster", lambda _client: True)
+    monkeypatch.setattr(otp, "OTP_SEND_LIMITS", {"email": (5, 3600), "session": (5, 3600), "ip": (1, 3600)})
+
+    assert otp.check_otp_send("a@example.com", session_id="s1", ip="10.0.0.1").allowed
+
+    decision = otp.check_otp_send(EMAIL, session_id="s2", ip="10.0.0.1")
+    assert decision.reason == "limited"
+    assert decision.reuse_otp is None
+    # The e-mail and session windows took the send back, the cooldown is lifted
+    assert client.zcard(otp.rate_key("email", EMAIL)) == 0
+    assert client.zcard(otp.rate_key("session", "s2")) == 0
+    assert not client.exists(otp.cooldown_key(EMAIL))
+    assert client.zcard(otp.rate_key("ip", "10.0.0.1")) == 1
+
+
+def test_cluster_send_records_every_window(client, monkeypatch):
+    monkeypatch.setattr(otp, "is_cluster", lambda _client: True)
+    assert otp.check_otp_send(EMAIL, session_id="s1", ip="10.0.0.1").allowed
+    for key in (otp.rate_key("email", EMAIL), otp.rate_key("session", "s1"), otp.rate_key("ip", "10.0.0.1")):
+        assert client.zcard(key) == 1
+
+
+# --------------------------------------------------------------------------- #
+# Verification
+# --------------------------------------------------------------------------- #
+
+def test_verify_otp_is_single_use(client):
+    otp.store_otp(EMAIL, "123456")
+    assert not otp.verify_otp(EMAIL, "654321")
+    assert otp.verify_otp(EMAIL, "123456")
+    assert not otp.verify_otp(EMAIL, "123456")
+
+
+# --------------------------------------------------------------------------- #
+# Client address (the per-IP scope)
+# --------------------------------------------------------------------------- #
+
+@pytest.mark.parametrize("forwarded, proxies, expected", [
+    (None, 1, "10.0.0.2"),                              # no header: the peer
+    ("203.0.113.7", 1, "203.0.113.7"),
+    ("6.6.6.6, 203.0.113.7", 1, "203.0.113.7"),         # forged first hop skipped
+    ("6.6.6.6, 203.0.113.7, 10.1.1.1", 2, "203.0.113.7"),
+    ("6.6.6.6", 0, "10.0.0.2"),                         # no proxy: header ignored
+])
+def test_client_address_trusts_only_proxy_hops(forwarded, proxies, expected):
+    from backend.app.forwarding import client_address
+
+    assert client_address(forwarded, "10.0.0.2", trusted_proxies=proxies) == expected
+
+
+def test_forged_forwarded_for_does_not_reset_ip_limit(client, monkeypatch):
+    from backend.app.forwarding import client_address
+
+    monkeypatch.setattr(otp, "OTP_SEND_LIMITS", {"email": (50, 3600), "session": (50, 3600), "ip": (2, 3600)})
+    decisions = [
+        # A fresh forged hop and no session each time; our proxy appends the real address
+        otp.check_otp_send(
+            f"user{n}@example.com",
+            ip=client_address(f"198.51.100.{n}, 203.0.113.7", "10.0.0.2", trusted_proxies=1),
+        )
+        for n in range(3)
+    ]
+    assert [d.allowed for d in decisions] == [True, True, False]
+    assert decisions[-1].reason == "limited"
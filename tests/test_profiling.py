@@ -0,0 +1,91 @@
+# tests/test_profiling.py
+import marshal
+import threading
+
+import pytest
+
+from backend.app.profiling import GraphProfiler
+
+# --------------------------------------------------------------------------- #
+# GraphProfiler
+# --------------------------------------------------------------------------- #
+
+def test_second_concurrent_run_is_not_profiled():
+    profiler = GraphProfiler()
+    profiler.start(seconds=60, sample_rate=1.0, max_runs=10)
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_graph():
+        entered.set()
+        release.wait(5)
+        return "first"
+
+    first = threading.Thread(target=profiler.run, args=(slow_graph,))
+    first.start()
+    assert entered.wait(5)
+    assert profiler.run(lambda: "second") == "second"       # still runs, just unprofiled
+    release.set()
+    first.join(5)
+    assert (profiler.runs, profiler.skipped_busy) == (1, 1)
+
+
+def test_window_closes_after_max_runs():
+    profiler = GraphProfiler()
+    assert not profiler.wants()                             # no window open
+    profiler.start(seconds=60, sample_rate=1.0, max_runs=2)
+    for _ in range(2):
+        assert profiler.wants()
+        profiler.run(sum, [1, 2])
+    assert not profiler.wants() and profiler.until is None
+    assert profiler.status()["active"] is False
+
+
+def test_profiles_accumulate_into_one_report():
+    profiler = GraphProfiler()
+    assert profiler.report() is None and profiler.dump() is None
+    profiler.start(seconds=60, sample_rate=1.0, max_runs=5)
+    for _ in range(3):
+        profiler.run(sorted, [3, 1, 2])
+    assert "sorted" in profiler.report(limit=5)
+    assert any("sorted" in name for _, _, name in marshal.loads(profiler.dump()))
+
+# --------------------------------------------------------------------------- #
+# Admin endpoints
+# --------------------------------------------------------------------------- #
+
+@pytest.fixture
+def client(backend, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(backend, "graph_profiler", GraphProfiler())
+    return TestClient(backend.app)
+
+
+@pytest.mark.parametrize("method, path", [
+    ("post", "/admin/profile/graph?seconds=5"),
+    ("get", "/admin/profile/graph?format=status"),
+    ("delete", "/admin/profile/graph"),
+    ("get", "/admin/profile/memory"),
+])
+def test_admin_endpoints_are_hidden_without_a_configured_token(client, backend, monkeypatch, method, path):
+    monkeypatch.setattr(backend.settings, "admin_token", None)
+    response = client.request(method, path, headers={"X-Admin-Token": "anything"})
+    assert response.status_code == 404
+
+
+def test_admin_endpoints_need_the_token(client, backend, monkeypatch):
+    monkeypatch.setattr(backend.settings, "admin_token", "s3cret")
+    assert client.get("/admin/profile/graph?format=status").status_code == 403
+    assert client.get("/admin/profile/graph?format=status",
+                      headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    headers = {"X-Admin-Token": "s3cret"}
+    started = client.post("/admin/profile/graph?seconds=5&sample_rate=1&max_runs=3", headers=headers)
+    assert started.status_code == 200 and started.json()["active"] is True
+    assert client.get("/admin/profile/graph", headers=headers).status_code == 404    # nothing profiled yet
+    backend.graph_profiler.run(sorted, [2, 1])
+    report = client.get("/admin/profile/graph", headers=headers)
+    assert report.status_code == 200 and "sorted" in report.text
+    stopped = client.delete("/admin/profile/graph", headers=headers)
+    assert stopped.status_code == 200 and stopped.json()["active"] is False
+    assert client.get("/admin/profile/memory", headers=headers).json() == {"active": False}
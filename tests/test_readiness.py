@@ -0,0 +1,80 @@
+# tests/test_readiness.py
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+async def _redis_ok() -> dict:
+    return {"ok": True, "latency_ms": 0.1}
+
+
+async def _redis_down() -> dict:
+    return {"ok": False, "error": "Connection refused"}
+
+
+@pytest.fixture
+def warmup(backend, monkeypatch):
+    """Two warmup steps; ``fail["b"]`` makes the second one raise that many times."""
+    fail = {"b": 0}
+
+    def step_b():
+        if fail["b"]:
+            fail["b"] -= 1
+            raise ConnectionError("not yet")
+
+    monkeypatch.setattr(backend, "WARMUP_STEPS", {"a": lambda: None, "b": step_b})
+    monkeypatch.setattr(backend, "warmup_status", {"a": {"ok": False}, "b": {"ok": False}})
+    return fail
+
+
+def test_failed_steps_are_retried_with_backoff(backend, warmup, monkeypatch):
+    warmup["b"] = 2
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(seconds):
+        delays.append(seconds)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    asyncio.run(backend._warm_up())
+    assert delays == [1.0, 2.0]
+    assert backend.is_warm()
+    assert backend.warmup_status["b"]["ok"] is True
+
+
+@pytest.mark.parametrize("warm, probe, status", [
+    (False, _redis_ok, 503),
+    (True, _redis_down, 503),
+    (True, _redis_ok, 200),
+])
+def test_ready_needs_warmup_and_redis(backend, warmup, monkeypatch, warm, probe, status):
+    if warm:
+        asyncio.run(backend._warm_up())
+    monkeypatch.setattr(backend, "redis_health", backend.CachedCheck(probe, ttl=60))
+    response = TestClient(backend.app).get("/ready")
+    assert response.status_code == status
+    assert response.json()["ready"] is (status == 200)
+    assert TestClient(backend.app).get("/health").status_code == 200      # liveness regardless
+
+
+def test_checks_are_cached_for_their_ttl(backend):
+    calls = []
+
+    async def probe():
+        calls.append(1)
+        return {"ok": True}
+
+    async def main():
+        check = backend.CachedCheck(probe, ttl=60)
+        results = await asyncio.gather(*(check() for _ in range(5)))
+        await check()
+        return results
+
+    assert asyncio.run(main()) == [{"ok": True}] * 5
+    assert len(calls) == 1
@@ -0,0 +1,70 @@
+# tests/test_redis_store.py
+import json
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from backend.app.redis_store import ReadThroughCache  # noqa: E402
+
+
+@pytest.fixture
+def cache(fake_redis):
+    cache = ReadThroughCache(fake_redis, channel="test-invalidation", ttl=60, max_entries=16)
+    cache._live = True                      # as if the subscriber were connected
+    return cache
+
+
+def _announce(cache: ReadThroughCache, *keys: str) -> None:
+    """Another worker's write arriving over pub/sub."""
+    cache._on_message(json.dumps(["other-worker", list(keys)]))
+
+
+def test_reads_are_served_locally_until_invalidated(cache, fake_redis):
+    fake_redis.set("k", "v1")
+    assert cache.get("k") == "v1"
+    fake_redis.set("k", "v2")
+    assert cache.get("k") == "v1" and cache.hits == 1
+    _announce(cache, "k")
+    assert cache.get("k") == "v2" and cache.invalidations == 1
+
+
+def test_invalidation_during_a_read_is_not_lost(cache, fake_redis, monkeypatch):
+    fake_redis.set("k", "old")
+    real_get = fake_redis.get
+
+    def racing_get(key):
+        value = real_get(key)               # the reply carries the old value…
+        fake_redis.set(key, "new")          # …another worker writes meanwhile
+        _announce(cache, key)               # …and its announcement lands first
+        return value
+
+    monkeypatch.setattr(fake_redis, "get", racing_get)
+    assert cache.get("k") == "old"
+    monkeypatch.setattr(fake_redis, "get", real_get)
+    assert cache.get("k") == "new"          # the stale reply was not kept
+
+
+def test_local_write_voids_reads_in_flight(cache, fake_redis, monkeypatch):
+    fake_redis.set("k", "old")
+    real_mget = fake_redis.mget
+
+    def racing_mget(keys):
+        values = real_mget(keys)
+        cache.set("k", "mine")              # a turn on this worker saves meanwhile
+        return values
+
+    monkeypatch.setattr(fake_redis, "mget", racing_mget)
+    assert cache.get_many(["k"]) == ["old"]
+    assert cache.get("k") == "mine" and cache.hits == 1
+
+
+def test_own_writes_are_cached_and_announced(cache, fake_redis):
+    pubsub = fake_redis.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe("test-invalidation")
+    cache.set_many({"a": "1", "b": "2"})
+    assert cache.get_many(["a", "b"]) == ["1", "2"] and cache.hits == 2
+    message = None
+    for _ in range(5):                      # the first reads may be the subscribe reply
+        message = message or pubsub.get_message(timeout=0.2)
+    assert json.loads(message["data"]) == [cache._origin, ["a", "b"]]
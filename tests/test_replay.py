@@ -0,0 +1,56 @@
+# tests/test_replay.py
+import gzip
+import json
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from backend.bench.replay import _fill, conversations, read_records, summarise  # noqa: E402
+
+
+def _turn(ts, path="/chat/query", session="s-1", **extra):
+    return {"ts": ts, "path": path, "session": session, **extra}
+
+
+def test_truncated_capture_keeps_its_complete_lines(tmp_path):
+    lines = "".join(json.dumps(_turn(n)) + "\n" for n in range(3)).encode()
+    with gzip.open(tmp_path / "capture-a.jsonl.gz", "wb") as f:
+        f.write(lines)
+    data = (tmp_path / "capture-a.jsonl.gz").read_bytes()
+    (tmp_path / "capture-a.jsonl.gz").write_bytes(data[:-8])      # crash: no gzip trailer
+    (tmp_path / "results.jsonl").write_text(json.dumps(_turn(9)) + "\n", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+
+    assert [r["ts"] for r in read_records([str(tmp_path)])] == [0, 1, 2, 9]
+
+
+def test_conversations_keep_sessions_together_in_order():
+    records = [
+        _turn(3, session="s-2"),
+        _turn(1),
+        _turn(2, path="/chat", session=None),                    # carries its own history
+        _turn(4),
+        _turn(5, path="/chat/query", session=None),              # no session: on its own
+    ]
+    assert [[t["ts"] for t in c] for c in conversations(records)] == [[1, 4], [2], [3], [5]]
+
+
+def test_otp_placeholders_are_filled_everywhere():
+    body = {"user_query": "{{otp}}", "messages": [{"content": "code {{otp}}"}], "n": 1}
+    assert _fill(body, "123456") == {"user_query": "123456", "messages": [{"content": "code 123456"}], "n": 1}
+
+
+def test_summary_groups_by_endpoint_and_kind():
+    records = [
+        {"path": "/chat/query", "kind": "text", "status": 200, "latency_ms": ms} for ms in range(1, 101)
+    ] + [
+        {"path": "/chat/query", "kind": "otp", "status": 429, "duration_ms": 5.0},
+        {"path": "/chat", "status": None, "error": "ReadTimeout", "latency_ms": 30000.0},
+    ]
+    summary = summarise(records)
+    assert set(summary) == {"all", "/chat/query text", "/chat/query otp", "/chat text"}
+    text = summary["/chat/query text"]
+    assert (text["n"], text["errors"], text["p50"], text["p99"], text["max"]) == (100, 0, 51, 100, 100)
+    assert summary["/chat/query otp"]["429"] == 1
+    assert summary["all"]["errors"] == 1 and summary["all"]["n"] == 102
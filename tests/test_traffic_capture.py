@@ -0,0 +1,97 @@
+# tests/test_traffic_capture.py
+import gzip
+import json
+import random
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("sendgrid")
+
+from backend.app.traffic_capture import (  # noqa: E402
+    OTP_PLACEHOLDER, Anonymiser, TrafficRecorder,
+)
+
+KEY = b"capture-test-key"
+
+# --------------------------------------------------------------------------- #
+# Anonymiser
+# --------------------------------------------------------------------------- #
+
+def test_pseudonyms_are_stable_per_key():
+    first, second = Anonymiser(KEY), Anonymiser(KEY)
+    assert first.pseudonym("s", "session-1") == second.pseudonym("s", "session-1")
+    assert first.pseudonym("s", "session-1").startswith("s-")
+    assert first.pseudonym("s", "session-1") != first.pseudonym("s", "session-2")
+    assert first.pseudonym("s", "session-1") != Anonymiser(b"other-key").pseudonym("s", "session-1")
+    assert first.pseudonym("s", None) is None and first.pseudonym("s", "") is None
+
+
+def test_email_addresses_become_stable_pseudonyms():
+    anon = Anonymiser(KEY)
+    masked = anon.text("mail it to Jane.Doe@Example.com please")
+    assert "jane" not in masked.lower()
+    user = anon.pseudonym("user", "jane.doe@example.com")
+    assert masked == f"mail it to {user}@example.com please"
+    assert anon.text("jane.doe@example.com") == f"{user}@example.com"        # case folded
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("123456", OTP_PLACEHOLDER),
+    ("my code is 654321.", f"my code is {OTP_PLACEHOLDER}."),
+    ("call +44 7700900123", "call +44 0000000000"),
+    ("built in 1632", "built in 1632"),
+])
+def test_codes_and_long_numbers_are_masked(text, expected):
+    assert Anonymiser(KEY).text(text) == expected
+
+
+def test_payload_redacts_every_string():
+    anon = Anonymiser(KEY)
+    body = {"session_id": "abc", "user_query": "code 123456", "messages": [{"content": "a@b.io"}], "n": 3}
+    assert anon.payload(body) == {
+        "session_id": anon.pseudonym("s", "abc"),
+        "user_query": f"code {OTP_PLACEHOLDER}",
+        "messages": [{"content": f"{anon.pseudonym('user', 'a@b.io')}@example.com"}],
+        "n": 3,
+    }
+
+# --------------------------------------------------------------------------- #
+# Sampling
+# --------------------------------------------------------------------------- #
+
+def test_conversations_are_kept_or_dropped_whole(tmp_path):
+    recorder = TrafficRecorder(tmp_path, KEY, sample_rate=0.5)
+    sessions = [f"s-{n}" for n in range(200)]
+    decisions = {s: recorder._sampled(s) for s in sessions}
+    assert all(recorder._sampled(s) == kept for s, kept in decisions.items())
+    assert 60 < sum(decisions.values()) < 140
+
+
+def test_sessionless_turns_are_sampled_one_by_one(tmp_path, monkeypatch):
+    monkeypatch.setattr(random, "random", iter([0.1, 0.9] * 50).__next__)
+    recorder = TrafficRecorder(tmp_path, KEY, sample_rate=0.5)
+    assert sum(recorder._sampled(None) for _ in range(100)) == 50
+    assert TrafficRecorder(tmp_path, KEY, sample_rate=1.0)._sampled(None)
+
+# --------------------------------------------------------------------------- #
+# Writer
+# --------------------------------------------------------------------------- #
+
+def test_recorded_turns_are_written_anonymised(tmp_path):
+    recorder = TrafficRecorder(tmp_path, KEY)
+    request = json.dumps({"user_query": "send it to jane@example.com", "session_id": "abc"}).encode()
+    recorder.record((1700000000.0, "/chat/query", "203.0.113.7", request, 200, 12.345, b'{"message": "ok"}'))
+    recorder.record((1700000001.0, "/chat", None, b"not json", 200, 1.0, b""))
+    recorder.close()
+
+    (capture,) = tmp_path.glob("capture-*.jsonl.gz")
+    with gzip.open(capture, "rt", encoding="utf-8") as f:
+        (line,) = [json.loads(row) for row in f]
+    anon = Anonymiser(KEY)
+    assert line["session"] == anon.pseudonym("s", "abc")
+    assert line["client"] == anon.pseudonym("c", "203.0.113.7")
+    assert line["kind"] == "email"
+    assert line["body"]["user_query"] == f"send it to {anon.pseudonym('user', 'jane@example.com')}@example.com"
+    assert line["duration_ms"] == 12.35
+    assert recorder.counters == {"written": 1, "unparsable": 1}